@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dropped_kerb_mapper.settings')
+# Serve the tile proxies from the async views (see mapper.urls)
+os.environ.setdefault('ASGI_ENABLED', 'True')
 
 application = get_asgi_application()
@@ -89,6 +89,173 @@ DATABASES = {
 # Override the engine to use GeoDjango's PostGIS backend
 DATABASES['default']['ENGINE'] = 'django.contrib.gis.db.backends.postgis'
 
+# Caches
+# Use Redis when REDIS_URL is set so cached data is shared between gunicorn
+# workers, otherwise fall back to a per-process local memory cache.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Reverse geocode cache
+# Coordinates are quantised to a grid of this many metres before lookup
+GEOCODE_CACHE_GRID_METRES = float(
+    os.environ.get("GEOCODE_CACHE_GRID_METRES", 10))
+GEOCODE_CACHE_TTL = int(
+    os.environ.get("GEOCODE_CACHE_TTL", 90 * 24 * 3600))  # 90 days
+GEOCODE_CACHE_MAX_ENTRIES = int(
+    os.environ.get("GEOCODE_CACHE_MAX_ENTRIES", 200_000))
+# Run eviction on roughly one in this many cache writes
+GEOCODE_CACHE_EVICT_EVERY = 500
+# Cache alias placed in front of the database table ('' to disable)
+GEOCODE_SHARED_CACHE = os.environ.get("GEOCODE_SHARED_CACHE", 'default')
+# Shared cache hits refresh an entry's database last_used_at at most this
+# often, so the eviction of least recently used rows spares hot entries
+GEOCODE_CACHE_TOUCH_INTERVAL = 24 * 3600  # 1 day
+
+# Reverse geocoder backend: 'mapper.geocoders.NominatimGeocoder' or
+# 'mapper.local_geocoder.LocalGeocoder' (offline, built with
+# manage.py build_geocoder_index)
+GEOCODER_BACKEND = os.environ.get("GEOCODER_BACKEND",
+                                  'mapper.geocoders.NominatimGeocoder')
+GEOCODER_INDEX_DIR = os.environ.get("GEOCODER_INDEX_DIR",
+                                    os.path.join(BASE_DIR, 'geocoder_index'))
+
+# Nominatim client (mapper.geocoders.NominatimGeocoder)
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL",
+                               'https://nominatim.openstreetmap.org')
+GEOCODER_CONNECT_TIMEOUT = 3.05  # seconds
+GEOCODER_READ_TIMEOUT = 5  # seconds
+GEOCODER_RETRIES = 1
+# Open the circuit after this many consecutive failed lookups...
+GEOCODER_BREAKER_THRESHOLD = 5
+# ...and fail fast for this many seconds before trying again
+GEOCODER_BREAKER_COOLDOWN = 60
+
+# Outbound HTTP (mapper.upstream): the most requests each process keeps in
+# flight to one upstream host, which is also the size of its connection pool
+UPSTREAM_MAX_CONNECTIONS_PER_HOST = int(
+    os.environ.get("UPSTREAM_MAX_CONNECTIONS_PER_HOST", 16))
+
+# Set when serving the ASGI application (dropped_kerb_mapper.asgi sets it),
+# to route the tile proxies to the async views in mapper.async_views
+ASGI_ENABLED = os.environ.get("ASGI_ENABLED", "False") == "True"
+# Connections the async tile proxies may hold open, per process
+ASYNC_UPSTREAM_MAX_CONNECTIONS = int(
+    os.environ.get("ASYNC_UPSTREAM_MAX_CONNECTIONS", 200))
+
+# OS Maps API raster tile URL template, overridable to point the tile proxy
+# and seed_tiles at a local stand-in tile server
+OS_TILE_URL = os.environ.get(
+    "OS_TILE_URL",
+    'https://api.os.uk/maps/raster/v1/zxy/Light_3857/{z}/{x}/{y}.png')
+
+# OS and Google tile proxies and the Google session token request
+TILE_CONNECT_TIMEOUT = 3.05  # seconds
+TILE_READ_TIMEOUT = 10  # seconds
+TILE_RETRIES = 1
+
+# Google Maps tile session (mapper.utils.get_google_session_token): refresh
+# it in the background this many seconds before it expires, with at most
+# one refresh attempt per GOOGLE_SESSION_LOCK_TTL seconds across workers
+# (per worker without REDIS_URL, as the lock is held in the default cache)
+GOOGLE_SESSION_REFRESH_AHEAD = 24 * 3600
+GOOGLE_SESSION_LOCK_TTL = 60
+
+# Coalescing of identical concurrent upstream fetches (mapper.single_flight).
+# Callers wait at most SINGLE_FLIGHT_WAIT seconds for another caller's
+# result before fetching themselves. The cross-process lock expires after
+# SINGLE_FLIGHT_LOCK_TTL seconds, in case its holder dies, and results are
+# shared for SINGLE_FLIGHT_RESULT_TTL seconds.
+SINGLE_FLIGHT_WAIT = 15
+SINGLE_FLIGHT_LOCK_TTL = 30
+SINGLE_FLIGHT_RESULT_TTL = 10
+
+# County/LocalAuthority assignment from an in-memory STRtree index
+# (mapper.boundary_index) instead of PostGIS queries
+BOUNDARY_INDEX_ENABLED = os.environ.get("BOUNDARY_INDEX_ENABLED",
+                                        "True") == "True"
+# Seconds between checks for boundary changes made by other processes
+BOUNDARY_INDEX_CHECK_INTERVAL = 30
+
+# Maximum vertices per piece in the subdivided boundary tables
+BOUNDARY_SUBDIVIDE_MAX_VERTICES = 256
+
+# Background geocoding (manage.py geocode_worker)
+# Requests per second across all workers (Nominatim allows at most 1)
+GEOCODE_RATE_LIMIT = float(os.environ.get("GEOCODE_RATE_LIMIT", 1))
+GEOCODE_MAX_ATTEMPTS = int(os.environ.get("GEOCODE_MAX_ATTEMPTS", 5))
+# Seconds a claimed job is hidden from other workers; a job whose worker
+# died is picked up again after this
+GEOCODE_JOB_LEASE = 300
+# Seconds between the worker's sweeps for reports missing a place name, and
+# before the same report is queued again by a sweep
+GEOCODE_SWEEP_INTERVAL = 300
+GEOCODE_FILL_INTERVAL = 24 * 3600  # 1 day
+
+# Reports GeoJSON endpoint (/api/reports.geojson): default and maximum
+# number of features per page
+REPORTS_GEOJSON_LIMIT = int(os.environ.get("REPORTS_GEOJSON_LIMIT", 500))
+REPORTS_GEOJSON_MAX_LIMIT = int(
+    os.environ.get("REPORTS_GEOJSON_MAX_LIMIT", 2000))
+# Incremental sync (`since` cursors): seconds re-read before each cursor to
+# catch late commits, and how long deleted-report tombstones are kept
+REPORT_SYNC_OVERLAP = 60
+REPORT_TOMBSTONE_RETENTION = 90 * 24 * 3600  # 90 days
+
+# Report clustering (/api/reports/clusters.geojson): the map shows clusters
+# up to this zoom level and individual markers beyond it
+REPORT_CLUSTER_MAX_ZOOM = int(os.environ.get("REPORT_CLUSTER_MAX_ZOOM", 13))
+# Grid cells per tile side (4 gives 64 pixel cells on 256 pixel tiles)
+REPORT_CLUSTER_CELLS_PER_TILE = 4
+# Seconds a tile's clusters stay cached; saves invalidate them sooner
+REPORT_CLUSTER_CACHE_TTL = 60 * 60
+
+# Report vector tiles (/tiles/reports/{z}/{x}/{y}.mvt): highest zoom served
+# and seconds a tile stays cached; saves invalidate tiles sooner
+REPORT_TILE_MAX_ZOOM = int(os.environ.get("REPORT_TILE_MAX_ZOOM", 20))
+REPORT_TILE_CACHE_TTL = 60 * 60
+
+# On-disk cache of OS and Google tiles (mapper.tile_cache), shared by the
+# workers on a host. TTLs are per source, in seconds, and must respect each
+# provider's caching terms; 0 disables caching for a source.
+TILE_CACHE_DIR = os.environ.get("TILE_CACHE_DIR",
+                                os.path.join(BASE_DIR, 'tile_cache'))
+TILE_CACHE_MAX_BYTES = int(
+    os.environ.get("TILE_CACHE_MAX_BYTES", 512 * 1024 * 1024))  # 512 MiB
+TILE_CACHE_TTL = {
+    'os': int(os.environ.get("TILE_CACHE_TTL_OS", 7 * 24 * 3600)),
+    'google': int(os.environ.get("TILE_CACHE_TTL_GOOGLE", 24 * 3600)),
+}
+# Run an eviction pass on average once per this many cached tiles
+TILE_CACHE_EVICT_EVERY = 500
+
+# Seconds browsers and CDNs may cache successful OS and Google tiles
+# (Cache-Control max-age and Expires); after that they revalidate with
+# If-None-Match, answered from the on-disk tile cache
+TILE_HTTP_MAX_AGE = {
+    'os': int(os.environ.get("TILE_HTTP_MAX_AGE_OS", 7 * 24 * 3600)),
+    'google': int(os.environ.get("TILE_HTTP_MAX_AGE_GOOGLE", 24 * 3600)),
+}
+
+# Defaults for seed_tiles: upstream requests per second (shared by every
+# seeding process) and parallel downloads
+TILE_SEED_RATE_LIMIT = 10
+TILE_SEED_CONCURRENCY = 4
+
+# Seconds per-report fragments (serialised dicts, table rows) stay cached;
+# report saves and deletions invalidate them sooner
+REPORT_FRAGMENT_CACHE_TTL = 24 * 3600  # 1 day
+
 CSRF_TRUSTED_ORIGINS = [
     "https://*.droppedkerbmapper.com",
     "http://*.droppedkerbmapper.com",
@@ -0,0 +1,126 @@
+"""
+Asynchronous counterpart of mapper.upstream, used by the ASGI tile proxies.
+
+Every request made from an event loop shares one httpx.AsyncClient, so a
+single process can keep hundreds of upstream fetches in flight on pooled
+keep-alive connections without holding a thread for each. The pool is
+capped at ASYNC_UPSTREAM_MAX_CONNECTIONS connections. A request that cannot
+get a connection within its connect timeout fails with
+upstream.HostBusyError instead of queueing without bound.
+
+• get_client: the shared AsyncClient for the running event loop.
+• request: perform a request with explicit timeouts, retries with jittered
+  exponential back-off, circuit breaking and latency/error metrics.
+"""
+import asyncio
+import logging
+import random
+import time
+import weakref
+import httpx
+from django.conf import settings
+from . import metrics
+from .upstream import (FAILURE_STATUSES, RETRY_STATUSES, CircuitOpenError,
+                       HostBusyError, UpstreamError, redact)
+
+logger = logging.getLogger(__name__)  # Set up logging for this module
+
+# Clients are bound to the event loop they were created on
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """
+    Return the AsyncClient for the running event loop, creating it on first
+    use.
+
+    Returns:
+        httpx.AsyncClient: A client with a pool of at most
+        ASYNC_UPSTREAM_MAX_CONNECTIONS connections.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        size = settings.ASYNC_UPSTREAM_MAX_CONNECTIONS
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=size,
+                                max_keepalive_connections=size))
+        _clients[loop] = client
+    return client
+
+
+async def request(name, method, url, *, timeout, retries=0, backoff=0.5,
+                  breaker=None, **kwargs):
+    """
+    Perform an HTTP request through the shared AsyncClient.
+
+    Behaves like mapper.upstream.request(): connection errors, timeouts and
+    RETRY_STATUSES responses are retried up to `retries` times with full
+    jitter back-off, and '<name>.latency' timings and '<name>.errors' counts
+    are recorded.
+
+    Args:
+        name (str): Identifies the upstream for metrics.
+        method (str): HTTP method, e.g. 'GET'.
+        url (str): Request URL.
+        timeout (float | tuple[float, float]): Connect and read timeouts.
+            The connect timeout also bounds the wait for a free connection.
+        retries (int): Number of retries after the first attempt.
+        backoff (float): Base back-off in seconds.
+        breaker (upstream.CircuitBreaker | None): Circuit guarding the
+            upstream.
+        **kwargs: Passed on to httpx.AsyncClient.request().
+
+    Returns:
+        httpx.Response: The final response; it may still be an error status
+        if the status is not retryable. As in mapper.upstream, the breaker
+        counts FAILURE_STATUSES responses as failures.
+
+    Raises:
+        CircuitOpenError: If the circuit is open.
+        HostBusyError: If no pooled connection freed up in time.
+        UpstreamError: If every attempt failed.
+    """
+    if breaker is not None and not breaker.allow():
+        await metrics.aincr(f'{name}.rejected')
+        raise CircuitOpenError(f"{name} circuit is open")
+
+    connect, read = timeout if isinstance(timeout, tuple) \
+        else (timeout, timeout)
+    client_timeout = httpx.Timeout(read, connect=connect, pool=connect)
+    client = get_client()
+    for attempt in range(retries + 1):
+        if attempt:
+            await asyncio.sleep(random.uniform(0, backoff * 2 ** attempt))
+        start = time.monotonic()
+        try:
+            response = await client.request(method, url,
+                                            timeout=client_timeout, **kwargs)
+        except httpx.PoolTimeout as e:
+            await metrics.aincr(f'{name}.busy')
+            raise HostBusyError(f"{name}: too many requests in flight") \
+                from e
+        except httpx.HTTPError as e:
+            error = e
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                await metrics.aobserve(f'{name}.latency',
+                                       time.monotonic() - start)
+                if breaker is not None:
+                    if response.status_code in FAILURE_STATUSES:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                return response
+            error = UpstreamError(f"{name} returned {response.status_code}")
+            # Return the connection to the pool before retrying
+            await response.aclose()
+        await metrics.aobserve(f'{name}.latency', time.monotonic() - start)
+        await metrics.aincr(f'{name}.errors')
+        logger.warning("%s request failed (attempt %s of %s): %s",
+                       name, attempt + 1, retries + 1,
+                       redact(str(error), url))
+
+    if breaker is not None:
+        breaker.record_failure()
+    raise UpstreamError(redact(str(error), url)) from error
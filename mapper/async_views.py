@@ -0,0 +1,150 @@
+"""
+Asynchronous OS and Google tile proxy views, for ASGI deployments.
+
+They behave like get_os_map_tiles and get_google_satellite_tiles in
+mapper.views, but wait on the upstream without holding a worker thread, so
+a burst of tile requests cannot starve the other views of threads:
+  • upstream fetches go through the shared httpx client of
+    mapper.async_upstream, capped at ASYNC_UPSTREAM_MAX_CONNECTIONS;
+  • concurrent requests for the same tile are coalesced with
+    single_flight.arun, under the same keys as the synchronous views;
+  • disk cache reads and writes and the Google session token lookup run in
+    worker threads.
+
+mapper.urls routes the tile URLs here when ASGI_ENABLED is set.
+"""
+import os
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from . import async_upstream, single_flight, tile_cache, upstream
+from .tile_proxy import not_modified, os_tile_url, tile_response
+from .utils import SessionTokenError, get_google_session_token
+from .views import session_unavailable_response, upstream_error_response
+
+# Blocking helpers, run outside the event loop
+get_not_modified = sync_to_async(not_modified, thread_sensitive=False)
+get_cached_tile = sync_to_async(tile_cache.get, thread_sensitive=False)
+put_cached_tile = sync_to_async(tile_cache.put, thread_sensitive=False)
+get_session_token = sync_to_async(get_google_session_token,
+                                  thread_sensitive=False)
+
+
+async def fetch_tile(source, name, z, x, y, tile_url):
+    """
+    Asynchronous version of mapper.tile_proxy.fetch_tile().
+
+    Args:
+        source (str): The tile cache source, e.g. 'os'.
+        name (str): Upstream name for metrics, e.g. 'os_tiles'.
+        z (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+        tile_url (str): URL of the tile.
+
+    Returns:
+        tuple[int, bytes | None]: The upstream status code, and the PNG tile
+        if it was 200.
+
+    Raises:
+        upstream.UpstreamError: If the tile server could not be reached.
+    """
+    async def fetch():
+        response = await async_upstream.request(
+            name, 'GET', tile_url,
+            timeout=(settings.TILE_CONNECT_TIMEOUT,
+                     settings.TILE_READ_TIMEOUT),
+            retries=settings.TILE_RETRIES)
+        if response.status_code != 200:
+            return response.status_code, None
+        await put_cached_tile(source, z, x, y, response.content, "image/png")
+        return response.status_code, response.content
+
+    return await single_flight.arun(f'tile:{source}:{z}:{x}:{y}', fetch)
+
+
+async def get_os_map_tiles(request, z, x, y):
+    """
+    Asynchronous version of mapper.views.get_os_map_tiles().
+
+    Args:
+        request (HttpRequest): The incoming HTTP request.
+        z (int): Zoom level of the requested tile.
+        x (int): X coordinate of the requested tile.
+        y (int): Y coordinate of the requested tile.
+
+    Returns:
+        HttpResponse: The PNG tile on success, or an error response.
+    """
+    # Limit the maximum zoom level to 20
+    z = min(z, 20)
+
+    response = await get_not_modified(request, 'os', z, x, y)
+    if response is not None:
+        return response
+
+    cached = await get_cached_tile('os', z, x, y)
+    if cached:
+        return tile_response('os', cached.content, cached.content_type,
+                             cached.etag)
+
+    tile_url = os_tile_url(z, x, y)
+
+    try:
+        status, content = await fetch_tile('os', 'os_tiles', z, x, y,
+                                           tile_url)
+    except upstream.UpstreamError as e:
+        return upstream_error_response(e)
+
+    if status == 200:
+        return tile_response('os', content, "image/png")
+    return HttpResponse(status=404,
+                        headers={"Cache-Control": "public, max-age=3600"})
+
+
+async def get_google_satellite_tiles(request, z, x, y):
+    """
+    Asynchronous version of mapper.views.get_google_satellite_tiles().
+
+    Args:
+        request (HttpRequest): The incoming HTTP request.
+        z (int): Zoom level of the requested tile.
+        x (int): X coordinate of the requested tile.
+        y (int): Y coordinate of the requested tile.
+
+    Returns:
+        HttpResponse: The satellite tile image (`image/png`) on success, or
+        an error response.
+
+    Raises:
+        Http404: If the upstream returns an error status other than 404.
+    """
+    response = await get_not_modified(request, 'google', z, x, y)
+    if response is not None:
+        return response
+
+    cached = await get_cached_tile('google', z, x, y)
+    if cached:
+        return tile_response('google', cached.content, cached.content_type,
+                             cached.etag)
+
+    try:
+        session_token = await get_session_token()
+    except SessionTokenError:
+        return session_unavailable_response()
+
+    api_key = os.environ.get("GOOGLE_MAPS_API_KEY")
+    tile_url = f"https://tile.googleapis.com/v1/2dtiles/{z}/{x}/{y}?session={session_token}&key={api_key}"
+
+    try:
+        status, content = await fetch_tile('google', 'google_tiles', z, x, y,
+                                           tile_url)
+    except upstream.UpstreamError as e:
+        return upstream_error_response(e)
+
+    if status == 200:
+        return tile_response('google', content, "image/png")
+    if status == 404:  # Tile not found at requested zoom level
+        return HttpResponse(status=404,
+                            headers={"Cache-Control": "public, max-age=3600"})
+    raise Http404("Tile not found.")
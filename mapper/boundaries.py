@@ -0,0 +1,291 @@
+"""
+Maintenance of the County and LocalAuthority boundary tables.
+
+• load_boundaries: load a shapefile into a staging table, repair and
+  subdivide it there, then swap it into the live tables in one transaction.
+• subdivide: rebuild the subdivided companion tables (CountySubdivision,
+  LocalAuthoritySubdivision) from the full-resolution boundaries using
+  PostGIS ST_Subdivide.
+• reassign_reports: recompute Report.county and Report.local_authority for
+  a range of reports with one set-based UPDATE.
+"""
+import io
+import logging
+from django.conf import settings
+from django.contrib.gis.gdal import DataSource
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from . import boundary_index
+from .models import BoundaryVersion, County, CountySubdivision, \
+    LocalAuthority, LocalAuthoritySubdivision, Report
+
+logger = logging.getLogger(__name__)  # Set up logging for this module
+
+# Boundary model: (subdivision model, foreign key column)
+SUBDIVISIONS = {
+    County: (CountySubdivision, 'county_id'),
+    LocalAuthority: (LocalAuthoritySubdivision, 'local_authority_id'),
+}
+
+# Boundary model: (BoundaryVersion.boundary, name field)
+BOUNDARY_NAMES = {
+    County: ('county', 'county'),
+    LocalAuthority: ('local_authority', 'local_authority'),
+}
+
+
+def subdivide(model, pks=None, max_vertices=None):
+    """
+    Replace the subdivided pieces of a boundary model's rows.
+
+    Each boundary is split by ST_Subdivide into pieces of at most
+    `max_vertices` vertices, which are stored as MultiPolygons in the
+    companion table (with its own GiST index).
+
+    Args:
+        model (type): County or LocalAuthority.
+        pks (Iterable[int] | None): Rows to subdivide; all rows if None.
+        max_vertices (int | None): Maximum vertices per piece; defaults to
+            BOUNDARY_SUBDIVIDE_MAX_VERTICES.
+
+    Returns:
+        int: The number of pieces written.
+    """
+    sub_model, fk = SUBDIVISIONS[model]
+    max_vertices = max_vertices or settings.BOUNDARY_SUBDIVIDE_MAX_VERTICES
+    qn = connection.ops.quote_name
+    sub_table, table = qn(sub_model._meta.db_table), qn(model._meta.db_table)
+    delete_where = insert_where = ''
+    params = []
+    if pks is not None:
+        delete_where = f"WHERE {qn(fk)} = ANY(%s)"
+        insert_where = "WHERE id = ANY(%s)"
+        params = [list(pks)]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {sub_table} {delete_where}", params)
+        cursor.execute(
+            f"INSERT INTO {sub_table} ({qn(fk)}, polygon) "
+            f"SELECT id, ST_Multi(ST_Subdivide(polygon, %s)) "
+            f"FROM {table} {insert_where}", [max_vertices] + params)
+        return cursor.rowcount
+
+
+def reassign_reports(start_id, end_id):
+    """
+    Recompute the county and local authority of reports with
+    start_id <= id < end_id.
+
+    A single UPDATE ... FROM joins each report's indexed `location` to the
+    subdivided boundary tables, so no rows are loaded into Python and
+    nothing is geocoded. Only reports whose foreign keys actually change
+    are written, and their `updated_at` is bumped so clients re-fetch them.
+    Reports without a location are left unchanged.
+
+    Args:
+        start_id (int): First report id in the range.
+        end_id (int): Id just past the end of the range.
+
+    Returns:
+        int: The number of reports changed.
+    """
+    qn = connection.ops.quote_name
+    report = qn(Report._meta.db_table)
+    county = qn(CountySubdivision._meta.db_table)
+    local_authority = qn(LocalAuthoritySubdivision._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {report} AS r
+            SET county_id = c.county_id,
+                local_authority_id = la.local_authority_id,
+                updated_at = NOW()
+            FROM {report} AS src
+            LEFT JOIN LATERAL (
+                SELECT county_id FROM {county} AS s
+                WHERE ST_Contains(s.polygon, src.location)
+                ORDER BY s.county_id LIMIT 1
+            ) AS c ON TRUE
+            LEFT JOIN LATERAL (
+                SELECT local_authority_id FROM {local_authority} AS s
+                WHERE ST_Contains(s.polygon, src.location)
+                ORDER BY s.local_authority_id LIMIT 1
+            ) AS la ON TRUE
+            WHERE r.id = src.id
+              AND src.id >= %s AND src.id < %s
+              AND src.location IS NOT NULL
+              AND (r.county_id IS DISTINCT FROM c.county_id
+                   OR r.local_authority_id IS DISTINCT FROM
+                      la.local_authority_id)
+            """, [start_id, end_id])
+        return cursor.rowcount
+
+
+def _copy_text(value):
+    """
+    Escape a value for PostgreSQL's COPY text format, writing None as NULL.
+    """
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t') \
+                     .replace('\n', '\\n').replace('\r', '\\r')
+
+
+def load_boundaries(model, shapefile, name_field, simplify=None,
+                    max_vertices=None):
+    """
+    Replace a boundary model's rows with the features of a shapefile.
+
+    The features are bulk-copied (COPY) into a temporary staging table, where
+    they are transformed to WGS84, repaired with ST_MakeValid, optionally
+    simplified and subdivided. Only then are the live tables changed, in a
+    single transaction: boundaries are matched by name, so existing rows keep
+    their ids and reports keep their foreign keys; new names are inserted and
+    missing ones deleted. Readers see either the old set or the new one,
+    never a partly loaded table. The set's BoundaryVersion is incremented
+    and the in-process boundary indexes are invalidated on commit.
+
+    Report county/local authority assignments are not recomputed; run
+    `manage.py reassign_boundaries` afterwards if the boundaries moved.
+
+    Args:
+        model (type): County or LocalAuthority.
+        shapefile (str): Path to the shapefile (any OGR-readable source).
+        name_field (str): Shapefile attribute holding the boundary name.
+        simplify (float | None): If given, also store a copy simplified with
+            ST_SimplifyPreserveTopology at this tolerance (in degrees).
+        max_vertices (int | None): Maximum vertices per subdivided piece;
+            defaults to BOUNDARY_SUBDIVIDE_MAX_VERTICES.
+
+    Returns:
+        BoundaryVersion: The new version of the boundary set.
+
+    Raises:
+        ValueError: If the shapefile has no spatial reference, is empty or
+        repeats a boundary name.
+    """
+    boundary, name_column = BOUNDARY_NAMES[model]
+    sub_model, fk = SUBDIVISIONS[model]
+    max_vertices = max_vertices or settings.BOUNDARY_SUBDIVIDE_MAX_VERTICES
+    qn = connection.ops.quote_name
+    table, sub_table = qn(model._meta.db_table), qn(sub_model._meta.db_table)
+    name_column, fk = qn(name_column), qn(fk)
+    report = qn(Report._meta.db_table)
+
+    layer = DataSource(shapefile)[0]
+    if layer.srs is None or layer.srs.srid is None:
+        raise ValueError(f"{shapefile} has no recognised spatial reference")
+
+    # Features are sent as WKB in their source projection; reprojection
+    # happens set-based in PostGIS
+    data = io.StringIO()
+    for feature in layer:
+        data.write(f"{_copy_text(feature.get(name_field))}\t"
+                   f"{feature.geom.hex}\n")
+    data.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS boundary_raw, boundary_staging, "
+                       "boundary_staging_pieces")
+        cursor.execute("CREATE TEMP TABLE boundary_raw (name text, wkb text)")
+        cursor.copy_expert("COPY boundary_raw (name, wkb) FROM STDIN", data)
+        cursor.execute(
+            """
+            CREATE TEMP TABLE boundary_staging AS
+            SELECT name,
+                   ST_Multi(ST_CollectionExtract(ST_MakeValid(ST_Transform(
+                       ST_SetSRID(ST_GeomFromWKB(decode(wkb, 'hex')), %s),
+                       4326)), 3))::geometry(MultiPolygon, 4326) AS polygon,
+                   NULL::geometry(MultiPolygon, 4326) AS polygon_simplified
+            FROM boundary_raw
+            """, [layer.srs.srid])
+        cursor.execute("DROP TABLE boundary_raw")
+        cursor.execute("SELECT COUNT(*), COUNT(name), COUNT(DISTINCT name) "
+                       "FROM boundary_staging")
+        count, named, distinct = cursor.fetchone()
+        if not count:
+            raise ValueError(f"{shapefile} contains no features")
+        if named != count:
+            raise ValueError(f"{count - named} features in {shapefile} have "
+                             f"no {name_field}; they cannot be matched")
+        if distinct != count:
+            raise ValueError(f"{shapefile} repeats boundary names in "
+                             f"{name_field}; they cannot be matched")
+        if simplify:
+            cursor.execute(
+                """
+                UPDATE boundary_staging
+                SET polygon_simplified = ST_Multi(ST_CollectionExtract(
+                    ST_MakeValid(ST_SimplifyPreserveTopology(polygon, %s)),
+                    3))
+                """, [simplify])
+        cursor.execute(
+            """
+            CREATE TEMP TABLE boundary_staging_pieces AS
+            SELECT name, ST_Multi(ST_Subdivide(polygon, %s)) AS polygon
+            FROM boundary_staging
+            """, [max_vertices])
+        cursor.execute("CREATE UNIQUE INDEX ON boundary_staging (name)")
+        cursor.execute("CREATE INDEX ON boundary_staging_pieces (name)")
+        cursor.execute("ANALYZE boundary_staging")
+        cursor.execute("ANALYZE boundary_staging_pieces")
+
+        with transaction.atomic():
+            # Raw SQL bypasses Django's SET_NULL/CASCADE handling, so clear
+            # the references to removed boundaries by hand; the deferred
+            # foreign key constraints are then satisfied at commit
+            cursor.execute(f"DELETE FROM {sub_table}")
+            removed = f"""
+                SELECT id FROM {table} AS b WHERE NOT EXISTS (
+                    SELECT 1 FROM boundary_staging AS s
+                    WHERE s.name = b.{name_column})
+            """
+            cursor.execute(f"UPDATE {report} SET {fk} = NULL, "
+                           f"updated_at = NOW() WHERE {fk} IN ({removed})")
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({removed})")
+            deleted = cursor.rowcount
+            cursor.execute(
+                f"""
+                UPDATE {table} AS b
+                SET polygon = s.polygon,
+                    polygon_simplified = s.polygon_simplified
+                FROM boundary_staging AS s
+                WHERE s.name = b.{name_column}
+                """)
+            updated = cursor.rowcount
+            cursor.execute(
+                f"""
+                INSERT INTO {table} ({name_column}, polygon,
+                                     polygon_simplified)
+                SELECT s.name, s.polygon, s.polygon_simplified
+                FROM boundary_staging AS s
+                WHERE NOT EXISTS (SELECT 1 FROM {table} AS b
+                                  WHERE b.{name_column} = s.name)
+                """)
+            inserted = cursor.rowcount
+            cursor.execute(
+                f"""
+                INSERT INTO {sub_table} ({fk}, polygon)
+                SELECT b.id, p.polygon
+                FROM boundary_staging_pieces AS p
+                JOIN {table} AS b ON b.{name_column} = p.name
+                """)
+
+            version, _ = BoundaryVersion.objects.select_for_update() \
+                .get_or_create(boundary=boundary)
+            version.version = F('version') + 1
+            version.source = str(shapefile)[:500]
+            version.feature_count = count
+            version.loaded_at = timezone.now()
+            version.save()
+            version.refresh_from_db()
+            # Other workers see the new version on their next check
+            transaction.on_commit(boundary_index.clear)
+
+        cursor.execute("DROP TABLE boundary_staging, boundary_staging_pieces")
+
+    logger.info("Loaded %s v%s from %s: %s updated, %s inserted, %s deleted",
+                boundary, version.version, shapefile, updated, inserted,
+                deleted)
+    return version
@@ -0,0 +1,192 @@
+"""
+In-process spatial index of County and LocalAuthority boundaries.
+
+Each worker builds a shapely STRtree over the subdivided boundary pieces
+(CountySubdivision and LocalAuthoritySubdivision, at most
+BOUNDARY_SUBDIVIDE_MAX_VERTICES vertices each) the first time it needs one,
+and answers point-in-polygon lookups from memory instead of sending
+`polygon__contains` queries to PostGIS. Each piece has a tight bounding
+box, so a lookup tests one or two small polygons; they are not prepared,
+which keeps the index small and quick to build.
+
+Indexes are invalidated when the boundary tables change. Every change bumps
+the set's BoundaryVersion row in the database: the boundary loaders do it
+in their transaction, and the signal handlers in mapper.signals call
+invalidate() for admin and ORM edits. Each worker reads the versions at
+most every BOUNDARY_INDEX_CHECK_INTERVAL seconds and rebuilds an index
+whose version has moved, so changes made by other processes (management
+commands, other workers) are seen without a shared cache.
+
+• lookup: the id of the boundary containing one point.
+• lookup_many: vectorised lookup for arrays of points.
+• invalidate: discard the indexes in every worker.
+• clear: discard this process's indexes and re-read the versions.
+"""
+import threading
+import time
+import numpy as np
+import shapely
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from .models import (BoundaryVersion, CountySubdivision,
+                     LocalAuthoritySubdivision)
+
+# Piece model and parent id field of each boundary set, by
+# BoundaryVersion.boundary name
+MODELS = {'county': (CountySubdivision, 'county_id'),
+          'local_authority': (LocalAuthoritySubdivision,
+                              'local_authority_id')}
+
+_indexes = {}
+_lock = threading.Lock()
+_versions = {}
+_checked_at = 0.0
+
+
+class BoundaryIndex:
+    """
+    STRtree over the subdivided pieces of one boundary set.
+
+    Attributes:
+        ids (np.ndarray): Primary key of the boundary each piece belongs to,
+            in the same order as the tree's geometries.
+        tree (shapely.STRtree): The spatial index.
+    """
+    def __init__(self, model, parent_field):
+        ids, geometries = [], []
+        for pk, polygon in model.objects \
+                .values_list(parent_field, 'polygon') \
+                .order_by(parent_field, 'id').iterator():
+            ids.append(pk)
+            geometries.append(bytes(polygon.wkb))
+        self.ids = np.array(ids, dtype=np.int64)
+        geoms = shapely.from_wkb(geometries) if geometries \
+            else np.empty(0, dtype=object)
+        self.tree = shapely.STRtree(geoms)
+
+    def lookup_many(self, lons, lats):
+        """
+        Return the id of the boundary containing each point.
+
+        Where boundaries overlap, the lowest id wins.
+
+        Args:
+            lons (array-like): Longitudes in decimal degrees.
+            lats (array-like): Latitudes in decimal degrees.
+
+        Returns:
+            np.ndarray: int64 ids, -1 where no boundary contains the point.
+        """
+        points = shapely.points(np.asarray(lons, dtype=np.float64),
+                                np.asarray(lats, dtype=np.float64))
+        result = np.full(len(points), -1, dtype=np.int64)
+        if not len(self.ids):
+            return result
+        # covered_by rather than within: a point on the edge between two
+        # pieces of one boundary lies inside neither piece
+        point_idx, tree_idx = self.tree.query(points,
+                                              predicate='covered_by')
+        # Keep the first (lowest id) match for each point
+        order = np.lexsort((tree_idx, point_idx))
+        matched, first = np.unique(point_idx[order], return_index=True)
+        result[matched] = self.ids[tree_idx[order][first]]
+        return result
+
+
+def _current_version(name):
+    """
+    Return the BoundaryVersion of a boundary set, reading the database at
+    most every BOUNDARY_INDEX_CHECK_INTERVAL seconds.
+    """
+    global _versions, _checked_at  # pylint: disable=global-statement
+    now = time.monotonic()
+    if now - _checked_at >= settings.BOUNDARY_INDEX_CHECK_INTERVAL:
+        _checked_at = now
+        _versions = dict(BoundaryVersion.objects.values_list('boundary',
+                                                             'version'))
+    return _versions.get(name, 0)
+
+
+def get_index(name):
+    """
+    Return this worker's index for a boundary set, building it if it is
+    missing or out of date.
+
+    Args:
+        name (str): 'county' or 'local_authority'.
+
+    Returns:
+        BoundaryIndex: The up-to-date index.
+    """
+    version = _current_version(name)
+    entry = _indexes.get(name)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    with _lock:
+        entry = _indexes.get(name)
+        if entry is None or entry[0] != version:
+            entry = (version, BoundaryIndex(*MODELS[name]))
+            _indexes[name] = entry
+    return entry[1]
+
+
+def lookup(name, lon, lat):
+    """
+    Return the id of the boundary containing a point, or None.
+
+    Args:
+        name (str): 'county' or 'local_authority'.
+        lon (float | Decimal): Longitude in decimal degrees.
+        lat (float | Decimal): Latitude in decimal degrees.
+
+    Returns:
+        int | None: Primary key of the matching boundary.
+    """
+    pk = get_index(name).lookup_many([float(lon)], [float(lat)])[0]
+    return int(pk) if pk >= 0 else None
+
+
+def lookup_many(name, lons, lats):
+    """
+    Return the ids of the boundaries containing each point.
+
+    Args:
+        name (str): 'county' or 'local_authority'.
+        lons (array-like): Longitudes in decimal degrees.
+        lats (array-like): Latitudes in decimal degrees.
+
+    Returns:
+        np.ndarray: int64 ids, -1 where no boundary contains the point.
+    """
+    return get_index(name).lookup_many(lons, lats)
+
+
+def clear():
+    """
+    Discard the boundary indexes in this process and re-read the versions
+    on the next lookup.
+    """
+    global _checked_at  # pylint: disable=global-statement
+    with _lock:
+        _indexes.clear()
+    _checked_at = 0.0
+
+
+def invalidate(name=None):
+    """
+    Tell every worker to rebuild its index of a boundary set.
+
+    Bumps the set's BoundaryVersion in the current transaction, and
+    discards this process's indexes once it commits.
+
+    Args:
+        name (str | None): 'county' or 'local_authority'; None for both.
+    """
+    for boundary in [name] if name else MODELS:
+        updated = BoundaryVersion.objects.filter(boundary=boundary) \
+            .update(version=F('version') + 1)
+        if not updated:
+            BoundaryVersion.objects.get_or_create(boundary=boundary,
+                                                  defaults={'version': 1})
+    transaction.on_commit(clear)
@@ -0,0 +1,112 @@
+"""
+Zoom-dependent clustering of reports for the overview map.
+
+At zooms up to REPORT_CLUSTER_MAX_ZOOM, the map shows clusters instead of
+one marker per report. Clusters are computed in PostGIS per XYZ tile: each
+tile is divided into a REPORT_CLUSTER_CELLS_PER_TILE x
+REPORT_CLUSTER_CELLS_PER_TILE grid in Web Mercator, reports are snapped to
+the grid with ST_SnapToGrid and counted per cell and per condition. The
+grid is aligned with the tile edges, so a cell never straddles two tiles.
+
+Each tile's clusters are cached under a key that includes the visibility
+scope (all reports for superusers, otherwise one user's), and dropped by
+invalidate_report() when a report in that tile is saved or deleted.
+
+• get_clusters: the clusters inside a bounding box at a zoom level.
+• invalidate_report: drop the cached tiles containing a report.
+"""
+from django.conf import settings
+from django.contrib.gis.db.models.functions import SnapToGrid, Transform
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+from . import tiles
+from .models import Report
+
+# Cache key prefix for a tile's clusters
+KEY_PREFIX = 'report_clusters'
+
+# Most tiles one request may cover
+MAX_TILES = 64
+
+
+def compute_tile(queryset, zoom, x, y):
+    """
+    Cluster the reports of `queryset` that fall inside one tile.
+
+    Args:
+        queryset (QuerySet[Report]): The reports the user may see.
+        zoom (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+
+    Returns:
+        list[dict]: One dict per non-empty grid cell, with the mean
+        'longitude' and 'latitude' of its reports, their 'count' and a count
+        per condition.
+    """
+    cell = tiles.tile_size_metres(zoom) \
+        / settings.REPORT_CLUSTER_CELLS_PER_TILE
+    # Grid points at the cell centres, so cell edges meet the tile edges
+    origin = cell / 2 - tiles.ORIGIN_SHIFT
+    per_condition = {
+        condition: Count('id', filter=Q(condition=condition))
+        for condition, _ in Report.TRAFFIC_LIGHT_CHOICES
+    }
+    rows = queryset.in_bbox(*tiles.tile_bbox(zoom, x, y)) \
+        .annotate(cell=SnapToGrid(Transform('location', 3857),
+                                  cell, cell, origin, origin)) \
+        .values('cell') \
+        .annotate(count=Count('id'), mean_longitude=Avg('longitude'),
+                  mean_latitude=Avg('latitude'), **per_condition) \
+        .order_by()
+    return [{
+        'longitude': round(float(row['mean_longitude']), 6),
+        'latitude': round(float(row['mean_latitude']), 6),
+        'count': row['count'],
+        **{condition: row[condition] for condition in per_condition},
+    } for row in rows]
+
+
+def get_clusters(user, bbox, zoom):
+    """
+    Return the clusters of reports visible to `user` inside a bounding box.
+
+    Tiles already in the cache are served from it in one get_many(); the
+    rest are computed and stored with set_many().
+
+    Args:
+        user (User): The requesting user.
+        bbox (tuple[float, float, float, float]): west, south, east, north.
+        zoom (int): Zoom level, at most REPORT_CLUSTER_MAX_ZOOM.
+
+    Returns:
+        list[dict]: The clusters of every tile covering the box.
+    """
+    scope = tiles.scope_for(user)
+    keys = {tiles.cache_key(KEY_PREFIX, scope, zoom, x, y): (x, y)
+            for x, y in tiles.tiles_for_bbox(*bbox, zoom)}
+    cached = cache.get_many(keys)
+    missing = {}
+    queryset = Report.objects.visible_to(user)
+    for key, (x, y) in keys.items():
+        if key not in cached:
+            missing[key] = compute_tile(queryset, zoom, x, y)
+    if missing:
+        cache.set_many(missing, timeout=settings.REPORT_CLUSTER_CACHE_TTL)
+        cached.update(missing)
+    return [cluster for key in keys for cluster in cached[key]]
+
+
+def invalidate_report(user_id, *points):
+    """
+    Drop the cached cluster tiles containing a report's location(s).
+
+    Args:
+        user_id (int | None): The report's owner.
+        *points (tuple): (longitude, latitude) pairs, e.g. the report's old
+            and new locations. Missing coordinates are ignored.
+    """
+    keys = tiles.cache_keys_for_points(KEY_PREFIX, user_id, points,
+                                       settings.REPORT_CLUSTER_MAX_ZOOM)
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,143 @@
+"""
+Per-report cache of serialised and rendered fragments.
+
+Reports change rarely compared with how often they are listed, so the
+serialise_report() dict and the rendered cells of each ReportTable row are
+cached per report. Keys include the report's id and `updated_at`, so any
+write that bumps `updated_at` makes old entries unreachable. `auto_now`
+only applies to save(), so queryset .update() and bulk_update() calls
+that change displayed fields must set `updated_at=timezone.now()`
+themselves. The Report pre_save/post_delete signals also delete the
+entries for the stored `updated_at`, covering saves that leave it
+unchanged. Lookups for a page or chunk of reports are one get_many() and
+misses are written back with one set_many().
+
+• serialised_reports: serialise_report() dicts for Report instances.
+• serialised_rows: the same dicts for `.values()` rows.
+• row_cells: rendered <td> cells of ReportTable rows.
+• invalidate: drop a report's cached fragments.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from .utils import serialise_report, serialise_report_values
+
+# Cache key prefix for report fragments
+KEY_PREFIX = 'report_fragment'
+
+# Kinds of fragment cached per report
+KINDS = ('json', 'row')
+
+
+def cache_key(kind, pk, updated_at):
+    """
+    Return the cache key of one fragment of a report version.
+    """
+    return f'{KEY_PREFIX}:{kind}:{pk}:{updated_at.timestamp()}'
+
+
+def _cached(kind, items, key_of, build):
+    """
+    Return the fragment of each item, building and caching the misses.
+
+    Args:
+        kind (str): The fragment kind; one of KINDS.
+        items (list): Reports or rows.
+        key_of (Callable): Returns (pk, updated_at) for an item.
+        build (Callable): Builds the fragment of an item.
+
+    Returns:
+        list: The fragments, in the order of `items`.
+    """
+    keys = [cache_key(kind, *key_of(item)) for item in items]
+    found = cache.get_many(keys)
+    missing = {}
+    for key, item in zip(keys, items):
+        if key not in found:
+            missing[key] = build(item)
+    if missing:
+        cache.set_many(missing, timeout=settings.REPORT_FRAGMENT_CACHE_TTL)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def serialised_reports(reports):
+    """
+    Return serialise_report() for each report, from the cache when possible.
+
+    Args:
+        reports (list[Report]): Reports with `user` and `county` loaded.
+
+    Returns:
+        list[dict]: The serialised reports, in order.
+    """
+    return _cached('json', reports,
+                   lambda report: (report.pk, report.updated_at),
+                   serialise_report)
+
+
+def serialised_rows(rows, reason_labels):
+    """
+    Return serialise_report_values() for each row, from the cache when
+    possible.
+
+    Args:
+        rows (list[dict]): `.values()` rows including 'id' and
+            'updated_at'.
+        reason_labels (dict): Maps reason codes to their display labels.
+
+    Returns:
+        list[dict]: The serialised reports, in order.
+    """
+    return _cached('json', rows,
+                   lambda row: (row['id'], row['updated_at']),
+                   lambda row: serialise_report_values(row, reason_labels))
+
+
+def row_cells(table, rows):
+    """
+    Return the rendered <td> cells of ReportTable rows.
+
+    Cells depend on which columns the table shows (these differ between
+    superusers and other users), so each entry maps a hash of the column
+    names to the HTML.
+
+    Args:
+        table (ReportTable): The table being rendered.
+        rows (list[BoundRow]): The rows of the current page.
+
+    Returns:
+        dict: Maps each report's pk to its cells' HTML.
+    """
+    variant = hashlib.sha1(
+        ','.join(column.name for column in table.columns).encode()
+    ).hexdigest()[:12]
+    keys = [cache_key('row', row.record.pk, row.record.updated_at)
+            for row in rows]
+    found = cache.get_many(keys)
+    changed = {}
+    cells = {}
+    for key, row in zip(keys, rows):
+        entry = found.get(key, {})
+        if variant not in entry:
+            entry = {**entry, variant: render_to_string(
+                'mapper/partials/report_row_cells.html',
+                {'row': row, 'table': table})}
+            changed[key] = entry
+        cells[row.record.pk] = entry[variant]
+    if changed:
+        cache.set_many(changed, timeout=settings.REPORT_FRAGMENT_CACHE_TTL)
+    return cells
+
+
+def invalidate(report):
+    """
+    Drop the cached fragments of a report's stored version.
+
+    Args:
+        report (Report): The report, with `updated_at` as stored.
+    """
+    if report.pk and report.updated_at:
+        cache.delete_many([cache_key(kind, report.pk, report.updated_at)
+                           for kind in KINDS])
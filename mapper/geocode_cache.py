@@ -0,0 +1,202 @@
+"""
+Persistent reverse-geocode cache for the mapper app.
+
+Reverse geocoding results are stored against a grid cell rather than the
+exact coordinates, so kerbs a few metres apart share a single lookup. The
+cell size is set by GEOCODE_CACHE_GRID_METRES.
+
+Lookups go through two layers:
+  • an optional shared cache (GEOCODE_SHARED_CACHE, a Django cache alias),
+  • the GeocodeCacheEntry database table, which is the durable store.
+
+• grid_key: quantise a coordinate pair to its grid-cell key.
+• lookup: return a cached place name for a coordinate pair, if any.
+• store: record the place name for a coordinate pair.
+• evict: remove expired entries and trim the table to its size limit.
+• stats: hit/miss counters and the number of stored entries.
+"""
+import math
+import random
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+from . import metrics
+from .models import GeocodeCacheEntry
+
+# Approximate length of one degree of latitude in metres
+METRES_PER_DEGREE = 111_320
+
+# Prefix applied to grid keys stored in the shared cache
+SHARED_KEY_PREFIX = 'geocode:'
+
+# Prefix of shared cache markers for entries whose database row was
+# recently touched by a shared cache hit
+TOUCH_KEY_PREFIX = 'geocode_touched:'
+
+# Counter names recorded via mapper.metrics
+HITS = 'geocode_cache.hits'
+MISSES = 'geocode_cache.misses'
+
+
+def grid_key(lat, lon):
+    """
+    Quantise a coordinate pair to the key of the grid cell containing it.
+
+    Rows are GEOCODE_CACHE_GRID_METRES tall in latitude. The longitude step
+    is widened by 1/cos(latitude) of the row centre so that cells stay
+    roughly square on the ground. The cell size is part of the key, so
+    changing the setting never returns results from a different grid.
+
+    Args:
+        lat (float | Decimal): Latitude in decimal degrees.
+        lon (float | Decimal): Longitude in decimal degrees.
+
+    Returns:
+        str: Key of the form '<cell size>:<row>:<column>'.
+    """
+    cell = settings.GEOCODE_CACHE_GRID_METRES
+    lat_step = cell / METRES_PER_DEGREE
+    row = math.floor(float(lat) / lat_step)
+    # Use the centre of the row so every point in it shares a column width
+    centre_lat = math.radians((row + 0.5) * lat_step)
+    lon_step = lat_step / max(math.cos(centre_lat), 0.01)
+    column = math.floor(float(lon) / lon_step)
+    return f"{cell:g}:{row}:{column}"
+
+
+def _shared_cache():
+    """
+    Return the shared cache configured by GEOCODE_SHARED_CACHE, or None if
+    the shared layer is disabled.
+    """
+    alias = settings.GEOCODE_SHARED_CACHE
+    return caches[alias] if alias else None
+
+
+def _touch(key, now):
+    """
+    Record a hit on the database entry for `key`, for LRU eviction.
+    """
+    GeocodeCacheEntry.objects.filter(grid_key=key).update(
+        hits=F('hits') + 1, last_used_at=now)
+
+
+def lookup(lat, lon):
+    """
+    Look up the cached place name for a coordinate pair.
+
+    Checks the shared cache first, then the database. Database hits refresh
+    the entry's `last_used_at` (used for eviction) and are copied into the
+    shared cache. Shared cache hits refresh it too, at most once per
+    GEOCODE_CACHE_TOUCH_INTERVAL per entry, so entries served from the
+    shared cache are not evicted as unused. Entries older than
+    GEOCODE_CACHE_TTL are ignored.
+
+    Args:
+        lat (float | Decimal): Latitude in decimal degrees.
+        lon (float | Decimal): Longitude in decimal degrees.
+
+    Returns:
+        tuple[bool, str | None]: (hit, place_name). A hit may carry None when
+        the geocoder previously found no name for that cell.
+    """
+    key = grid_key(lat, lon)
+    shared = _shared_cache()
+    if shared is not None:
+        # A one-element list distinguishes a cached None from a miss
+        cached = shared.get(SHARED_KEY_PREFIX + key)
+        if cached is not None:
+            if shared.add(TOUCH_KEY_PREFIX + key, 1,
+                          timeout=settings.GEOCODE_CACHE_TOUCH_INTERVAL):
+                _touch(key, timezone.now())
+            metrics.incr(HITS)
+            return True, cached[0]
+
+    now = timezone.now()
+    entries = GeocodeCacheEntry.objects.filter(
+        grid_key=key,
+        cached_at__gte=now - timedelta(seconds=settings.GEOCODE_CACHE_TTL))
+    entry = entries.values('place_name', 'cached_at').first()
+    if entry is None:
+        metrics.incr(MISSES)
+        return False, None
+
+    _touch(key, now)
+    if shared is not None:
+        remaining = settings.GEOCODE_CACHE_TTL - \
+            (now - entry['cached_at']).total_seconds()
+        shared.set(SHARED_KEY_PREFIX + key, [entry['place_name']],
+                   timeout=max(int(remaining), 1))
+    metrics.incr(HITS)
+    return True, entry['place_name']
+
+
+def store(lat, lon, place_name):
+    """
+    Store the place name for the grid cell containing a coordinate pair.
+
+    Writes to both the database and the shared cache. Every
+    GEOCODE_CACHE_EVICT_EVERY stores (on average) also runs evict(), which
+    keeps the table bounded without counting rows on every write.
+
+    Args:
+        lat (float | Decimal): Latitude in decimal degrees.
+        lon (float | Decimal): Longitude in decimal degrees.
+        place_name (str | None): The geocoded place name.
+    """
+    key = grid_key(lat, lon)
+    now = timezone.now()
+    GeocodeCacheEntry.objects.update_or_create(
+        grid_key=key,
+        defaults={'place_name': place_name, 'cached_at': now,
+                  'last_used_at': now})
+    shared = _shared_cache()
+    if shared is not None:
+        shared.set(SHARED_KEY_PREFIX + key, [place_name],
+                   timeout=settings.GEOCODE_CACHE_TTL)
+    if random.random() < 1 / settings.GEOCODE_CACHE_EVICT_EVERY:
+        evict()
+
+
+def evict():
+    """
+    Delete expired entries, then the least recently used entries beyond
+    GEOCODE_CACHE_MAX_ENTRIES.
+
+    Shared-cache copies expire on their own timeouts.
+
+    Returns:
+        int: The number of database entries deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.GEOCODE_CACHE_TTL)
+    deleted, _ = GeocodeCacheEntry.objects.filter(
+        cached_at__lt=cutoff).delete()
+
+    # Find the last_used_at of the first entry beyond the size limit
+    limit = settings.GEOCODE_CACHE_MAX_ENTRIES
+    oldest_kept = GeocodeCacheEntry.objects.order_by('-last_used_at') \
+        .values_list('last_used_at', flat=True)[limit:limit + 1]
+    if oldest_kept:
+        trimmed, _ = GeocodeCacheEntry.objects.filter(
+            last_used_at__lte=oldest_kept[0]).delete()
+        deleted += trimmed
+    return deleted
+
+
+def stats():
+    """
+    Return cache hit/miss counters and the number of stored entries.
+
+    Returns:
+        dict: {'hits', 'misses', 'hit_rate', 'entries'}.
+    """
+    counters = metrics.get_counters([HITS, MISSES])
+    hits, misses = counters[HITS], counters[MISSES]
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        'entries': GeocodeCacheEntry.objects.count(),
+    }
@@ -0,0 +1,167 @@
+"""
+Database-backed queue of pending reverse-geocoding jobs.
+
+Report.save() stores reports immediately and enqueues a GeocodeJob when no
+cached place name is available. The `geocode_worker` management command
+drains the queue in the background, and periodically queues any other
+reports that are missing a place name, so read paths never geocode.
+
+• enqueue: add jobs for reports, ignoring reports that already have one.
+• enqueue_missing: queue a batch of reports with no place name.
+• process_batch: claim and run a batch of due jobs.
+
+Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED in a short
+transaction that leases them (moves run_after GEOCODE_JOB_LEASE ahead), so
+any number of workers can drain the queue concurrently without processing a
+job twice. Geocoding happens outside any transaction, and each outcome is
+written in its own short transaction, so no row lock or connection is held
+while waiting on the rate limiter or the geocoding service.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import GeocodeJob, Report
+
+logger = logging.getLogger(__name__)  # Set up logging for this module
+
+# Cache key of the last report id examined by enqueue_missing
+SWEEP_CURSOR_KEY = 'geocode_queue:sweep_cursor'
+
+# Cache key prefix marking reports recently queued by enqueue_missing
+FILL_KEY_PREFIX = 'geocode_queue:filled:'
+
+
+def enqueue(report_ids):
+    """
+    Queue reverse-geocoding jobs for the given reports.
+
+    Each report has at most one job; reports that are already queued are
+    skipped by the unique constraint.
+
+    Args:
+        report_ids (Iterable[int]): Primary keys of reports to geocode.
+    """
+    GeocodeJob.objects.bulk_create(
+        [GeocodeJob(report_id=report_id) for report_id in report_ids],
+        ignore_conflicts=True)
+
+
+def enqueue_missing(limit=100):
+    """
+    Queue jobs for reports with no place name that are neither pending nor
+    already queued.
+
+    The sweep walks the table in id order from where the previous call
+    stopped, wrapping round at the end, so reports that stay unnamed (e.g.
+    where the geocoder finds no address) cannot starve the rest. Each
+    report is queued at most once per GEOCODE_FILL_INTERVAL, tracked in
+    the default cache.
+
+    Args:
+        limit (int): Maximum number of reports examined.
+
+    Returns:
+        int: The number of jobs queued.
+    """
+    after = cache.get(SWEEP_CURSOR_KEY, 0)
+    ids = list(Report.objects.filter(
+        Q(place_name__isnull=True) | Q(place_name=''),
+        place_name_pending=False, geocode_job__isnull=True, id__gt=after,
+    ).order_by('id').values_list('id', flat=True)[:limit])
+    cache.set(SWEEP_CURSOR_KEY, ids[-1] if len(ids) == limit else 0,
+              timeout=None)
+
+    recent = cache.get_many([FILL_KEY_PREFIX + str(pk) for pk in ids])
+    due = [pk for pk in ids if FILL_KEY_PREFIX + str(pk) not in recent]
+    if due:
+        enqueue(due)
+        cache.set_many({FILL_KEY_PREFIX + str(pk): True for pk in due},
+                       timeout=settings.GEOCODE_FILL_INTERVAL)
+    return len(due)
+
+
+def _retry_delay(attempts):
+    """
+    Return the back-off delay before retrying a job that has failed
+    `attempts` times (1, 2, 4, 8 ... minutes).
+    """
+    return timedelta(minutes=2 ** (attempts - 1))
+
+
+def _run_job(job, limiter):
+    """
+    Geocode the report for one claimed job and record the outcome.
+
+    The place name is only written if the report has not moved since it was
+    read. If it has moved, the job is kept so that the new location is
+    geocoded on a later pass. The job is updated with queryset updates, as
+    the report (and so the job) may have been deleted meanwhile.
+
+    Args:
+        job (GeocodeJob): A job leased by process_batch().
+        limiter (RateLimiter): Limits calls to the geocoding service.
+    """
+    report = job.report
+    jobs = GeocodeJob.objects.filter(pk=job.pk)
+    if report.place_name and not report.place_name_pending:
+        # Already resolved, e.g. from the cache by a later save
+        jobs.delete()
+        return
+
+    if report.reverse_geocode(report.latitude, report.longitude, limiter):
+        with transaction.atomic():
+            updated = Report.objects.filter(
+                pk=report.pk, latitude=report.latitude,
+                longitude=report.longitude,
+            ).update(place_name=report.place_name, place_name_pending=False,
+                     updated_at=timezone.now())
+            if updated:
+                jobs.delete()
+            else:
+                jobs.update(run_after=timezone.now())
+        return
+
+    attempts = job.attempts + 1
+    if attempts >= settings.GEOCODE_MAX_ATTEMPTS:
+        logger.error("Giving up geocoding report %s after %s attempts",
+                     report.pk, attempts)
+        with transaction.atomic():
+            Report.objects.filter(pk=report.pk).update(
+                place_name_pending=False, updated_at=timezone.now())
+            jobs.delete()
+        return
+    jobs.update(attempts=attempts,
+                run_after=timezone.now() + _retry_delay(attempts))
+
+
+def process_batch(limiter, batch_size=5):
+    """
+    Claim up to `batch_size` due jobs and run them.
+
+    Jobs locked or leased by other workers are skipped. The claim commits
+    before any geocoding starts, so no locks are held while jobs run.
+
+    Args:
+        limiter (RateLimiter): Limits calls to the geocoding service.
+        batch_size (int): Maximum number of jobs to claim.
+
+    Returns:
+        int: The number of jobs claimed.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            GeocodeJob.objects.select_for_update(skip_locked=True,
+                                                 of=('self',))
+            .select_related('report')
+            .filter(run_after__lte=now)
+            .order_by('run_after')[:batch_size])
+        GeocodeJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            run_after=now + timedelta(seconds=settings.GEOCODE_JOB_LEASE))
+    for job in jobs:
+        _run_job(job, limiter)
+    return len(jobs)
@@ -0,0 +1,123 @@
+"""
+Pluggable reverse geocoders for the mapper app.
+
+The backend used by Report.reverse_geocode is chosen by the
+GEOCODER_BACKEND setting (a dotted path to a geocoder class):
+  • NominatimGeocoder: the public Nominatim service (default).
+  • mapper.local_geocoder.LocalGeocoder: an offline index built from an
+    OSM extract with `manage.py build_geocoder_index`.
+
+A geocoder provides:
+  • is_local (bool): True if lookups are cheap enough to run inline during
+    a save, without the geocode cache or background worker.
+  • reverse(lat, lon) -> str | None: the place name for the coordinates,
+    raising GeocodingError on failure.
+"""
+from functools import lru_cache
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from . import upstream
+
+# Address keys at which a place name stops: broader areas such as the county
+# are stored separately (Report.county) and are not repeated in place_name
+BOUNDARY_KEYS = ['county', 'state', 'country', 'postcode', 'country_code',
+                 'province']
+
+
+class GeocodingError(Exception):
+    """Raised when a geocoder cannot look up a place name."""
+
+
+def join_address_components(address):
+    """
+    Build a place name from an ordered mapping of address components.
+
+    Iterates over the components until a boundary key (e.g. 'county',
+    'state', 'country', etc.) or ISO code is encountered, collects unique
+    values encountered before that point, and joins them with commas.
+
+    Args:
+        address (dict): Address components in Nominatim order, most specific
+            first, e.g. {'road': ..., 'suburb': ..., 'town': ...}.
+
+    Returns:
+        str | None: The joined place name, or None if there are no
+        components before the boundary.
+    """
+    values_until_county = []
+    for key, value in address.items():
+        if key in BOUNDARY_KEYS or key.startswith('ISO'):
+            break
+        if value not in values_until_county:
+            values_until_county.append(value)  # Avoid duplicates
+    # Join the values into a single string
+    return ", ".join(values_until_county) if values_until_county else None
+
+
+class NominatimGeocoder:
+    """
+    Reverse geocoder backed by the Nominatim service at NOMINATIM_URL.
+
+    Requests reuse a pooled HTTP session, are bounded by
+    GEOCODER_CONNECT_TIMEOUT/GEOCODER_READ_TIMEOUT and are retried
+    GEOCODER_RETRIES times with jittered back-off. After
+    GEOCODER_BREAKER_THRESHOLD consecutive failed lookups the circuit opens
+    and lookups fail immediately for GEOCODER_BREAKER_COOLDOWN seconds.
+    Latency and error metrics are recorded under 'nominatim.*'.
+    """
+    is_local = False
+
+    def __init__(self):
+        self.breaker = upstream.CircuitBreaker(
+            'nominatim',
+            failure_threshold=settings.GEOCODER_BREAKER_THRESHOLD,
+            cooldown=settings.GEOCODER_BREAKER_COOLDOWN)
+
+    def reverse(self, lat, lon):
+        """
+        Look up the place name for the given coordinates via Nominatim.
+
+        Args:
+            lat (float | Decimal): Latitude in decimal degrees.
+            lon (float | Decimal): Longitude in decimal degrees.
+
+        Returns:
+            str | None: The place name, or None if Nominatim returned no
+            address components before the county.
+
+        Raises:
+            GeocodingError: If the request fails, times out or is refused
+            by the open circuit.
+        """
+        try:
+            response = upstream.request(
+                'nominatim', 'GET', f"{settings.NOMINATIM_URL}/reverse",
+                params={'format': 'jsonv2', 'lat': lat, 'lon': lon,
+                        'zoom': 17, 'addressdetails': 1,
+                        'accept-language': 'en'},
+                headers={'User-Agent': 'Dropped-Kerb-Mapper'},
+                timeout=(settings.GEOCODER_CONNECT_TIMEOUT,
+                         settings.GEOCODER_READ_TIMEOUT),
+                retries=settings.GEOCODER_RETRIES,
+                breaker=self.breaker)
+            response.raise_for_status()
+            data = response.json()
+        except (upstream.UpstreamError, ValueError,
+                requests.RequestException) as e:
+            raise GeocodingError(str(e)) from e
+        # Nominatim reports "Unable to geocode" as an error field
+        if 'error' in data:
+            return None
+        return join_address_components(data.get('address', {}))
+
+
+@lru_cache(maxsize=None)
+def get_geocoder():
+    """
+    Return the configured geocoder instance, created once per process.
+
+    Returns:
+        The geocoder named by the GEOCODER_BACKEND setting.
+    """
+    return import_string(settings.GEOCODER_BACKEND)()
@@ -0,0 +1,371 @@
+"""
+Offline reverse geocoder built from an OpenStreetMap extract.
+
+`manage.py build_geocoder_index` compiles named roads and place features
+from a GeoJSON export of an OSM extract into a directory of flat numpy
+arrays. LocalGeocoder opens those arrays memory-mapped, so the operating
+system shares a single copy of the index between all gunicorn workers, and
+answers lookups without any network access.
+
+Features are split into layers, each with its own grid index:
+  • road: named highways (line vertices, densified to ~25 m spacing),
+  • locality: neighbourhood, quarter and suburb places,
+  • settlement: hamlet, village, town and city places.
+
+Each layer's points are sorted by grid cell, and a sorted array of cell keys
+plus offsets locates the points of any cell with a binary search. A lookup
+scans only the cells within the search radius of each layer.
+
+• build_index: compile GeoJSON features into an index directory.
+• LocalGeocoder: geocoder backend that queries an index directory.
+"""
+import json
+import math
+import os
+from array import array
+import numpy as np
+from django.conf import settings
+from .geocoders import GeocodingError, join_address_components
+
+# Format version written to meta.json; bump when the layout changes
+INDEX_VERSION = 1
+
+# Approximate length of one degree of latitude in metres
+METRES_PER_DEGREE = 111_320
+
+# Multiplier used to combine a cell's row and column into one key
+ROW_STRIDE = 10_000_000
+
+# Maximum spacing of sampled points along roads, in metres
+ROAD_SAMPLE_SPACING = 25
+
+# OSM highway values treated as named roads
+ROAD_HIGHWAYS = {
+    'motorway', 'trunk', 'primary', 'secondary', 'tertiary',
+    'unclassified', 'residential', 'living_street', 'service',
+    'pedestrian', 'road', 'motorway_link', 'trunk_link', 'primary_link',
+    'secondary_link', 'tertiary_link', 'footway', 'cycleway', 'path',
+}
+
+# Layer name: grid cell size in degrees and search radius in metres per kind.
+# Kinds are listed in the order their names appear in a place name.
+LAYERS = {
+    'road': {'cell': 0.002, 'kinds': {'road': 100}},
+    'locality': {'cell': 0.02, 'kinds': {'neighbourhood': 800,
+                                          'quarter': 1500,
+                                          'suburb': 2500}},
+    'settlement': {'cell': 0.1, 'kinds': {'hamlet': 1500,
+                                           'village': 3000,
+                                           'town': 6000,
+                                           'city': 10000}},
+}
+
+
+def _cell_keys(lats, lons, cell):
+    """
+    Return the grid cell key for each point.
+
+    Args:
+        lats (np.ndarray): Latitudes in decimal degrees.
+        lons (np.ndarray): Longitudes in decimal degrees.
+        cell (float): Grid cell size in degrees.
+
+    Returns:
+        np.ndarray: int64 cell keys.
+    """
+    rows = np.floor((lats + 90) / cell).astype(np.int64)
+    cols = np.floor((lons + 180) / cell).astype(np.int64)
+    return rows * ROW_STRIDE + cols
+
+
+def _classify(properties):
+    """
+    Return the (layer, kind) of an OSM feature, or None if it is not used.
+    """
+    place = properties.get('place')
+    for layer, spec in LAYERS.items():
+        if layer != 'road' and place in spec['kinds']:
+            return layer, place
+    if properties.get('highway') in ROAD_HIGHWAYS:
+        return 'road', 'road'
+    return None
+
+
+def _densify(coords):
+    """
+    Yield (lon, lat) points along a line so that consecutive points are no
+    more than ROAD_SAMPLE_SPACING metres apart.
+    """
+    for (lon1, lat1), (lon2, lat2) in zip(coords, coords[1:]):
+        scale = math.cos(math.radians(lat1))
+        length = math.hypot((lon2 - lon1) * scale, lat2 - lat1) \
+            * METRES_PER_DEGREE
+        steps = max(math.ceil(length / ROAD_SAMPLE_SPACING), 1)
+        for step in range(steps):
+            t = step / steps
+            yield lon1 + (lon2 - lon1) * t, lat1 + (lat2 - lat1) * t
+    if coords:
+        yield coords[-1][0], coords[-1][1]
+
+
+def _sample_points(geometry, layer):
+    """
+    Yield the (lon, lat) points representing a GeoJSON geometry.
+
+    Roads are sampled along their length. Areas are represented by the mean
+    of their outer ring, and points are used as they are.
+    """
+    kind = geometry.get('type')
+    coords = geometry.get('coordinates')
+    if kind == 'Point':
+        yield coords[0], coords[1]
+    elif kind in ('LineString', 'MultiLineString'):
+        lines = [coords] if kind == 'LineString' else coords
+        for line in lines:
+            if layer == 'road':
+                yield from _densify(line)
+            elif line:
+                yield line[0][0], line[0][1]
+    elif kind in ('Polygon', 'MultiPolygon'):
+        polygons = [coords] if kind == 'Polygon' else coords
+        for polygon in polygons:
+            ring = polygon[0]
+            yield (sum(p[0] for p in ring) / len(ring),
+                   sum(p[1] for p in ring) / len(ring))
+
+
+def iter_features(path):
+    """
+    Yield GeoJSON features from a FeatureCollection file or a GeoJSON text
+    sequence (one feature per line, as written by `osmium export -f
+    geojsonseq`).
+
+    Args:
+        path (str): Path to the GeoJSON file.
+    """
+    with open(path, encoding='utf-8') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == '{' and '"FeatureCollection"' in f.read(4096):
+            f.seek(0)
+            yield from json.load(f).get('features', [])
+            return
+        f.seek(0)
+        for line in f:
+            # Strip the record separator used by RFC 8142 sequences
+            line = line.strip().lstrip('\x1e')
+            if line:
+                yield json.loads(line)
+
+
+def build_index(features, output_dir):
+    """
+    Compile GeoJSON features into an index directory for LocalGeocoder.
+
+    Args:
+        features (Iterable[dict]): GeoJSON features with OSM tags as
+            properties (at least 'name' and 'highway' or 'place').
+        output_dir (str): Directory to write the index to; created if needed.
+
+    Returns:
+        dict: Number of points written per layer.
+    """
+    names, name_ids = [], {}
+    columns = {layer: {'lat': array('d'), 'lon': array('d'),
+                       'kind': array('B'), 'name': array('I')}
+               for layer in LAYERS}
+    kind_codes = {layer: {kind: code for code, kind
+                          in enumerate(spec['kinds'])}
+                  for layer, spec in LAYERS.items()}
+
+    for feature in features:
+        properties = feature.get('properties') or {}
+        name = properties.get('name')
+        classified = _classify(properties)
+        if not name or not classified or not feature.get('geometry'):
+            continue
+        layer, kind = classified
+        if name not in name_ids:
+            name_ids[name] = len(names)
+            names.append(name)
+        column = columns[layer]
+        for lon, lat in _sample_points(feature['geometry'], layer):
+            column['lat'].append(lat)
+            column['lon'].append(lon)
+            column['kind'].append(kind_codes[layer][kind])
+            column['name'].append(name_ids[name])
+
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {}
+    for layer, spec in LAYERS.items():
+        column = columns[layer]
+        lats = np.frombuffer(column['lat'], dtype=np.float64)
+        lons = np.frombuffer(column['lon'], dtype=np.float64)
+        keys = _cell_keys(lats, lons, spec['cell'])
+        # Sort points by cell so each cell's points are contiguous
+        order = np.argsort(keys, kind='stable')
+        cells, starts = np.unique(keys[order], return_index=True)
+        offsets = np.append(starts, len(order)).astype(np.int64)
+        np.save(os.path.join(output_dir, f'{layer}_coords.npy'),
+                np.column_stack([lats[order], lons[order]]))
+        np.save(os.path.join(output_dir, f'{layer}_kinds.npy'),
+                np.frombuffer(column['kind'], dtype=np.uint8)[order])
+        np.save(os.path.join(output_dir, f'{layer}_names.npy'),
+                np.frombuffer(column['name'], dtype=np.uint32)[order])
+        np.save(os.path.join(output_dir, f'{layer}_cells.npy'), cells)
+        np.save(os.path.join(output_dir, f'{layer}_offsets.npy'), offsets)
+        counts[layer] = len(order)
+
+    # Store names as one UTF-8 blob plus offsets into it
+    encoded = [name.encode('utf-8') for name in names]
+    name_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=name_offsets[1:])
+    np.save(os.path.join(output_dir, 'name_offsets.npy'), name_offsets)
+    np.save(os.path.join(output_dir, 'name_blob.npy'),
+            np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+    with open(os.path.join(output_dir, 'meta.json'), 'w',
+              encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'counts': counts,
+                   'names': len(names)}, f)
+    return counts
+
+
+class LocalGeocoder:
+    """
+    Reverse geocoder that answers from a local index built by build_index.
+
+    The index arrays are opened with numpy memory mapping, so they are paged
+    in on demand and shared between processes by the operating system.
+
+    Attributes:
+        index_dir (str): Directory containing the compiled index.
+    """
+    is_local = True
+
+    def __init__(self, index_dir=None):
+        self.index_dir = index_dir or settings.GEOCODER_INDEX_DIR
+        try:
+            with open(os.path.join(self.index_dir, 'meta.json'),
+                      encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError as e:
+            raise GeocodingError(
+                f"No geocoder index found in {self.index_dir}") from e
+        if meta.get('version') != INDEX_VERSION:
+            raise GeocodingError(
+                f"Geocoder index in {self.index_dir} has version "
+                f"{meta.get('version')}, expected {INDEX_VERSION}; rebuild it")
+        self._layers = {
+            layer: {part: self._load(f'{layer}_{part}')
+                    for part in ('coords', 'kinds', 'names', 'cells',
+                                 'offsets')}
+            for layer in LAYERS}
+        self._name_offsets = self._load('name_offsets')
+        self._name_blob = self._load('name_blob')
+
+    def _load(self, name):
+        """
+        Memory-map one array of the index.
+        """
+        return np.load(os.path.join(self.index_dir, f'{name}.npy'),
+                       mmap_mode='r')
+
+    def _name(self, name_id):
+        """
+        Decode the name with the given id.
+        """
+        start, end = self._name_offsets[name_id:name_id + 2]
+        return bytes(self._name_blob[start:end]).decode('utf-8')
+
+    def _candidates(self, layer, lat, lon, radius):
+        """
+        Return the indexes and distances (metres) of the layer's points in
+        the grid cells within `radius` metres of the coordinates.
+        """
+        index = self._layers[layer]
+        cell = LAYERS[layer]['cell']
+        scale = max(math.cos(math.radians(lat)), 0.01)
+        dlat = radius / METRES_PER_DEGREE
+        dlon = dlat / scale
+        col_lo = math.floor((lon - dlon + 180) / cell)
+        col_hi = math.floor((lon + dlon + 180) / cell)
+        row_lo = math.floor((lat - dlat + 90) / cell)
+        row_hi = math.floor((lat + dlat + 90) / cell)
+
+        # Each row's cells are contiguous in the sorted key array
+        cells, offsets = index['cells'], index['offsets']
+        slices = []
+        for row in range(row_lo, row_hi + 1):
+            first = np.searchsorted(cells, row * ROW_STRIDE + col_lo,
+                                    side='left')
+            last = np.searchsorted(cells, row * ROW_STRIDE + col_hi,
+                                   side='right')
+            if first < last:
+                slices.append(np.arange(offsets[first], offsets[last]))
+        if not slices:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        points = np.concatenate(slices)
+        coords = index['coords'][points]
+        # Equirectangular distance is accurate enough at these ranges
+        dy = (coords[:, 0] - lat) * METRES_PER_DEGREE
+        dx = (coords[:, 1] - lon) * METRES_PER_DEGREE * scale
+        return points, np.hypot(dx, dy)
+
+    def _nearest(self, layer, lat, lon):
+        """
+        Return {kind: name} for the layer's nearest point of each kind that
+        lies within that kind's search radius.
+        """
+        kinds = LAYERS[layer]['kinds']
+        points, distances = self._candidates(layer, lat, lon,
+                                             max(kinds.values()))
+        found = {}
+        if not len(points):
+            return found
+        codes = self._layers[layer]['kinds'][points]
+        for code, (kind, radius) in enumerate(kinds.items()):
+            mask = (codes == code) & (distances <= radius)
+            if mask.any():
+                best = points[mask][np.argmin(distances[mask])]
+                found[kind] = self._name(self._layers[layer]['names'][best])
+        return found
+
+    def reverse(self, lat, lon):
+        """
+        Look up the place name for the given coordinates.
+
+        Builds an address in Nominatim's order (road, neighbourhood,
+        quarter, suburb, settlement) and joins it with the same rules as
+        NominatimGeocoder. Only the settlement whose distance is the
+        smallest fraction of its kind's radius is used, so a city is
+        preferred to a hamlet on its edge.
+
+        Args:
+            lat (float | Decimal): Latitude in decimal degrees.
+            lon (float | Decimal): Longitude in decimal degrees.
+
+        Returns:
+            str | None: The place name, or None if nothing is nearby.
+        """
+        lat, lon = float(lat), float(lon)
+        address = {}
+        address.update(self._nearest('road', lat, lon))
+        address.update(self._nearest('locality', lat, lon))
+
+        kinds = LAYERS['settlement']['kinds']
+        points, distances = self._candidates('settlement', lat, lon,
+                                             max(kinds.values()))
+        if len(points):
+            radii = np.array(list(kinds.values()), dtype=np.float64)
+            codes = self._layers['settlement']['kinds'][points]
+            ratios = distances / radii[codes]
+            best = np.argmin(ratios)
+            if ratios[best] <= 1:
+                kind = list(kinds)[codes[best]]
+                address[kind] = self._name(
+                    self._layers['settlement']['names'][points[best]])
+        return join_address_components(address)
@@ -0,0 +1,154 @@
+# Reverse geocode every report that has no place name, resuming where a
+# previous run stopped
+# python manage.py backfill_place_names
+# python manage.py backfill_place_names --rate 0.5 --batch-size 200
+# python manage.py backfill_place_names --reset
+import json
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from mapper import geocode_queue
+from mapper.models import Report
+from mapper.ratelimit import CombinedLimiter, RateLimiter
+
+
+class Command(BaseCommand):
+    help = 'Reverse geocode reports with a missing place name.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rate', type=float,
+                            default=settings.GEOCODE_RATE_LIMIT,
+                            help='Geocoding requests per second for this command; '
+                                 'it also stays within the GEOCODE_RATE_LIMIT '
+                                 'budget shared with geocode_worker')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Reports written per bulk_update')
+        parser.add_argument('--checkpoint', type=str,
+                            default='.backfill_place_names.json',
+                            help='File recording the last processed report id')
+        parser.add_argument('--reset', action='store_true',
+                            help='Ignore the checkpoint and start from the beginning')
+        parser.add_argument('--max-failures', type=int, default=10,
+                            help='Stop after this many consecutive geocoding failures')
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        last_id = 0 if options['reset'] else self.read_checkpoint(checkpoint)
+        if last_id:
+            self.stdout.write(f"Resuming after report {last_id}")
+
+        reports = Report.objects.filter(
+            Q(place_name__isnull=True) | Q(place_name=''), id__gt=last_id,
+        ).order_by('id')
+        remaining = reports.count()
+        self.stdout.write(f"{remaining} reports to geocode")
+
+        # Share the worker's limit so the two never exceed it together;
+        # the slot keys depend on the rate, so it must be the worker's rate
+        limiter = RateLimiter('geocode', settings.GEOCODE_RATE_LIMIT)
+        if options['rate'] < settings.GEOCODE_RATE_LIMIT:
+            # Slow the backfill further under a limit of its own
+            limiter = CombinedLimiter(
+                RateLimiter('geocode_backfill', options['rate']), limiter)
+        start = time.monotonic()
+        last_report = start
+        done = failures = resolved = 0
+        batch = []
+        # Reports that failed to geocode; they are queued for geocode_worker
+        # so the checkpoint can move past them without losing them
+        failed = []
+
+        # iterator() streams rows through a server-side cursor
+        for report in reports.only('id', 'latitude', 'longitude',
+                                   'place_name', 'place_name_pending') \
+                             .iterator(chunk_size=options['batch_size']):
+            done += 1
+            last_id = report.id
+            if report.reverse_geocode(report.latitude, report.longitude,
+                                      limiter):
+                failures = 0
+                report.place_name_pending = False
+                report.updated_at = timezone.now()
+                batch.append(report)
+            else:
+                failures += 1
+                failed.append(report.id)
+                if failures >= options['max_failures']:
+                    # Stop rather than queue every report during an outage
+                    resolved += self.flush(batch, failed, checkpoint, last_id)
+                    raise CommandError(
+                        f"{failures} consecutive geocoding failures; "
+                        f"stopped after report {last_id}. "
+                        "Re-run to resume.")
+
+            if len(batch) + len(failed) >= options['batch_size']:
+                resolved += self.flush(batch, failed, checkpoint, last_id)
+                batch = []
+                failed = []
+
+            if time.monotonic() - last_report >= 10:
+                last_report = time.monotonic()
+                self.report_progress(done, remaining, start)
+
+        resolved += self.flush(batch, failed, checkpoint, last_id)
+        self.report_progress(done, remaining, start)
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled {resolved} of {done} reports."))
+
+    def read_checkpoint(self, path):
+        """
+        Return the last processed report id stored in the checkpoint file,
+        or 0 if there is none.
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get('last_id', 0)
+
+    def flush(self, batch, failed, checkpoint, last_id):
+        """
+        Write a batch of geocoded reports, queue the failed ones for the
+        geocode worker, then record the checkpoint.
+
+        As in the worker, a place name is only written if the report has not
+        moved since it was read; a moved report is queued by its own save.
+
+        Returns:
+            int: The number of reports written.
+        """
+        with transaction.atomic():
+            if batch:
+                # Lock the rows so they cannot move between check and write
+                current = {
+                    pk: (lat, lon) for pk, lat, lon in
+                    Report.objects.select_for_update()
+                    .filter(pk__in=[report.pk for report in batch])
+                    .values_list('pk', 'latitude', 'longitude')}
+                batch = [report for report in batch
+                         if current.get(report.pk) ==
+                         (report.latitude, report.longitude)]
+                Report.objects.bulk_update(
+                    batch, ['place_name', 'place_name_pending', 'updated_at'])
+            geocode_queue.enqueue(failed)
+        # Write then rename so an interrupted run never leaves a truncated
+        # checkpoint
+        with open(checkpoint + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'last_id': last_id}, f)
+        os.replace(checkpoint + '.tmp', checkpoint)
+        return len(batch)
+
+    def report_progress(self, done, total, start):
+        """
+        Print the number of reports processed, throughput and ETA.
+        """
+        elapsed = time.monotonic() - start
+        rate = done / elapsed if elapsed else 0
+        eta = int((total - done) / rate) if rate else 0
+        hours, rest = divmod(eta, 3600)
+        self.stdout.write(
+            f"{done}/{total} reports, {rate:.2f}/s, "
+            f"ETA {hours}:{rest // 60:02d}:{rest % 60:02d}")
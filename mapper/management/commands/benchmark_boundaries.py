@@ -0,0 +1,84 @@
+#  Compare point-in-polygon lookup times for the boundary tables
+# python manage.py benchmark_boundaries
+# python manage.py benchmark_boundaries --repeat 50
+import time
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from mapper import boundary_index
+from mapper.models import County, CountySubdivision, LocalAuthority, \
+    LocalAuthoritySubdivision
+
+# Coastal towns, where the full-resolution boundaries are most detailed
+COASTAL_POINTS = {
+    'Penzance': (-5.5372, 50.1186),
+    'Plymouth': (-4.1427, 50.3755),
+    'Brighton': (-0.1372, 50.8225),
+    'Tenby': (-4.7036, 51.6727),
+    'Aberystwyth': (-4.0829, 52.4153),
+    'Great Yarmouth': (1.7305, 52.6083),
+    'Skegness': (0.3363, 53.1436),
+    'Whitby': (-0.6206, 54.4858),
+    'Oban': (-5.4718, 56.4153),
+    'Portree': (-6.1966, 57.4125),
+    'Stornoway': (-6.3865, 58.2093),
+    'Kirkwall': (-2.9600, 58.9810),
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark county/local authority lookups on coastal points.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Number of times to look up each point')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        strategies = {
+            'full-resolution tables': self.lookup_full,
+            'subdivided tables': self.lookup_subdivided,
+            'in-memory STRtree': self.lookup_index,
+        }
+        # Build the in-memory index before timing it
+        boundary_index.get_index('county')
+        boundary_index.get_index('local_authority')
+
+        results = {}
+        for name, lookup in strategies.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for lon, lat in COASTAL_POINTS.values():
+                    lookup(lon, lat)
+            elapsed = time.perf_counter() - start
+            results[name] = elapsed / (repeat * len(COASTAL_POINTS))
+
+        baseline = results['full-resolution tables']
+        for name, seconds in results.items():
+            self.stdout.write(
+                f"{name:<24} {seconds * 1000:8.2f} ms/point "
+                f"({baseline / seconds:5.1f}x)")
+
+    def lookup_full(self, lon, lat):
+        """Look up a point against the full-resolution boundaries."""
+        point = Point((lon, lat))
+        return (
+            County.objects.filter(polygon__contains=point)
+            .values_list('id', flat=True).first(),
+            LocalAuthority.objects.filter(polygon__contains=point)
+            .values_list('id', flat=True).first(),
+        )
+
+    def lookup_subdivided(self, lon, lat):
+        """Look up a point against the subdivided boundaries."""
+        point = Point((lon, lat))
+        return (
+            CountySubdivision.objects.filter(polygon__contains=point)
+            .values_list('county_id', flat=True).first(),
+            LocalAuthoritySubdivision.objects.filter(polygon__contains=point)
+            .values_list('local_authority_id', flat=True).first(),
+        )
+
+    def lookup_index(self, lon, lat):
+        """Look up a point in the in-memory STRtree index."""
+        return (boundary_index.lookup('county', lon, lat),
+                boundary_index.lookup('local_authority', lon, lat))
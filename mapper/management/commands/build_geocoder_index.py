@@ -0,0 +1,36 @@
+#  Compile an OSM extract into the index used by the local geocoder
+# osmium tags-filter great-britain-latest.osm.pbf nw/place w/highway -o gb.osm.pbf
+# osmium export gb.osm.pbf -f geojsonseq -o gb.geojsonseq
+# python manage.py build_geocoder_index gb.geojsonseq
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from mapper.local_geocoder import build_index, iter_features
+
+
+class Command(BaseCommand):
+    help = 'Build the local reverse geocoder index from an OSM GeoJSON extract.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('extract', type=str,
+                            help='GeoJSON FeatureCollection or GeoJSON sequence file')
+        parser.add_argument('--output', type=str,
+                            default=settings.GEOCODER_INDEX_DIR,
+                            help='Directory to write the index to')
+
+    def handle(self, *args, **options):
+        extract = options['extract']
+        output = options['output']
+        self.stdout.write(f"Building geocoder index from {extract}")
+
+        start = time.monotonic()
+        try:
+            counts = build_index(iter_features(extract), output)
+        except FileNotFoundError:
+            raise CommandError(f'File "{extract}" does not exist')
+
+        for layer, count in counts.items():
+            self.stdout.write(f"  {layer}: {count} points")
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote geocoder index to {output} "
+            f"in {time.monotonic() - start:.1f}s."))
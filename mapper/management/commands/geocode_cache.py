@@ -0,0 +1,25 @@
+# Show reverse geocode cache statistics, optionally evicting stale entries
+# python manage.py geocode_cache
+# python manage.py geocode_cache --evict
+from django.core.management.base import BaseCommand
+from mapper import geocode_cache
+
+
+class Command(BaseCommand):
+    help = 'Show reverse geocode cache statistics and evict stale entries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evict', action='store_true',
+                            help='Delete expired and least recently used entries')
+
+    def handle(self, *args, **options):
+        if options['evict']:
+            deleted = geocode_cache.evict()
+            self.stdout.write(f"Evicted {deleted} cache entries.")
+
+        stats = geocode_cache.stats()
+        self.stdout.write(f"Entries:  {stats['entries']}")
+        self.stdout.write(f"Hits:     {stats['hits']}")
+        self.stdout.write(f"Misses:   {stats['misses']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Hit rate: {stats['hit_rate']:.1%}"))
@@ -0,0 +1,48 @@
+# Drain the reverse geocoding queue in the background, and queue reports
+# that are missing a place name
+# python manage.py geocode_worker
+# python manage.py geocode_worker --once
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from mapper import geocode_queue
+from mapper.ratelimit import RateLimiter
+
+
+class Command(BaseCommand):
+    help = 'Process queued reverse geocoding jobs for reports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5,
+                            help='Number of jobs to claim per transaction')
+        parser.add_argument('--idle-sleep', type=float, default=5.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when no jobs are due instead of waiting')
+
+    def handle(self, *args, **options):
+        # The limit is shared by every worker through the default cache
+        limiter = RateLimiter('geocode', settings.GEOCODE_RATE_LIMIT)
+        self.stdout.write(
+            f"Geocode worker started ({settings.GEOCODE_RATE_LIMIT} req/s)")
+
+        total = 0
+        last_sweep = None
+        while True:
+            if last_sweep is None or time.monotonic() - last_sweep >= \
+                    settings.GEOCODE_SWEEP_INTERVAL:
+                last_sweep = time.monotonic()
+                queued = geocode_queue.enqueue_missing()
+                if queued:
+                    self.stdout.write(
+                        f"Queued {queued} reports missing a place name")
+            claimed = geocode_queue.process_batch(limiter,
+                                                  options['batch_size'])
+            total += claimed
+            if claimed:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['idle_sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} jobs."))
@@ -0,0 +1,44 @@
+# Show the shared Google Maps tile session, optionally creating a new one
+# (run in the release phase, see the Procfile, so that tiles are served from
+# the first request)
+# python manage.py google_session
+# python manage.py google_session --refresh
+import time
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from mapper import metrics
+from mapper.utils import (GOOGLE_SESSION_KEY, SessionTokenError,
+                          refresh_google_session_token)
+
+
+class Command(BaseCommand):
+    help = 'Show or refresh the shared Google Maps tile session.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh', action='store_true',
+                            help='Create a new session now')
+
+    def handle(self, *args, **options):
+        if options['refresh']:
+            try:
+                refresh_google_session_token()
+            except SessionTokenError as e:
+                raise CommandError(str(e)) from e
+            self.stdout.write(self.style.SUCCESS("Created a new session."))
+
+        token_data = cache.get(GOOGLE_SESSION_KEY)
+        if not token_data:
+            self.stdout.write("No session stored.")
+        else:
+            remaining = int(token_data['expiry']) - time.time()
+            if remaining > 0:
+                self.stdout.write(
+                    f"Session expires in {remaining / 3600:.1f} hours")
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f"Session expired {-remaining / 3600:.1f} hours ago"))
+        counters = metrics.get_counters(['google_session.created',
+                                         'google_session.refresh_failures'])
+        self.stdout.write(f"Created: {counters['google_session.created']}, "
+                          f"refresh failures: "
+                          f"{counters['google_session.refresh_failures']}")
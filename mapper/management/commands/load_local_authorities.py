@@ -1,29 +1,37 @@
 #  Importing shapefile data into the LocalAuthority model
 # python manage.py load_local_authorities mapper\fixtures\local_authorities\Local_Authority_Districts_Boundaries_UK_BSC.shp
-from django.core.management.base import BaseCommand
-from django.contrib.gis.utils import LayerMapping
+# python manage.py load_local_authorities mapper\fixtures\local_authorities\Local_Authority_Districts_Boundaries_UK_BSC.shp --simplify 0.0005
+from django.core.management.base import BaseCommand, CommandError
+from mapper.boundaries import load_boundaries
 from mapper.models import LocalAuthority
 
-# Map the model fields to the shapefile fields.
-local_authority_mapping = {
-    'local_authority': 'LAD24NM', # Keys must match model field names, values match shapefile field names.
-    'polygon': 'MULTIPOLYGON',  
-}
+# Shapefile field holding the local authority name
+NAME_FIELD = 'LAD24NM'
 
 class Command(BaseCommand):
     help = 'Load shapefile data into the LocalAuthority model.'
 
     def add_arguments(self, parser):
         parser.add_argument('shapefile', type=str, help='The path to the shapefile to import')
-        
+        parser.add_argument('--simplify', type=float, default=None,
+                            help='Also store a simplified copy at this tolerance (degrees)')
+        parser.add_argument('--max-vertices', type=int, default=None,
+                            help='Maximum vertices per subdivided piece (default: BOUNDARY_SUBDIVIDE_MAX_VERTICES)')
+
     def handle(self, *args, **options):
         shapefile_path = options['shapefile']
         self.stdout.write(f"Loading shapefile from {shapefile_path}")
 
-        # Create a LayerMapping instance. Set transform=True if the shapefile's CRS
-        # differs from the model's (for example, if your shapefile is in EPSG:27700 and your model is EPSG:4326)
-        lm = LayerMapping(LocalAuthority, shapefile_path, local_authority_mapping, transform=True)
-        
-        # Save the data. Set strict=True to raise errors if there is missing data.
-        lm.save(strict=True, verbose=True)
-        self.stdout.write(self.style.SUCCESS('Successfully loaded shapefile data into LocalAuthority model.'))
\ No newline at end of file
+        # The shapefile is staged, repaired and subdivided before the live
+        # table is swapped over in one transaction
+        try:
+            version = load_boundaries(LocalAuthority, shapefile_path, NAME_FIELD,
+                                      simplify=options['simplify'],
+                                      max_vertices=options['max_vertices'])
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully loaded {version.feature_count} boundaries into "
+            f"LocalAuthority model (version {version.version})."))
+        self.stdout.write("Run 'python manage.py reassign_boundaries' to "
+                          "update existing reports.")
@@ -0,0 +1,39 @@
+#  Recompute the county and local authority of every report, e.g. after
+#  reloading the boundary shapefiles
+# python manage.py reassign_boundaries
+# python manage.py reassign_boundaries --chunk-size 50000
+import time
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from mapper.boundaries import reassign_reports
+from mapper.models import Report
+
+
+class Command(BaseCommand):
+    help = 'Reassign County and LocalAuthority for all reports with a spatial join.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=20000,
+                            help='Number of report ids updated per statement')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        bounds = Report.objects.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            self.stdout.write("No reports to reassign.")
+            return
+
+        start = time.monotonic()
+        changed = 0
+        # Each chunk commits on its own, keeping row locks short-lived
+        for start_id in range(bounds['first'], bounds['last'] + 1,
+                              chunk_size):
+            end_id = start_id + chunk_size
+            chunk_changed = reassign_reports(start_id, end_id)
+            changed += chunk_changed
+            self.stdout.write(
+                f"Reports {start_id}-{end_id - 1}: {chunk_changed} changed")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Reassigned boundaries for {changed} reports "
+            f"in {time.monotonic() - start:.1f}s."))
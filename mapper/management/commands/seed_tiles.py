@@ -0,0 +1,143 @@
+# Pre-fill the on-disk tile cache for an area, e.g. a town before a survey day
+# python manage.py seed_tiles --bbox=-1.60,54.96,-1.55,54.99 --zooms 12-18
+# python manage.py seed_tiles --bbox=-1.60,54.96,-1.55,54.99 --zooms 16 --dry-run
+# python manage.py seed_tiles --bbox=... --zooms 12-18 --rate 5 --concurrency 2
+# Against a local stand-in tile server:
+# OS_TILE_URL=http://127.0.0.1:8001/{z}/{x}/{y}.png python manage.py seed_tiles ...
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from mapper import tile_cache, tiles, upstream
+from mapper.ratelimit import RateLimiter
+from mapper.tile_proxy import fetch_tile, os_tile_url
+from mapper.views import parse_bbox
+
+# Sources that may be seeded: upstream name and tile URL builder. Google's
+# Map Tiles API terms do not allow pre-fetching, so it is not listed.
+SOURCES = {'os': ('os_tiles', os_tile_url)}
+
+# Highest zoom served by the OS tile proxy
+MAX_ZOOM = 20
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 2
+
+
+def parse_zooms(value):
+    """
+    Parse a zoom level ("16") or an inclusive range ("12-18").
+    """
+    try:
+        low, _, high = value.partition('-')
+        low = int(low)
+        high = int(high) if high else low
+    except ValueError as e:
+        raise CommandError(f"Invalid --zooms {value!r}") from e
+    if not 0 <= low <= high <= MAX_ZOOM:
+        raise CommandError(f"--zooms must be within 0-{MAX_ZOOM}")
+    return range(low, high + 1)
+
+
+class Command(BaseCommand):
+    help = 'Fetch the map tiles covering an area into the tile cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bbox', required=True,
+                            help='west,south,east,north in degrees (write --bbox=-1.6,... if west is negative)')
+        parser.add_argument('--zooms', required=True,
+                            help='Zoom level or inclusive range, e.g. 12-18')
+        parser.add_argument('--source', choices=sorted(SOURCES), default='os',
+                            help='Tile source to seed')
+        parser.add_argument('--rate', type=float,
+                            default=settings.TILE_SEED_RATE_LIMIT,
+                            help='Upstream requests per second (shared by concurrent runs)')
+        parser.add_argument('--concurrency', type=int,
+                            default=settings.TILE_SEED_CONCURRENCY,
+                            help='Parallel downloads')
+        parser.add_argument('--max-tiles', type=int, default=100000,
+                            help='Refuse to seed more tiles than this')
+        parser.add_argument('--max-failures', type=int, default=10,
+                            help='Stop after this many consecutive failed fetches')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the tiles in the area')
+
+    def handle(self, *args, **options):
+        bbox = parse_bbox(options['bbox'])
+        if bbox is None:
+            raise CommandError("Invalid --bbox; expected west,south,east,north")
+        source = options['source']
+        if not settings.TILE_CACHE_TTL.get(source):
+            raise CommandError(f"Caching is disabled for {source} tiles")
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1")
+
+        jobs = []
+        for z in parse_zooms(options['zooms']):
+            zoom_tiles = tiles.tiles_for_bbox(*bbox, z)
+            self.stdout.write(f"Zoom {z}: {len(zoom_tiles)} tiles")
+            jobs.extend((z, x, y) for x, y in zoom_tiles)
+        if len(jobs) > options['max_tiles']:
+            raise CommandError(
+                f"{len(jobs)} tiles exceeds --max-tiles "
+                f"{options['max_tiles']}; narrow the area or zooms")
+        if options['dry_run']:
+            self.stdout.write(f"{len(jobs)} tiles in total")
+            return
+
+        name, url_for = SOURCES[source]
+        limiter = RateLimiter(f'tile_seed:{source}', options['rate'])
+        counts = {'fetched': 0, 'cached': 0, 'missing': 0, 'failed': 0}
+        total_bytes = failures = 0
+        start = last_report = time.monotonic()
+
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            futures = [executor.submit(self.seed, source, name, url_for,
+                                       limiter, *job) for job in jobs]
+            for done, future in enumerate(as_completed(futures), 1):
+                outcome, size = future.result()
+                counts[outcome] += 1
+                total_bytes += size
+                failures = failures + 1 if outcome == 'failed' else 0
+                if failures >= options['max_failures']:
+                    executor.shutdown(cancel_futures=True)
+                    raise CommandError(
+                        f"{failures} consecutive failed fetches; stopped "
+                        f"after {done} of {len(jobs)} tiles. Re-run to "
+                        "resume; cached tiles are skipped.")
+                now = time.monotonic()
+                if now - last_report >= PROGRESS_INTERVAL or \
+                        done == len(jobs):
+                    last_report = now
+                    self.stdout.write(
+                        f"{done}/{len(jobs)} tiles ({done / len(jobs):.0%}): "
+                        f"{counts['fetched']} fetched, {counts['cached']} "
+                        f"already cached, {counts['missing']} missing, "
+                        f"{counts['failed']} failed, "
+                        f"{total_bytes / 2**20:.1f} MiB")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {counts['fetched']} {source} tiles "
+            f"({total_bytes / 2**20:.1f} MiB) in "
+            f"{time.monotonic() - start:.0f}s"))
+
+    @staticmethod
+    def seed(source, name, url_for, limiter, z, x, y):
+        """
+        Fetch one tile into the cache unless it is already there.
+
+        Returns:
+            tuple[str, int]: The outcome ('fetched', 'cached', 'missing' or
+            'failed') and the number of bytes downloaded.
+        """
+        if tile_cache.contains(source, z, x, y):
+            return 'cached', 0
+        limiter.acquire()
+        try:
+            status, content = fetch_tile(source, name, z, x, y,
+                                         url_for(z, x, y))
+        except upstream.UpstreamError:
+            return 'failed', 0
+        if status == 200:
+            return 'fetched', len(content)
+        return 'missing', 0
@@ -0,0 +1,22 @@
+#  Rebuild the subdivided boundary tables used for point-in-polygon lookups
+# python manage.py subdivide_boundaries
+# python manage.py subdivide_boundaries --max-vertices 128
+from django.core.management.base import BaseCommand
+from mapper.boundaries import subdivide
+from mapper.models import County, LocalAuthority
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the subdivided County and LocalAuthority tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-vertices', type=int, default=None,
+                            help='Maximum vertices per piece (default: BOUNDARY_SUBDIVIDE_MAX_VERTICES)')
+
+    def handle(self, *args, **options):
+        for model in (County, LocalAuthority):
+            pieces = subdivide(model, max_vertices=options['max_vertices'])
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {pieces} pieces")
+        self.stdout.write(self.style.SUCCESS(
+            'Successfully rebuilt the subdivided boundary tables.'))
@@ -0,0 +1,33 @@
+# Show on-disk tile cache statistics, optionally evicting stale entries
+# python manage.py tile_cache
+# python manage.py tile_cache --evict
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from mapper import metrics, tile_cache
+
+
+class Command(BaseCommand):
+    help = 'Show on-disk tile cache statistics and evict stale entries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evict', action='store_true',
+                            help='Delete expired and least recently used tiles')
+
+    def handle(self, *args, **options):
+        if options['evict']:
+            removed = tile_cache.evict()
+            self.stdout.write(f"Evicted {removed} tiles.")
+
+        stats = tile_cache.stats()
+        self.stdout.write(f"Tiles:    {stats['keys']}")
+        self.stdout.write(f"Objects:  {stats['objects']}")
+        self.stdout.write(
+            f"Size:     {stats['bytes'] / 2**20:.1f} MiB of "
+            f"{settings.TILE_CACHE_MAX_BYTES / 2**20:.0f} MiB")
+        for source in settings.TILE_CACHE_TTL:
+            counters = metrics.get_counters(
+                [f'tile_cache.{source}.hits', f'tile_cache.{source}.misses'])
+            hits, misses = counters.values()
+            rate = hits / (hits + misses) if hits + misses else 0
+            self.stdout.write(self.style.SUCCESS(
+                f"{source}: {hits} hits, {misses} misses ({rate:.1%})"))
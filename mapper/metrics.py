@@ -0,0 +1,89 @@
+"""
+Lightweight counters for the mapper app.
+
+Counters are stored in Django's default cache so that, when a shared cache
+(Redis) is configured, every gunicorn worker contributes to the same totals.
+With the local-memory fallback each process keeps its own counts.
+
+• incr: increment a named counter.
+• observe: record the duration of an operation.
+• get_counters: read the current value of several counters at once.
+• aincr, aobserve: incr and observe for async code, run in a worker thread
+  so that the cache round trip does not block the event loop.
+"""
+import logging
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)  # Set up logging for this module
+
+# Prefix applied to every counter key in the cache
+KEY_PREFIX = 'metrics:'
+
+
+def incr(name, delta=1):
+    """
+    Increment the counter `name` by `delta`, creating it if necessary.
+
+    Counter failures are logged and swallowed; metrics must never break the
+    request that is being measured.
+
+    Args:
+        name (str): Counter name, e.g. 'geocode_cache.hits'.
+        delta (int): Amount to add to the counter.
+    """
+    key = KEY_PREFIX + name
+    try:
+        # add() is a no-op if the key exists, so concurrent creators are safe
+        cache.add(key, 0, timeout=None)
+        cache.incr(key, delta)
+    except ValueError:
+        # The key was evicted between add() and incr(); start it again
+        cache.set(key, delta, timeout=None)
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning("Could not update counter %s: %s", name, e)
+
+
+def observe(name, seconds):
+    """
+    Record one timed operation under `name`.
+
+    Keeps '<name>.count' and '<name>.total_ms' counters, from which the mean
+    latency can be derived, and logs the individual timing at debug level.
+
+    Args:
+        name (str): Timer name, e.g. 'geocoder.latency'.
+        seconds (float): Duration of the operation.
+    """
+    logger.debug("%s took %.1f ms", name, seconds * 1000)
+    incr(name + '.count')
+    incr(name + '.total_ms', int(seconds * 1000))
+
+
+async def aincr(name, delta=1):
+    """
+    Asynchronous version of incr().
+    """
+    await sync_to_async(incr, thread_sensitive=False)(name, delta)
+
+
+async def aobserve(name, seconds):
+    """
+    Asynchronous version of observe().
+    """
+    await sync_to_async(observe, thread_sensitive=False)(name, seconds)
+
+
+def get_counters(names):
+    """
+    Return the current values of the given counters.
+
+    Args:
+        names (Iterable[str]): Counter names to read.
+
+    Returns:
+        dict: Mapping of counter name to its value (0 if never incremented).
+    """
+    names = list(names)
+    values = cache.get_many([KEY_PREFIX + name for name in names])
+    return {name: values.get(KEY_PREFIX + name, 0) for name in names}
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 10:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mapper', '0009_alter_localauthority_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grid_key', models.CharField(max_length=64, unique=True)),
+                ('place_name', models.CharField(blank=True, max_length=1000, null=True)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('cached_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'Geocode Cache Entries',
+            },
+        ),
+    ]
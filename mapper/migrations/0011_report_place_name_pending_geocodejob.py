@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 11:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mapper', '0010_geocodecacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='place_name_pending',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='GeocodeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('run_after', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('report', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='geocode_job', to='mapper.report')),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 12:00
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mapper', '0011_report_place_name_pending_geocodejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CountySubdivision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('polygon', django.contrib.gis.db.models.fields.MultiPolygonField(srid=4326)),
+                ('county', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subdivisions', to='mapper.county')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LocalAuthoritySubdivision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('polygon', django.contrib.gis.db.models.fields.MultiPolygonField(srid=4326)),
+                ('local_authority', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subdivisions', to='mapper.localauthority')),
+            ],
+        ),
+        # Subdivide the boundaries that are already loaded
+        migrations.RunSQL(
+            sql=[
+                "INSERT INTO mapper_countysubdivision (county_id, polygon) "
+                "SELECT id, ST_Multi(ST_Subdivide(polygon, 256)) "
+                "FROM mapper_county",
+                "INSERT INTO mapper_localauthoritysubdivision "
+                "(local_authority_id, polygon) "
+                "SELECT id, ST_Multi(ST_Subdivide(polygon, 256)) "
+                "FROM mapper_localauthority",
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
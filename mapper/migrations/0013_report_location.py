@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 13:00
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mapper', '0012_countysubdivision_localauthoritysubdivision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='location',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, editable=False, null=True, srid=4326),
+        ),
+        # Fill the new column from the existing coordinates
+        migrations.RunSQL(
+            sql="UPDATE mapper_report "
+                "SET location = ST_SetSRID(ST_MakePoint("
+                "longitude::double precision, latitude::double precision), "
+                "4326)",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
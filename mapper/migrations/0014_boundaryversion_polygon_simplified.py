@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 14:00
+
+import django.contrib.gis.db.models.fields
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mapper', '0013_report_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoundaryVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('boundary', models.CharField(max_length=50, unique=True)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('source', models.CharField(blank=True, max_length=500)),
+                ('feature_count', models.PositiveIntegerField(default=0)),
+                ('loaded_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='county',
+            name='polygon_simplified',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='localauthority',
+            name='polygon_simplified',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326),
+        ),
+    ]
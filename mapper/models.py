@@ -3,20 +3,29 @@ Database models for Dropped Kerb Mapper:
 - CustomUser: Extends Django's AbstractUser with accessibility-related fields.
 - County: GIS model storing county boundaries.
 - LocalAuthority: GIS model storing local authority boundaries.
+- CountySubdivision / LocalAuthoritySubdivision: the same boundaries split
+  into small pieces for fast point-in-polygon queries.
+- BoundaryVersion: version number of each loaded boundary set.
+- GeocodeCacheEntry: Cached reverse-geocoding results keyed by grid cell.
+- GeocodeJob: Queue of reports waiting for background reverse geocoding.
+- ReportDeletion: Tombstones of deleted or moved reports for incremental
+  sync.
 - Report: Stores individual dropped-kerb reports with automatic
   reverse-geocoding, spatial lookups, and file attachments.
 """
 import logging
+from decimal import Decimal
 from django.contrib.gis.db import models as geomodels
 from django.contrib.auth.models import AbstractUser
-from django.contrib.gis.geos import Point
+from django.contrib.gis.geos import Point, Polygon
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
 from multiselectfield import MultiSelectField
 from cloudinary.models import CloudinaryField
-from geopy import Nominatim
-from geopy.exc import GeopyError
+from .geocoders import GeocodingError, get_geocoder
 
 logger = logging.getLogger(__name__)  # Set up logging for this module
 
@@ -83,9 +92,15 @@ class County(geomodels.Model):
         polygon (MultiPolygonField):
             The GIS boundary of the county, stored as a MultiPolygon
             using SRID 4326 (WGS84 latitude/longitude).
+        polygon_simplified (MultiPolygonField | None):
+            A simplified copy of the boundary, stored when the loader is
+            run with --simplify.
     """
     county = models.CharField(max_length=100)
     polygon = geomodels.MultiPolygonField(srid=4326)
+    # Optional simplified copy of the boundary, e.g. for map display
+    polygon_simplified = geomodels.MultiPolygonField(srid=4326, null=True,
+                                                     blank=True)
 
     class Meta:
         """
@@ -124,9 +139,15 @@ class LocalAuthority(geomodels.Model):
         polygon (MultiPolygonField):
             The GIS boundary of the authority, stored as a MultiPolygon
             using SRID 4326 (WGS84 latitude/longitude).
+        polygon_simplified (MultiPolygonField | None):
+            A simplified copy of the boundary, stored when the loader is
+            run with --simplify.
     """
     local_authority = models.CharField(max_length=100)
     polygon = geomodels.MultiPolygonField(srid=4326)
+    # Optional simplified copy of the boundary, e.g. for map display
+    polygon_simplified = geomodels.MultiPolygonField(srid=4326, null=True,
+                                                     blank=True)
 
     class Meta:
         """
@@ -153,6 +174,183 @@ class LocalAuthority(geomodels.Model):
         return str(self.local_authority)
 
 
+class CountySubdivision(geomodels.Model):
+    """
+    A piece of a County boundary with at most
+    BOUNDARY_SUBDIVIDE_MAX_VERTICES vertices, produced by PostGIS
+    ST_Subdivide (see mapper.boundaries).
+
+    Small pieces have tight bounding boxes, so the spatial index narrows a
+    point lookup to one or two cheap polygon tests instead of a test against
+    a full-resolution coastline.
+
+    Attributes:
+        county (County):
+            The county this piece belongs to.
+        polygon (MultiPolygonField):
+            The piece's geometry (SRID 4326), with a GiST index.
+    """
+    county = models.ForeignKey(County, on_delete=models.CASCADE,
+                               related_name='subdivisions')
+    polygon = geomodels.MultiPolygonField(srid=4326)
+
+    def __str__(self):
+        """
+        Return the county name and piece id.
+
+        :return: Description of the piece (string)
+        """
+        return f"{self.county_id} piece {self.pk}"
+
+
+class LocalAuthoritySubdivision(geomodels.Model):
+    """
+    A piece of a LocalAuthority boundary with at most
+    BOUNDARY_SUBDIVIDE_MAX_VERTICES vertices, produced by PostGIS
+    ST_Subdivide (see mapper.boundaries).
+
+    Attributes:
+        local_authority (LocalAuthority):
+            The local authority this piece belongs to.
+        polygon (MultiPolygonField):
+            The piece's geometry (SRID 4326), with a GiST index.
+    """
+    local_authority = models.ForeignKey(LocalAuthority,
+                                        on_delete=models.CASCADE,
+                                        related_name='subdivisions')
+    polygon = geomodels.MultiPolygonField(srid=4326)
+
+    def __str__(self):
+        """
+        Return the local authority id and piece id.
+
+        :return: Description of the piece (string)
+        """
+        return f"{self.local_authority_id} piece {self.pk}"
+
+
+class BoundaryVersion(models.Model):
+    """
+    The version of a loaded boundary set, incremented each time the set is
+    swapped in by mapper.boundaries.load_boundaries.
+
+    Attributes:
+        boundary (str):
+            Which set: 'county' or 'local_authority'.
+        version (int):
+            Incremented on every successful load.
+        source (str):
+            Path of the shapefile the set was loaded from.
+        feature_count (int):
+            Number of boundaries in the set.
+        loaded_at (datetime):
+            When the set was swapped in.
+    """
+    boundary = models.CharField(max_length=50, unique=True)
+    version = models.PositiveIntegerField(default=0)
+    source = models.CharField(max_length=500, blank=True)
+    feature_count = models.PositiveIntegerField(default=0)
+    loaded_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        """
+        Return the boundary set and its version.
+
+        :return: Boundary set and version (string)
+        """
+        return f"{self.boundary} v{self.version}"
+
+
+class GeocodeCacheEntry(models.Model):
+    """
+    A cached reverse-geocoding result for one grid cell.
+
+    Coordinates are quantised to a grid (see mapper.geocode_cache.grid_key)
+    so that nearby reports share an entry instead of each triggering a
+    Nominatim request.
+
+    Attributes:
+        grid_key (str):
+            Key of the grid cell, including the cell size.
+        place_name (str | None):
+            The place name returned for the cell (None if nothing was found).
+        hits (int):
+            Number of times the entry has been served from the database.
+        cached_at (datetime):
+            When the place name was fetched; used for TTL expiry.
+        last_used_at (datetime):
+            When the entry was last stored or served; used for LRU eviction.
+    """
+    grid_key = models.CharField(max_length=64, unique=True)
+    place_name = models.CharField(max_length=1000, blank=True, null=True)
+    hits = models.PositiveIntegerField(default=0)
+    cached_at = models.DateTimeField(default=timezone.now, db_index=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        """
+        Model metadata for GeocodeCacheEntry.
+
+        - verbose_name_plural: plural display name ("Geocode Cache Entries").
+        """
+        verbose_name_plural = "Geocode Cache Entries"
+
+    def __str__(self):
+        """
+        Return the grid key and cached place name.
+
+        :return: Grid key and place name (string)
+        """
+        return f"{self.grid_key}: {self.place_name or '-'}"
+
+
+class ReportQuerySet(models.QuerySet):
+    """
+    QuerySet for Report with spatial filters that use the GiST index on
+    `location`.
+    """
+    def visible_to(self, user):
+        """
+        Return the reports a user may see: all of them for superusers,
+        otherwise only their own.
+
+        :param user: The requesting user.
+        :return: Filtered QuerySet.
+        """
+        if user.is_superuser:
+            return self
+        return self.filter(user=user)
+
+    def in_bbox(self, west, south, east, north):
+        """
+        Return reports whose location lies inside a bounding box.
+
+        :param float west: Minimum longitude.
+        :param float south: Minimum latitude.
+        :param float east: Maximum longitude.
+        :param float north: Maximum latitude.
+        :return: Filtered QuerySet.
+        """
+        return self.filter(
+            location__contained=Polygon.from_bbox((west, south, east, north)))
+
+    def nearest_to(self, lon, lat):
+        """
+        Order reports by distance from a point, nearest first.
+
+        Uses PostGIS's index-assisted `<->` operator, so combining this with
+        a slice (e.g. [:10]) is a k-nearest-neighbour search.
+
+        :param float lon: Longitude of the point.
+        :param float lat: Latitude of the point.
+        :return: Ordered QuerySet.
+        """
+        column = f'"{self.model._meta.db_table}"."location"'
+        return self.exclude(location=None).order_by(RawSQL(
+            f"{column} <-> ST_SetSRID(ST_MakePoint(%s, %s), 4326)",
+            (float(lon), float(lat))))
+
+
 class Report(models.Model):
     """
     Stores an individual dropped-kerb report, including location,
@@ -160,7 +358,8 @@ class Report(models.Model):
     Automatically handles:
       - Sequential user-specific report numbering
       - Spatial lookups to assign County and LocalAuthority via GeoDjango
-      - Reverse geocoding to populate a human-readable place_name
+      - Reverse geocoding (cached or queued for the background worker) to
+        populate a human-readable place_name
       - Validation that reasons only apply to, and are given for
         red/orange conditions
 
@@ -171,12 +370,18 @@ class Report(models.Model):
             Latitude of the report location.
         longitude (Decimal):
             Longitude of the report location.
+        location (Point | None):
+            The same location as a PostGIS point (SRID 4326) with a GiST
+            index, kept in sync with latitude/longitude by save().
         county (County | None):
             Linked County containing the point, or None if none match.
         local_authority (LocalAuthority | None):
             Linked LocalAuthority containing the point, or None if none match.
         place_name (str | None):
             Human-readable name derived from reverse geocoding.
+        place_name_pending (bool):
+            True while the place name is waiting for the background
+            geocode worker.
         condition (str):
             Accessibility condition; one of 'none','green','orange','red',
             'white'.
@@ -202,14 +407,18 @@ class Report(models.Model):
             Cached username of the report creator.
 
     Methods:
-        reverse_geocode(lat, lon) -> bool:
-            Populates `place_name` via Nominatim; returns True on success.
+        reverse_geocode(lat, lon, limiter=None) -> bool:
+            Populates `place_name` via the configured geocoder; returns True
+            on success.
         clean() -> None:
             Ensures `reasons` is empty unless `condition` is 'red' or
             'orange'.
-        save(*args, **kwargs) -> None:
+        location_changed() -> bool:
+            True if latitude/longitude differ from the stored values.
+        save(*args, refresh_location=False, **kwargs) -> None:
             Overrides save to auto-assign `user_report_number`, compute
-            spatial fields, reverse-geocode, and then persist the instance.
+            spatial fields and queue reverse geocoding when the location
+            has moved, then persist the instance.
     """
     TRAFFIC_LIGHT_CHOICES = [
         ('none', 'None'),      # No condition reported
@@ -242,6 +451,9 @@ class Report(models.Model):
     # Store location as latitude and longitude
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    # Indexed geometry copy of latitude/longitude for spatial queries
+    location = geomodels.PointField(srid=4326, null=True, blank=True,
+                                    editable=False, spatial_index=True)
     # ForeignKey to the matching County
     county = models.ForeignKey(County, null=True, blank=True,
                                on_delete=models.SET_NULL)
@@ -249,6 +461,8 @@ class Report(models.Model):
                                         on_delete=models.SET_NULL)
     # place name (get via reverse geocoding)
     place_name = models.CharField(max_length=1000, blank=True, null=True)
+    # Set while the place name is queued for the background geocode worker
+    place_name_pending = models.BooleanField(default=False)
     # Uses a choices field to enforce the available traffic light ratings.
     condition = models.CharField(max_length=6, choices=TRAFFIC_LIGHT_CHOICES)
     # Each instance represents an option (checkbox) that explains why a
@@ -269,6 +483,8 @@ class Report(models.Model):
 
     username = models.CharField(max_length=150, blank=True, null=True)
 
+    objects = ReportQuerySet.as_manager()
+
     class Meta:
         """
         Model metadata for Report.
@@ -291,52 +507,60 @@ class Report(models.Model):
             models.Index(fields=['user']),
         ]
 
-    def reverse_geocode(self, lat, lon):
+    def reverse_geocode(self, lat, lon, limiter=None):
         """
         Populate `self.place_name` by reverse geocoding the given coordinates.
 
-        Uses geopy's Nominatim service to look up address details at the
-        specified latitude (`lat`) and longitude (`lon`). Iterates over
-        returned address components until a boundary key (e.g. 'county',
-        'state', 'country', etc.) or ISO code is encountered, collects unique
-        values encountered before that break point, and joins them with
-        commas to form a human-readable place name.
+        Uses the geocoder configured by GEOCODER_BACKEND (see
+        mapper.geocoders). For remote geocoders such as Nominatim, the
+        grid-cell geocode cache (mapper.geocode_cache) is checked first and
+        a hit makes no external request; fresh results are stored in the
+        cache. Local geocoders are queried directly. If a `limiter` is given,
+        it is acquired before any request to a remote geocoder.
 
         On success:
-          - Sets `self.place_name` to the joined components (or None if no
-            components).
+          - Sets `self.place_name` to the place name (or None if the
+            geocoder found no address components before the county).
           - Returns True.
 
-        On failure (any GeopyError):
+        On failure (any GeocodingError, including a geocoder that cannot be
+        created):
           - Logs the error via the module logger.
           - Leaves `self.place_name` unchanged.
           - Returns False.
 
         :param float|Decimal lat: Latitude in decimal degrees.
         :param float|Decimal lon: Longitude in decimal degrees.
+        :param RateLimiter|None limiter: Optional rate limit for remote
+        requests.
         :return bool: True if geocoding succeeded and `place_name` was set,
         False otherwise.
         """
+        # Imported here to avoid a circular import with mapper.geocode_cache
+        from . import geocode_cache
+
         try:
-            geolocator = Nominatim(user_agent="Dropped-Kerb-Mapper")
-            location = geolocator.reverse(f"{lat},{lon}", zoom=17,
-                                          addressdetails=True, language="en")
-            address = location.raw.get('address', {})
-            values_until_county = []
-            for key, value in address.items():
-                if key in ['county', 'state', 'country',
-                           'postcode', 'country_code',
-                           'province'] or key.startswith('ISO'):
-                    break
-                if value not in values_until_county:
-                    values_until_county.append(value)  # Avoid duplicates
-            # Join the values into a single string
-            self.place_name = ", ".join(values_until_county)\
-                if values_until_county else None
-            return True
-        except GeopyError as e:
+            geocoder = get_geocoder()
+        except GeocodingError as e:
+            # e.g. LocalGeocoder without its index
+            logger.error("Geocoder unavailable: %s", e)
+            return False
+        if not geocoder.is_local:
+            hit, place_name = geocode_cache.lookup(lat, lon)
+            if hit:
+                self.place_name = place_name
+                return True
+            if limiter is not None:
+                limiter.acquire()
+
+        try:
+            self.place_name = geocoder.reverse(lat, lon)
+        except GeocodingError as e:
             logger.error("Reverse geocoding failed: %s", e)
             return False
+        if not geocoder.is_local:
+            geocode_cache.store(lat, lon, self.place_name)
+        return True
 
     def clean(self):
         """
@@ -365,27 +589,100 @@ class Report(models.Model):
             raise ValidationError(
                 "Comments must be provided for 'none' condition.")
 
-    def save(self, *args, **kwargs):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Create an instance from a database row and remember the stored
+        location and photo.
+
+        The stored values let save() skip the spatial lookups and geocoding
+        when the location has not moved, and let the photo clean-up signal
+        detect a replaced photo without reloading the row.
+
+        :return: The Report instance.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance.remember_loaded_values()
+        return instance
+
+    def remember_loaded_values(self):
+        """
+        Record the current location and photo as the stored values.
+
+        Fields deferred by only()/defer() are recorded as missing, which
+        save() treats as a changed location.
+        """
+        photo = self.__dict__.get('photo')
+        self._loaded_values = {
+            'latitude': self.__dict__.get('latitude'),
+            'longitude': self.__dict__.get('longitude'),
+            'photo_public_id': getattr(photo, 'public_id', None),
+        }
+
+    @property
+    def loaded_values(self):
+        """
+        The location and photo public_id as last loaded from or saved to
+        the database, or None for a new or manually constructed instance.
+
+        :return: dict with 'latitude', 'longitude' and 'photo_public_id', or
+        None.
+        """
+        return getattr(self, '_loaded_values', None)
+
+    def location_changed(self):
+        """
+        Return True if latitude/longitude differ from the stored values.
+
+        Coordinates are compared after rounding to the 6 decimal places
+        stored in the database, so a float and the equivalent Decimal are
+        equal. New instances, and instances whose location was not loaded,
+        always count as changed.
+
+        :return bool: True if the location has changed or is unknown.
+        """
+        loaded = self.loaded_values
+        if self._state.adding or loaded is None \
+                or loaded['latitude'] is None or loaded['longitude'] is None:
+            return True
+        return any(
+            round(Decimal(str(getattr(self, field))), 6) !=
+            round(Decimal(str(loaded[field])), 6)
+            for field in ('latitude', 'longitude'))
+
+    def save(self, *args, refresh_location=False, **kwargs):
         """
         Override the default save to enrich and validate report data before
         persisting.
 
         - Assigns a sequential user_report_number for this user if not already
           set.
-        - Rounds latitude and longitude, builds a GeoDjango Point, and finds
-          the matching County and LocalAuthority (or sets them to None if no
-          match).
+        - If the location is new or has moved (or `refresh_location` is
+          True):
+            • Rounds latitude and longitude, stores them as the `location`
+              Point, and
+              finds the matching County and LocalAuthority (or sets them to
+              None if no match).
+            • Sets `place_name` directly when the configured geocoder is
+              local, or from the geocode cache if the location has been
+              looked up before; otherwise marks the place name as pending.
+          Saves that pass `update_fields` skip this step unless
+          `refresh_location` is True.
         - Populates the `username` field from the related user if missing.
-        - Calls `reverse_geocode` to set `place_name` based on the coordinates
-        - Finally, calls `super().save(*args, **kwargs)` to persist the
-          instance.
+        - Calls `super().save(*args, **kwargs)` to persist the instance.
+        - Queues a GeocodeJob for pending place names, so no external
+          geocoding request is made during the save.
+
+        An edit that leaves the location unchanged is a single UPDATE.
 
         :param args: Positional arguments forwarded to the parent save().
+        :param bool refresh_location: Recompute county, local authority and
+        place name even if the location is unchanged.
         :param kwargs: Keyword arguments forwarded to the parent save().
         :return: None
         """
         # Assign the next report number for this specific user
-        if self.user and not self.user_report_number:
+        if self.user_id and not self.user_report_number:
             # Get the highest report number for this user and increment it
             # 'objects' manager is added by Django's ModelBase
             last_report = Report.objects.filter(user=self.user) \
@@ -394,37 +691,110 @@ class Report(models.Model):
             self.user_report_number = (
                 last_report.user_report_number + 1) if last_report else 1
 
-        # Create a GeoDjango Point
-        lon = round(self.longitude, 6)
-        lat = round(self.latitude, 6)
-        point = Point((lon, lat))
+        if kwargs.get('update_fields') is None:
+            refresh_location = refresh_location or self.location_changed()
+        if refresh_location:
+            self.assign_location_fields()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {
+                    'location', 'county', 'local_authority', 'place_name',
+                    'place_name_pending'}
 
-        # Find the mataching County
-        # 'objects' manager is added by Django's ModelBase
-        matching_county = County.objects.filter(
-            polygon__contains=point).first()
-        if matching_county:
-            self.county = matching_county
-        else:
-            self.county = None  # Or handle cases where no county matches.
+        # Automatically set the username field if the user is set
+        if self.user_id and not self.username:
+            self.username = self.user.username
+
+        super().save(*args, **kwargs)
+        self.remember_loaded_values()
+
+        if refresh_location and self.place_name_pending:
+            # Imported here to avoid a circular import with geocode_queue
+            from . import geocode_queue
+            geocode_queue.enqueue([self.pk])
+
+    def assign_location_fields(self):
+        """
+        Set `location`, `county`, `local_authority`, `place_name` and
+        `place_name_pending` from the current latitude and longitude.
 
-        # Find the matching local authority
-        matching_local_authority = LocalAuthority.objects.filter(
-            polygon__contains=point).first()
-        if matching_local_authority:
-            self.local_authority = matching_local_authority
+        Boundaries come from the in-process STRtree index
+        (mapper.boundary_index) when BOUNDARY_INDEX_ENABLED is set, and from
+        PostGIS queries against the subdivided boundary tables otherwise.
+        Does not save the instance.
+
+        :return: None
+        """
+        lon = round(Decimal(str(self.longitude)), 6)
+        lat = round(Decimal(str(self.latitude)), 6)
+        self.location = Point(float(lon), float(lat), srid=4326)
+
+        if settings.BOUNDARY_INDEX_ENABLED:
+            # Imported here to avoid a circular import with boundary_index
+            from . import boundary_index
+
+            # Look the point up in this worker's in-memory boundary index
+            self.county_id = boundary_index.lookup('county', lon, lat)
+            self.local_authority_id = boundary_index.lookup(
+                'local_authority', lon, lat)
         else:
-            self.local_authority = None
+            self.assign_boundaries_from_database(lon, lat)
 
-        # Automatically set the username field if the user is set
-        if self.user and not self.username:
-            self.username = self.user.username
+        self.assign_place_name()
 
-        # Try reverse geocode the latitude and longitude to get the place
-        # name
-        self.reverse_geocode(self.latitude, self.longitude)
+    def assign_boundaries_from_database(self, lon, lat):
+        """
+        Set `county` and `local_authority` with PostGIS point-in-polygon
+        queries against the subdivided boundary tables.
 
-        super().save(*args, **kwargs)
+        :param Decimal lon: Rounded longitude.
+        :param Decimal lat: Rounded latitude.
+        :return: None
+        """
+        # Create a GeoDjango Point
+        point = Point((lon, lat))
+
+        # Find the matching County and local authority from their
+        # subdivided pieces (None if no piece contains the point)
+        # 'objects' manager is added by Django's ModelBase
+        self.county_id = CountySubdivision.objects.filter(
+            polygon__contains=point) \
+            .values_list('county_id', flat=True).first()
+        self.local_authority_id = LocalAuthoritySubdivision.objects.filter(
+            polygon__contains=point) \
+            .values_list('local_authority_id', flat=True).first()
+
+    def assign_place_name(self):
+        """
+        Set `place_name` and `place_name_pending` for the current location.
+
+        :return: None
+        """
+        # Imported here to avoid a circular import with geocode_cache
+        from . import geocode_cache
+
+        try:
+            geocoder = get_geocoder()
+        except GeocodingError as e:
+            # Save the report anyway and leave it to the geocode worker,
+            # which retries once the geocoder is available
+            logger.error("Geocoder unavailable: %s", e)
+            self.place_name = None
+            self.place_name_pending = True
+            return
+
+        if geocoder.is_local:
+            # Local lookups are fast enough to run during the save; only
+            # failures are left to the background geocode worker
+            self.place_name_pending = not self.reverse_geocode(
+                self.latitude, self.longitude)
+        else:
+            # Use the cached place name if this location has been geocoded
+            # before, otherwise leave it to the background geocode worker
+            hit, place_name = geocode_cache.lookup(self.latitude,
+                                                   self.longitude)
+            self.place_name = place_name
+            self.place_name_pending = not hit
 
     def __str__(self):
         """
@@ -453,3 +823,70 @@ class Report(models.Model):
             f"Reasons: {reasons_str} | Comments: {comments_str} \
                 | Photo attached: {photo_str}"
                 )
+
+
+class GeocodeJob(models.Model):
+    """
+    A queued request to reverse geocode a report in the background.
+
+    Jobs are created by Report.save() and drained by the `geocode_worker`
+    management command (see mapper.geocode_queue). Each report has at most
+    one job.
+
+    Attributes:
+        report (Report):
+            The report whose place name is pending.
+        attempts (int):
+            Number of failed geocoding attempts so far.
+        run_after (datetime):
+            The job is not picked up before this time (used for back-off).
+        created_at (datetime):
+            When the job was queued.
+    """
+    report = models.OneToOneField(Report, on_delete=models.CASCADE,
+                                  related_name='geocode_job')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """
+        Return the report id and attempt count.
+
+        :return: Summary of the job (string)
+        """
+        return f"Geocode report #{self.report_id} (attempts: {self.attempts})"
+
+
+class ReportDeletion(models.Model):
+    """
+    A tombstone recording that a report was deleted, or moved away from a
+    location, so clients syncing with a `since` cursor can drop it from
+    that area (see mapper.sync).
+
+    Tombstones are written by the Report post_save and post_delete signals
+    and pruned after REPORT_TOMBSTONE_RETENTION.
+
+    Attributes:
+        report_id (int):
+            Primary key of the deleted report.
+        user_id (int | None):
+            The report's owner, used to apply the visibility rules.
+        latitude, longitude (Decimal):
+            Where the report was, so tombstones can be filtered by bbox.
+        deleted_at (datetime):
+            When the report was deleted or moved.
+    """
+    report_id = models.BigIntegerField()
+    user_id = models.BigIntegerField(null=True, blank=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        """
+        Return the deleted report id and deletion time.
+
+        :return: Summary of the tombstone (string)
+        """
+        return f"Report #{self.report_id} deleted at {self.deleted_at}"
@@ -0,0 +1,77 @@
+"""
+Cross-process rate limiting for calls to external services.
+
+RateLimiter divides time into slots of 1/rate seconds and lets exactly one
+caller claim each slot, using an atomic cache.add(). When the default cache
+is shared (Redis), the limit holds across every worker process and machine;
+with the local-memory fallback it holds per process.
+
+• RateLimiter: at most `rate` acquisitions per second under one name.
+• CombinedLimiter: acquire several limiters in turn, so a caller stays
+  within a shared budget and a lower limit of its own.
+"""
+import math
+import time
+from django.core.cache import cache
+
+
+class RateLimiter:
+    """
+    Block callers so that at most `rate` acquisitions happen per second.
+
+    Attributes:
+        name (str): Identifies the limit; limiters with the same name share
+            their slots.
+        rate (float): Permitted acquisitions per second.
+    """
+    def __init__(self, name, rate):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.name = name
+        self.rate = rate
+        # Keep claimed slots long enough to outlive clock skew between
+        # processes
+        self._timeout = max(math.ceil(2 / rate), 1)
+
+    def try_acquire(self):
+        """
+        Claim the current slot without waiting.
+
+        Returns:
+            float: 0 if the slot was claimed, otherwise the number of seconds
+            until the next slot starts.
+        """
+        now = time.time()
+        slot = math.floor(now * self.rate)
+        if cache.add(f"ratelimit:{self.name}:{slot}", 1,
+                     timeout=self._timeout):
+            return 0
+        return (slot + 1) / self.rate - now
+
+    def acquire(self):
+        """
+        Wait until a slot can be claimed.
+        """
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class CombinedLimiter:
+    """
+    Block callers until every one of several limiters allows them.
+
+    Attributes:
+        limiters (tuple[RateLimiter]): The limiters, acquired in order.
+    """
+    def __init__(self, *limiters):
+        self.limiters = limiters
+
+    def acquire(self):
+        """
+        Wait until a slot of each limiter has been claimed.
+        """
+        for limiter in self.limiters:
+            limiter.acquire()
@@ -1,15 +1,27 @@
 """
-Signal handlers for the Report model to manage Cloudinary photos.
+Signal handlers for the mapper models.
 
 • delete_photo_on_delete: after a Report is deleted, removes its image from
   Cloudinary.
 • delete_old_photo_on_update: before saving an existing Report, deletes the
   old image if replaced.
+• invalidate_boundary_index: after a County or LocalAuthority is saved or
+  deleted, discards the in-memory boundary indexes.
+• subdivide_saved_boundary: after a County or LocalAuthority is saved,
+  rebuilds its subdivided pieces.
+• record_report_deletion: after a Report is deleted or moved, writes a
+  tombstone for clients syncing the reports feed.
+• invalidate_report_fragments: before a Report is saved, or after it is
+  deleted, drops its cached serialised dict and table row.
+• invalidate_report_tiles: after a Report is saved or deleted, drops the
+  cached cluster and vector tiles at its old and new locations.
 """
-from django.db.models.signals import post_delete, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from cloudinary.uploader import destroy
-from .models import Report
+from . import boundaries, boundary_index, clusters, fragments, sync, \
+    vector_tiles
+from .models import Report, County, LocalAuthority
 
 
 @receiver(post_delete, sender=Report)
@@ -26,31 +38,126 @@ def delete_photo_on_delete(sender, instance, **kwargs):
         destroy(instance.photo.public_id)
 
 
+@receiver(post_save, sender=Report)
+@receiver(post_delete, sender=Report)
+def record_report_deletion(sender, instance, created=False, **kwargs):
+    """
+    Record a tombstone after a Report is deleted or moved.
+
+    This handler listens to Report.post_save and post_delete. The tombstone
+    lets clients that sync the reports feed with a `since` cursor remove
+    the report from the area it was in (see mapper.sync). Saves of new
+    reports, and saves that leave the location unchanged, are ignored.
+    """
+    if kwargs['signal'] is post_delete:
+        sync.record_deletion(instance)
+        return
+    old = instance.loaded_values
+    if created or old is None or old['latitude'] is None:
+        return
+    if instance.location_changed():
+        sync.record_deletion(instance, old['latitude'], old['longitude'])
+
+
 @receiver(pre_save, sender=Report)
 def delete_old_photo_on_update(sender, instance, **kwargs):
     """
     Delete the previous Cloudinary photo before updating a Report instance.
 
-    This handler listens to Report.pre_save. It skips new instances (no PK),
-    then fetches the existing record. If the `photo` field is changing
-    (old_instance.photo != instance.photo), it calls `destroy()`
-    to remove the old image from Cloudinary storage.
+    This handler listens to Report.pre_save. It skips new instances (no PK)
+    and saves limited by `update_fields` that exclude the photo. The stored
+    photo's public_id is taken from the values remembered when the instance
+    was loaded (Report.loaded_values); the existing record is only fetched
+    for instances that were not loaded from the database. If the `photo`
+    field is changing, it calls `destroy()` to remove the old image from
+    Cloudinary storage.
     """
     if not instance.pk:
         # If the instance is new, do nothing
         return
 
-    try:
-        old_instance = Report.objects.get(pk=instance.pk)
-    except Report.DoesNotExist:
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'photo' not in update_fields:
+        # The photo is not being written
         return
 
+    if instance.loaded_values is not None:
+        old_public_id = instance.loaded_values['photo_public_id']
+    else:
+        try:
+            old_instance = Report.objects.only('photo').get(pk=instance.pk)
+        except Report.DoesNotExist:
+            return
+        old_public_id = getattr(old_instance.photo, 'public_id', None)
+
     # If the photo is being updated, delete the old file
-    if (
-        old_instance.photo
-        and (
-            not instance.photo
-            or not hasattr(instance.photo, "public_id")
-            or old_instance.photo.public_id != getattr(instance.photo, "public_id", None)        )
-    ):
-        destroy(old_instance.photo.public_id)
+    if old_public_id and \
+            old_public_id != getattr(instance.photo, "public_id", None):
+        destroy(old_public_id)
+
+
+@receiver(pre_save, sender=Report)
+@receiver(post_delete, sender=Report)
+def invalidate_report_fragments(sender, instance, **kwargs):
+    """
+    Drop the cached fragments of a Report that is changing.
+
+    This handler listens to Report.pre_save and post_delete. Before a save,
+    `updated_at` still holds the stored value, so the entries for the
+    version being replaced are deleted; this also covers saves limited by
+    `update_fields` that do not bump `updated_at` (see mapper.fragments).
+    """
+    if not instance.pk:
+        return
+    fragments.invalidate(instance)
+
+
+@receiver(post_save, sender=County)
+@receiver(post_delete, sender=County)
+@receiver(post_save, sender=LocalAuthority)
+@receiver(post_delete, sender=LocalAuthority)
+def invalidate_boundary_index(sender, **kwargs):
+    """
+    Discard the in-memory boundary indexes when a boundary changes.
+
+    This handler listens to post_save and post_delete for County and
+    LocalAuthority. It bumps the boundary set's BoundaryVersion, so every
+    worker rebuilds its index from the updated table.
+    """
+    boundary_index.invalidate(boundaries.BOUNDARY_NAMES[sender][0])
+
+
+@receiver(post_save, sender=County)
+@receiver(post_save, sender=LocalAuthority)
+def subdivide_saved_boundary(sender, instance, **kwargs):
+    """
+    Rebuild the subdivided pieces of a County or LocalAuthority after it is
+    saved, including saves made by the boundary loaders.
+
+    Pieces of deleted boundaries are removed by the foreign key cascade.
+    """
+    boundaries.subdivide(sender, pks=[instance.pk])
+
+
+@receiver(post_save, sender=Report)
+@receiver(post_delete, sender=Report)
+def invalidate_report_tiles(sender, instance, **kwargs):
+    """
+    Drop the cached cluster and vector tiles affected by a Report change.
+
+    This handler listens to Report.post_save and post_delete. The tiles at
+    the report's current location are dropped, as are those at the location
+    it was loaded with (Report.loaded_values) if it has moved. Saves limited
+    by `update_fields` that touch neither the location nor the condition
+    are ignored; user_report_number never changes after creation.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not {
+            'latitude', 'longitude', 'location', 'condition'} & update_fields:
+        return
+    points = [(instance.longitude, instance.latitude)]
+    if instance.loaded_values is not None:
+        points.append((instance.loaded_values['longitude'],
+                       instance.loaded_values['latitude']))
+    clusters.invalidate_report(instance.user_id, *points)
+    vector_tiles.invalidate_report(instance.user_id, *points)
@@ -0,0 +1,231 @@
+"""
+Single-flight coalescing of identical concurrent operations.
+
+When several callers ask for the same key at once (e.g. a burst of
+requests for the same map tile), only one of them runs the operation and
+the others are served its result:
+  • within a process, followers wait on the leader's threading.Event;
+  • across processes, the leader holds a lock in the default cache
+    (cache.add) and publishes its result there for SINGLE_FLIGHT_RESULT_TTL
+    seconds, while leaders in other processes poll for it.
+
+Cross-process coalescing needs a shared cache (Redis); with the local-memory
+fallback each process coalesces only its own callers. Waiting is bounded by
+SINGLE_FLIGHT_WAIT: a caller that times out, or whose leader failed, runs
+the operation itself, so a stuck or crashed leader never blocks requests.
+
+• run: return the result of an operation, running it at most once per key
+  at a time.
+• arun: the same for coroutines, coalescing callers on one event loop with
+  an asyncio.Future.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from . import metrics
+
+logger = logging.getLogger(__name__)  # Set up logging for this module
+
+# Prefix of the shared-cache lock and result keys
+KEY_PREFIX = 'single_flight'
+
+# Seconds between checks for another process's result
+POLL_INTERVAL = 0.05
+
+_calls = {}
+_calls_lock = threading.Lock()
+_futures = {}
+
+
+class _Call:
+    """
+    An operation in flight in this process.
+
+    Attributes:
+        done (threading.Event): Set when the leader has finished.
+        result: The leader's result, if it succeeded.
+        error (Exception | None): The leader's exception, if it failed.
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _run_shared(key, fn):
+    """
+    Run `fn` for `key`, or wait for another process that is already running
+    it and return its result.
+    """
+    lock_key = f'{KEY_PREFIX}:{key}:lock'
+    result_key = f'{KEY_PREFIX}:{key}:result'
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT
+    while True:
+        # Results are stored wrapped in a tuple so that None is a valid one
+        published = cache.get(result_key)
+        if published is not None:
+            metrics.incr('single_flight.shared_hits')
+            return published[0]
+        token = uuid.uuid4().hex
+        if cache.add(lock_key, token, timeout=settings.SINGLE_FLIGHT_LOCK_TTL):
+            try:
+                result = fn()
+                cache.set(result_key, (result,),
+                          timeout=settings.SINGLE_FLIGHT_RESULT_TTL)
+                return result
+            finally:
+                # Only release the lock if it has not expired and been
+                # taken by another process
+                if cache.get(lock_key) == token:
+                    cache.delete(lock_key)
+        # Another process is running fn; wait for its result
+        while cache.get(lock_key) is not None:
+            if time.monotonic() >= deadline:
+                metrics.incr('single_flight.timeouts')
+                logger.warning("Timed out waiting for %s; running it here",
+                               key)
+                return fn()
+            time.sleep(POLL_INTERVAL)
+            published = cache.get(result_key)
+            if published is not None:
+                metrics.incr('single_flight.shared_hits')
+                return published[0]
+        # The lock was released without a result (the leader failed), so
+        # try to become the leader
+
+
+def run(key, fn):
+    """
+    Return fn(), collapsing concurrent calls with the same key into one.
+
+    The first caller for a key in this process becomes its leader and runs
+    `fn` (or picks up another process's result); later callers wait for the
+    leader and share its result or exception. Records
+    'single_flight.followers', '.shared_hits' and '.timeouts' counters.
+
+    Args:
+        key (str): Identifies the operation, e.g. 'tile:os:12:2021:1360'.
+        fn (Callable[[], object]): The operation. Its result must be
+            picklable, to be shared through the cache.
+
+    Returns:
+        The result of `fn`, from this caller or another.
+
+    Raises:
+        Exception: Whatever `fn` raised in the leader.
+    """
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        metrics.incr('single_flight.followers')
+        if not call.done.wait(settings.SINGLE_FLIGHT_WAIT):
+            metrics.incr('single_flight.timeouts')
+            return fn()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _run_shared(key, fn)
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            del _calls[key]
+        call.done.set()
+
+
+async def _arun_shared(key, fn):
+    """
+    Asynchronous version of _run_shared().
+    """
+    lock_key = f'{KEY_PREFIX}:{key}:lock'
+    result_key = f'{KEY_PREFIX}:{key}:result'
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT
+    while True:
+        published = await cache.aget(result_key)
+        if published is not None:
+            await metrics.aincr('single_flight.shared_hits')
+            return published[0]
+        token = uuid.uuid4().hex
+        if await cache.aadd(lock_key, token,
+                            timeout=settings.SINGLE_FLIGHT_LOCK_TTL):
+            try:
+                result = await fn()
+                await cache.aset(result_key, (result,),
+                                 timeout=settings.SINGLE_FLIGHT_RESULT_TTL)
+                return result
+            finally:
+                if await cache.aget(lock_key) == token:
+                    await cache.adelete(lock_key)
+        while await cache.aget(lock_key) is not None:
+            if time.monotonic() >= deadline:
+                await metrics.aincr('single_flight.timeouts')
+                logger.warning("Timed out waiting for %s; running it here",
+                               key)
+                return await fn()
+            await asyncio.sleep(POLL_INTERVAL)
+            published = await cache.aget(result_key)
+            if published is not None:
+                await metrics.aincr('single_flight.shared_hits')
+                return published[0]
+
+
+async def arun(key, fn):
+    """
+    Return await fn(), collapsing concurrent calls with the same key into
+    one.
+
+    The asynchronous version of run(), for callers on the process's event
+    loop. If the leader is cancelled (e.g. its client disconnected), its
+    followers run `fn` themselves.
+
+    Args:
+        key (str): Identifies the operation, e.g. 'tile:os:12:2021:1360'.
+        fn (Callable[[], Awaitable]): Returns a new awaitable of the
+            operation on each call. Its result must be picklable.
+
+    Returns:
+        The result of `fn`, from this caller or another.
+
+    Raises:
+        Exception: Whatever `fn` raised in the leader.
+    """
+    future = _futures.get(key)
+    if future is not None:
+        await metrics.aincr('single_flight.followers')
+        try:
+            return await asyncio.wait_for(asyncio.shield(future),
+                                          settings.SINGLE_FLIGHT_WAIT)
+        except asyncio.TimeoutError:
+            await metrics.aincr('single_flight.timeouts')
+            return await fn()
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise  # This caller was cancelled, not the leader
+            return await fn()
+
+    future = _futures[key] = asyncio.get_running_loop().create_future()
+    try:
+        result = await _arun_shared(key, fn)
+        future.set_result(result)
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception as retrieved, in case nobody was waiting
+        future.exception()
+        raise
+    finally:
+        del _futures[key]
+        if not future.done():
+            future.cancel()
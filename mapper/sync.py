@@ -0,0 +1,132 @@
+"""
+Incremental synchronisation of the reports feed (/api/reports.geojson).
+
+A client that has loaded an area keeps the `sync_cursor` of the response
+and later sends it back as `since`; the feed then returns only the reports
+created or updated since, plus the ids of reports deleted or moved out of
+the area since (from ReportDeletion tombstones). Cursors are re-read with an overlap of
+REPORT_SYNC_OVERLAP seconds, so writes whose transaction committed after
+the cursor was issued are not missed; clients upsert by id, so repeats are
+harmless. A cursor older than REPORT_TOMBSTONE_RETENTION can no longer be
+served incrementally and the client must reload.
+
+The same watermark (latest update or deletion in the area) drives the
+feed's ETag and Last-Modified headers, so unchanged areas are answered
+with 304 Not Modified.
+
+• parse_since: decode a `since` cursor.
+• watermark: the latest change to the reports a user can see in a bbox.
+• is_expired: whether a cursor is older than the tombstones kept.
+• deleted_since: ids of reports deleted from a bbox since a time.
+• record_deletion: write a tombstone for a deleted or moved report.
+"""
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+from .models import Report, ReportDeletion
+
+
+def parse_since(value):
+    """
+    Decode a `since` cursor.
+
+    Args:
+        value (str | None): An ISO 8601 timestamp from `sync_cursor`.
+
+    Returns:
+        datetime | None: The cursor, or None if no cursor was given.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    if not value:
+        return None
+    since = datetime.fromisoformat(value)
+    if timezone.is_naive(since):
+        raise ValueError("since must include a UTC offset")
+    return since
+
+
+def is_expired(since):
+    """
+    Return True if tombstones from `since` may already have been pruned.
+    """
+    return since < timezone.now() - timedelta(
+        seconds=settings.REPORT_TOMBSTONE_RETENTION)
+
+
+def visible_deletions(user):
+    """
+    Return the tombstones of reports `user` could see.
+    """
+    deletions = ReportDeletion.objects.all()
+    if not user.is_superuser:
+        deletions = deletions.filter(user_id=user.pk)
+    return deletions
+
+
+def watermark(user, bbox):
+    """
+    Return the latest change to the reports `user` can see inside `bbox`.
+
+    Args:
+        user (User): The requesting user.
+        bbox (tuple[float, float, float, float]): west, south, east, north.
+
+    Returns:
+        tuple[datetime | None, int]: The time of the latest update or
+        deletion (None if there has been neither) and the number of
+        reports, which together identify the state of the area.
+    """
+    west, south, east, north = bbox
+    reports = Report.objects.visible_to(user).in_bbox(*bbox) \
+        .aggregate(latest=Max('updated_at'), count=Count('id'))
+    deleted = visible_deletions(user).filter(
+        longitude__gte=west, longitude__lte=east,
+        latitude__gte=south, latitude__lte=north,
+    ).aggregate(latest=Max('deleted_at'))['latest']
+    latest = max(filter(None, [reports['latest'], deleted]), default=None)
+    return latest, reports['count']
+
+
+def deleted_since(user, bbox, since):
+    """
+    Return the ids of reports `user` could see in `bbox` that were deleted
+    or moved out of it after `since` (less the sync overlap). A moved
+    report may also be returned as a feature of the area it moved to.
+
+    Args:
+        user (User): The requesting user.
+        bbox (tuple[float, float, float, float]): west, south, east, north.
+        since (datetime): The client's cursor.
+
+    Returns:
+        list[int]: The deleted report ids.
+    """
+    west, south, east, north = bbox
+    return list(visible_deletions(user).filter(
+        longitude__gte=west, longitude__lte=east,
+        latitude__gte=south, latitude__lte=north,
+        deleted_at__gt=since - timedelta(
+            seconds=settings.REPORT_SYNC_OVERLAP),
+    ).values_list('report_id', flat=True).distinct())
+
+
+def record_deletion(report, latitude=None, longitude=None):
+    """
+    Write a tombstone for a report that was deleted, or that moved away
+    from (latitude, longitude), and prune expired tombstones.
+
+    Args:
+        report (Report): The deleted or moved report.
+        latitude (Decimal | None): The location it left; defaults to the
+            report's own location.
+        longitude (Decimal | None): As `latitude`.
+    """
+    ReportDeletion.objects.create(
+        report_id=report.pk, user_id=report.user_id,
+        latitude=report.latitude if latitude is None else latitude,
+        longitude=report.longitude if longitude is None else longitude)
+    ReportDeletion.objects.filter(deleted_at__lt=timezone.now() - timedelta(
+        seconds=settings.REPORT_TOMBSTONE_RETENTION)).delete()
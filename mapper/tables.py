@@ -9,8 +9,10 @@ This module provides:
     wrapping.
   - Human-readable created_at and updated_at renderers using
     Windows-compatible formats.
+  - Row cells served from the per-report fragment cache (mapper.fragments).
 """
 import django_tables2 as tables
+from . import fragments
 from .models import Report
 
 class ReportTable(tables.Table):
@@ -153,9 +155,22 @@ class ReportTable(tables.Table):
         return value.strftime("%#d %B %Y %H:%M")    # Windows
         # return value.strftime("%-d %B %Y %H:%M")  # non-windows
 
+    def row_cells_html(self, row):
+        """
+        Return the rendered cells of a row on the current page.
+
+        The cells of the whole page are looked up in the fragment cache in
+        one go on the first call, and missing rows are rendered and cached.
+        """
+        if getattr(self, '_row_cells', None) is None:
+            self._row_cells = fragments.row_cells(self,
+                                                  list(self.paginated_rows))
+        return self._row_cells[row.record.pk]
+
     class Meta:
         model = Report
-        template_name="django_tables2/bootstrap5-responsive.html"
+        # Extends django_tables2/bootstrap5-responsive.html
+        template_name="mapper/report_table.html"
         fields = (
             'id',
             'user_report_number',
@@ -0,0 +1,14 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+@register.simple_tag(takes_context=True)
+def report_row_cells(context, row):
+    """
+    Render the cells of a ReportTable row from the fragment cache.
+
+    The cells of every row on the page are fetched (and the misses
+    rendered) together the first time this tag is used for a table.
+    """
+    return mark_safe(context['table'].row_cells_html(row))
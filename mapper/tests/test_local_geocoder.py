@@ -0,0 +1,94 @@
+"""
+Tests for the offline LocalGeocoder, using an index built from a few
+GeoJSON features in a temporary directory.
+"""
+import tempfile
+import numpy as np
+from django.test import SimpleTestCase
+from mapper.geocoders import GeocodingError
+from mapper.local_geocoder import LocalGeocoder, build_index
+
+# The query point, on Grey Street in Newcastle upon Tyne
+LAT, LON = 54.9726, -1.6125
+
+
+def feature(geometry_type, coordinates, **properties):
+    return {'type': 'Feature', 'properties': properties,
+            'geometry': {'type': geometry_type, 'coordinates': coordinates}}
+
+
+FEATURES = [
+    feature('LineString', [[-1.6130, 54.9720], [-1.6120, 54.9730]],
+            name='Grey Street', highway='primary'),
+    # Unnamed roads and unused tags are skipped
+    feature('LineString', [[-1.6126, 54.9725], [-1.6124, 54.9727]],
+            highway='service'),
+    feature('Point', [-1.6125, 54.9726], name='Grey Monument',
+            historic='memorial'),
+    feature('Point', [-1.6128, 54.9728], name='Grainger Town',
+            place='neighbourhood'),
+    feature('Polygon', [[[-1.6150, 54.9730], [-1.6130, 54.9730],
+                         [-1.6130, 54.9750], [-1.6150, 54.9750],
+                         [-1.6150, 54.9730]]],
+            name='City Centre', place='suburb'),
+    # The city is 3 km away (0.3 of its radius), the hamlet 600 m away
+    # (0.4 of its radius)
+    feature('Point', [-1.6125, 54.9996], name='Newcastle upon Tyne',
+            place='city'),
+    feature('Point', [-1.6125, 54.9672], name='Nuns Moor', place='hamlet'),
+]
+
+
+class LocalGeocoderTests(SimpleTestCase):
+    def setUp(self):
+        index_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(index_dir.cleanup)
+        self.index_dir = index_dir.name
+        self.counts = build_index(FEATURES, self.index_dir)
+
+    def test_build_index_counts(self):
+        self.assertGreater(self.counts['road'], 2)  # Densified
+        self.assertEqual(self.counts['locality'], 2)
+        self.assertEqual(self.counts['settlement'], 2)
+
+    def test_components_joined_in_nominatim_order(self):
+        self.assertEqual(
+            LocalGeocoder(self.index_dir).reverse(LAT, LON),
+            'Grey Street, Grainger Town, City Centre, Newcastle upon Tyne')
+
+    def test_city_preferred_to_nearer_hamlet(self):
+        place_name = LocalGeocoder(self.index_dir).reverse(LAT, LON)
+        self.assertIn('Newcastle upon Tyne', place_name)
+        self.assertNotIn('Nuns Moor', place_name)
+
+    def test_hamlet_used_beyond_city_radius(self):
+        # 11 km north of the city, 600 m from a hamlet placed there
+        index_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(index_dir.cleanup)
+        build_index(FEATURES + [
+            feature('Point', [-1.6125, 55.0980], name='Seaton Burn',
+                    place='hamlet')], index_dir.name)
+        self.assertEqual(
+            LocalGeocoder(index_dir.name).reverse(55.0926, -1.6125),
+            'Seaton Burn')
+
+    def test_outside_every_radius(self):
+        geocoder = LocalGeocoder(self.index_dir)
+        self.assertIsNone(geocoder.reverse(55.5, -1.6125))
+        # 150 m off the road, beyond its 100 m radius
+        self.assertNotIn('Grey Street',
+                         geocoder.reverse(LAT, LON + 0.0024))
+
+    def test_reload_is_memory_mapped(self):
+        first = LocalGeocoder(self.index_dir)
+        second = LocalGeocoder(self.index_dir)
+        for layer in first._layers.values():
+            for part in layer.values():
+                self.assertIsInstance(part, np.memmap)
+        self.assertIsInstance(second._name_blob, np.memmap)
+        self.assertEqual(second.reverse(LAT, LON), first.reverse(LAT, LON))
+
+    def test_missing_index(self):
+        with tempfile.TemporaryDirectory() as empty:
+            with self.assertRaises(GeocodingError):
+                LocalGeocoder(empty)
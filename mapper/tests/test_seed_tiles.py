@@ -0,0 +1,101 @@
+"""
+Tests for the seed_tiles management command, run against a local stand-in
+tile server (http.server) instead of the OS Maps API.
+"""
+import io
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from mapper import tile_cache, tiles
+
+# A small area of Newcastle upon Tyne and the zoom to seed it at
+BBOX = '-1.615,54.970,-1.605,54.975'
+ZOOM = 16
+
+PNG = b'\x89PNG\r\n\x1a\n stand-in tile'
+
+
+class TileHandler(BaseHTTPRequestHandler):
+    """
+    Serve PNG bytes for /{z}/{x}/{y}.png, except 404 for the paths in
+    `server.missing`, and count the requests.
+    """
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        with self.server.lock:
+            self.server.requests.append(path)
+        if path in self.server.missing:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(PNG)))
+        self.end_headers()
+        self.wfile.write(PNG)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SeedTilesTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), TileHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.tiles = tiles.tiles_for_bbox(
+            *[float(value) for value in BBOX.split(',')], ZOOM)
+        x, y = self.tiles[0]
+        self.server.missing = {f'/{ZOOM}/{x}/{y}.png'}
+        thread = threading.Thread(target=self.server.serve_forever,
+                                  daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        port = self.server.server_address[1]
+        settings = override_settings(
+            OS_TILE_URL=f'http://127.0.0.1:{port}/{{z}}/{{x}}/{{y}}.png',
+            TILE_CACHE_DIR=cache_dir.name,
+            TILE_RETRIES=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def seed(self):
+        out = io.StringIO()
+        call_command('seed_tiles', f'--bbox={BBOX}', '--zooms', str(ZOOM),
+                     '--rate', '1000', stdout=out)
+        return out.getvalue()
+
+    def test_fetches_then_skips_cached_tiles(self):
+        self.assertGreater(len(self.tiles), 1)
+        fetched = len(self.tiles) - 1
+
+        output = self.seed()
+        self.assertIn(f"{fetched} fetched, 0 already cached, 1 missing, "
+                      "0 failed", output)
+        self.assertEqual(len(self.server.requests), len(self.tiles))
+        for x, y in self.tiles[1:]:
+            cached = tile_cache.get('os', ZOOM, x, y)
+            self.assertIsNotNone(cached)
+            self.assertEqual(cached.content, PNG)
+            self.assertEqual(cached.content_type, 'image/png')
+        x, y = self.tiles[0]
+        self.assertIsNone(tile_cache.get('os', ZOOM, x, y))
+
+        # A second run only asks for the tile that is still missing. Clear
+        # the single-flight result published for it by the first run.
+        cache.clear()
+        output = self.seed()
+        self.assertIn(f"0 fetched, {fetched} already cached, 1 missing, "
+                      "0 failed", output)
+        self.assertEqual(len(self.server.requests), len(self.tiles) + 1)
+        self.assertEqual(self.server.requests[-1],
+                         f'/{ZOOM}/{x}/{y}.png')
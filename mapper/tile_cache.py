@@ -0,0 +1,317 @@
+"""
+Content-addressed on-disk cache of upstream map tiles.
+
+Tiles fetched by the OS and Google tile proxies are stored under
+TILE_CACHE_DIR, shared by every worker on the host:
+  • objects/<aa>/<sha256>: tile bytes, named by their SHA-256, so identical
+    tiles (e.g. open sea) are stored once;
+  • keys/<source>/<z>/<x>/<y>: a small record naming the object, its
+    content type and when it was fetched.
+
+Every file is written to a temporary name and renamed into place, so
+readers never see a partial file. A key older than its source's TTL
+(TILE_CACHE_TTL, set to respect each provider's caching terms) is a miss;
+a TTL of 0 disables caching for that source. Reading a key refreshes its
+modification time, which drives least-recently-used eviction: once in
+TILE_CACHE_EVICT_EVERY writes, keys are deleted oldest first until the
+objects fit in TILE_CACHE_MAX_BYTES, and unreferenced objects are removed.
+
+• get: the cached tile for a source and z/x/y, or None.
+• contains: whether a fresh tile is cached, without reading it.
+• etag: the ETag of a fresh cached tile, for conditional requests.
+• put: store a tile.
+• evict: remove expired keys and trim the cache to its byte budget.
+• stats: the number of keys and objects and the bytes stored.
+"""
+import hashlib
+import logging
+import os
+import random
+import tempfile
+import time
+from collections import namedtuple
+from django.conf import settings
+from . import metrics
+
+logger = logging.getLogger(__name__)  # Set up logging for this module
+
+# A cached tile. etag is the SHA-256 of the content.
+CachedTile = namedtuple('CachedTile',
+                        ['content', 'content_type', 'etag', 'stored_at'])
+
+
+def _ttl(source):
+    """
+    Return the TTL in seconds for a source (0 if it must not be cached).
+    """
+    return settings.TILE_CACHE_TTL.get(source, 0)
+
+
+def _key_path(source, z, x, y):
+    return os.path.join(settings.TILE_CACHE_DIR, 'keys', source,
+                        str(z), str(x), str(y))
+
+
+def _object_path(digest):
+    return os.path.join(settings.TILE_CACHE_DIR, 'objects', digest[:2],
+                        digest)
+
+
+def _write_atomic(path, data):
+    """
+    Write `data` to `path` via a temporary file and an atomic rename.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _read_key(path):
+    """
+    Return (digest, content_type, stored_at) from a key file.
+    """
+    with open(path, encoding='ascii') as f:
+        digest, content_type, stored_at = f.read().split()
+    return digest, content_type, float(stored_at)
+
+
+def get(source, z, x, y):
+    """
+    Return the cached tile, or None if it is missing or expired.
+
+    Records 'tile_cache.<source>.hits' and '.misses' counters.
+
+    Args:
+        source (str): The tile source, e.g. 'os' or 'google'.
+        z (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+
+    Returns:
+        CachedTile | None: The cached tile.
+    """
+    ttl = _ttl(source)
+    if not ttl:
+        return None
+    path = _key_path(source, z, x, y)
+    try:
+        digest, content_type, stored_at = _read_key(path)
+        if time.time() - stored_at > ttl:
+            raise FileNotFoundError(path)
+        with open(_object_path(digest), 'rb') as f:
+            content = f.read()
+        # Mark the key as recently used for LRU eviction
+        os.utime(path)
+    except (OSError, ValueError):
+        metrics.incr(f'tile_cache.{source}.misses')
+        return None
+    metrics.incr(f'tile_cache.{source}.hits')
+    return CachedTile(content, content_type, digest, stored_at)
+
+
+def _fresh_digest(source, z, x, y):
+    """
+    Return the object digest of a fresh cached tile, or None, without
+    reading the tile.
+    """
+    ttl = _ttl(source)
+    if not ttl:
+        return None
+    try:
+        digest, _, stored_at = _read_key(_key_path(source, z, x, y))
+    except (OSError, ValueError):
+        return None
+    if time.time() - stored_at > ttl or \
+            not os.path.exists(_object_path(digest)):
+        return None
+    return digest
+
+
+def contains(source, z, x, y):
+    """
+    Return True if a fresh tile is cached.
+
+    Unlike get(), the tile is not read, its LRU time is not refreshed and
+    no hit/miss is counted.
+
+    Args:
+        source (str): The tile source, e.g. 'os' or 'google'.
+        z (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+
+    Returns:
+        bool: Whether get() would return the tile.
+    """
+    return _fresh_digest(source, z, x, y) is not None
+
+
+def etag(source, z, x, y):
+    """
+    Return the ETag (content hash) of a fresh cached tile, without reading
+    the tile, to answer conditional requests.
+
+    A tile found counts as a hit and is marked as recently used, since the
+    client goes on to use its copy; a miss is not counted, as the caller
+    falls back to get().
+
+    Args:
+        source (str): The tile source, e.g. 'os' or 'google'.
+        z (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+
+    Returns:
+        str | None: The unquoted ETag, or None if the tile is not cached.
+    """
+    digest = _fresh_digest(source, z, x, y)
+    if digest is None:
+        return None
+    try:
+        os.utime(_key_path(source, z, x, y))
+    except OSError:
+        pass
+    metrics.incr(f'tile_cache.{source}.hits')
+    return digest
+
+
+def put(source, z, x, y, content, content_type):
+    """
+    Store a tile, unless its source is not cacheable.
+
+    Errors (e.g. a full disk) are logged and swallowed; the cache must
+    never break the request that is being served.
+
+    Args:
+        source (str): The tile source, e.g. 'os' or 'google'.
+        z (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+        content (bytes): The tile image.
+        content_type (str): Its media type, e.g. 'image/png'.
+
+    Returns:
+        CachedTile | None: The stored tile.
+    """
+    if not _ttl(source):
+        return None
+    digest = hashlib.sha256(content).hexdigest()
+    stored_at = time.time()
+    try:
+        object_path = _object_path(digest)
+        if not os.path.exists(object_path):
+            _write_atomic(object_path, content)
+        _write_atomic(_key_path(source, z, x, y),
+                      f"{digest} {content_type} {stored_at}".encode('ascii'))
+    except OSError as e:
+        logger.warning("Could not cache %s tile %s/%s/%s: %s",
+                       source, z, x, y, e)
+        return None
+    if random.randrange(settings.TILE_CACHE_EVICT_EVERY) == 0:
+        evict()
+    return CachedTile(content, content_type, digest, stored_at)
+
+
+def _scan():
+    """
+    Return every key as (mtime, path, digest, source, stored_at) and every
+    object's size by digest.
+    """
+    keys, objects = [], {}
+    root = settings.TILE_CACHE_DIR
+    for dirpath, _, filenames in os.walk(os.path.join(root, 'keys')):
+        source = os.path.relpath(dirpath, os.path.join(root, 'keys')) \
+                   .split(os.sep)[0]
+        for name in filenames:
+            if name.startswith('.tmp-'):
+                continue  # Being written
+            path = os.path.join(dirpath, name)
+            try:
+                digest, _, stored_at = _read_key(path)
+                keys.append((os.stat(path).st_mtime, path, digest, source,
+                             stored_at))
+            except (OSError, ValueError):
+                continue
+    for dirpath, _, filenames in os.walk(os.path.join(root, 'objects')):
+        for name in filenames:
+            if name.startswith('.tmp-'):
+                continue
+            try:
+                objects[name] = os.stat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
+    return keys, objects
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def evict():
+    """
+    Remove expired keys, then the least recently used keys until the
+    referenced objects fit in TILE_CACHE_MAX_BYTES, then every object no
+    key refers to.
+
+    Returns:
+        int: The number of keys removed.
+    """
+    keys, objects = _scan()
+    now = time.time()
+    live = []
+    removed = 0
+    for entry in keys:
+        _, path, _, source, stored_at = entry
+        if now - stored_at > _ttl(source):
+            _unlink(path)
+            removed += 1
+        else:
+            live.append(entry)
+
+    # Objects still referenced, with the number of keys using each
+    refs = {}
+    for _, _, digest, _, _ in live:
+        refs[digest] = refs.get(digest, 0) + 1
+    size = sum(objects.get(digest, 0) for digest in refs)
+    live.sort()  # Oldest modification time (least recently used) first
+    for _, path, digest, _, _ in live:
+        if size <= settings.TILE_CACHE_MAX_BYTES:
+            break
+        _unlink(path)
+        removed += 1
+        refs[digest] -= 1
+        if not refs[digest]:
+            del refs[digest]
+            size -= objects.get(digest, 0)
+
+    for digest in objects:
+        if digest not in refs:
+            _unlink(_object_path(digest))
+    if removed:
+        logger.info("Evicted %s tile cache keys", removed)
+    return removed
+
+
+def stats():
+    """
+    Return the number of keys and objects, and the bytes stored.
+
+    Returns:
+        dict: 'keys', 'objects' and 'bytes'.
+    """
+    keys, objects = _scan()
+    return {'keys': len(keys), 'objects': len(objects),
+            'bytes': sum(objects.values())}
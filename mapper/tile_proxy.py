@@ -0,0 +1,144 @@
+"""
+Upstream fetching and HTTP responses for the OS and Google tile proxies
+(and seed_tiles).
+
+Successful tiles carry a strong ETag (the SHA-256 of the content, which is
+also its tile cache object name) and browser/CDN caching headers with a
+per-source lifetime (TILE_HTTP_MAX_AGE). Tile content does not depend on
+the request or the user, so no Vary header is needed.
+
+• os_tile_url: the OS Maps API URL of a tile.
+• fetch_tile: fetch a tile through the pooled upstream session, coalescing
+  concurrent fetches of the same tile, and store it in the tile cache.
+• tile_response: a 200 response for a tile, with caching headers.
+• not_modified: a 304 response if the client's copy matches the locally
+  cached tile.
+"""
+import hashlib
+import os
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_response_headers
+from django.utils.http import parse_etags, quote_etag
+from . import single_flight, tile_cache, upstream
+
+
+def os_tile_url(z, x, y):
+    """
+    Return the URL of an OS Maps API raster tile, including the API key.
+
+    The base URL is the OS_TILE_URL setting, which can point at a local
+    stand-in tile server for testing.
+
+    Args:
+        z (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+
+    Returns:
+        str: The tile URL.
+    """
+    api_key = os.environ.get("OS_MAPS_API_KEY")
+    return f"{settings.OS_TILE_URL.format(z=z, x=x, y=y)}?key={api_key}"
+
+
+def fetch_tile(source, name, z, x, y, tile_url):
+    """
+    GET a tile from an upstream tile server and store it in the tile cache.
+
+    The request goes through the pooled session for `name`, with
+    TILE_CONNECT_TIMEOUT/TILE_READ_TIMEOUT timeouts, TILE_RETRIES jittered
+    retries and the per-host concurrency cap of mapper.upstream. Concurrent
+    requests for the same tile, from this process or (with a shared cache)
+    other workers, are collapsed into a single upstream fetch by
+    mapper.single_flight, and every waiter is served its result.
+
+    Args:
+        source (str): The tile cache source, e.g. 'os'.
+        name (str): Upstream name for sessions and metrics, e.g. 'os_tiles'.
+        z (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+        tile_url (str): URL of the tile.
+
+    Returns:
+        tuple[int, bytes | None]: The upstream status code, and the PNG tile
+        if it was 200.
+
+    Raises:
+        upstream.UpstreamError: If the tile server could not be reached.
+    """
+    def fetch():
+        response = upstream.request(
+            name, 'GET', tile_url,
+            timeout=(settings.TILE_CONNECT_TIMEOUT,
+                     settings.TILE_READ_TIMEOUT),
+            retries=settings.TILE_RETRIES)
+        if response.status_code != 200:
+            return response.status_code, None
+        tile_cache.put(source, z, x, y, response.content, "image/png")
+        return response.status_code, response.content
+
+    # The key leaves out the URL, which carries API keys and session tokens
+    return single_flight.run(f'tile:{source}:{z}:{x}:{y}', fetch)
+
+
+def _add_cache_headers(response, source, etag):
+    """
+    Add the ETag, Cache-Control and Expires headers for a tile.
+    """
+    response.headers['ETag'] = quote_etag(etag)
+    patch_response_headers(response, settings.TILE_HTTP_MAX_AGE[source])
+    patch_cache_control(response, public=True)
+    return response
+
+
+def tile_response(source, content, content_type, etag=None):
+    """
+    Return a tile with its caching headers.
+
+    Args:
+        source (str): The tile source, e.g. 'os'.
+        content (bytes): The tile image.
+        content_type (str): Its media type.
+        etag (str | None): The unquoted ETag, if known (e.g.
+            CachedTile.etag); otherwise the content is hashed.
+
+    Returns:
+        HttpResponse: The 200 response.
+    """
+    if etag is None:
+        etag = hashlib.sha256(content).hexdigest()
+    return _add_cache_headers(HttpResponse(content, content_type=content_type),
+                              source, etag)
+
+
+def not_modified(request, source, z, x, y):
+    """
+    Answer a conditional tile request from the tile cache.
+
+    Only the local cache is consulted, so a revalidation never reaches the
+    upstream; a tile that is not cached is fetched and served in full.
+
+    Args:
+        request (HttpRequest): The tile request.
+        source (str): The tile source, e.g. 'os'.
+        z (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+
+    Returns:
+        HttpResponseNotModified | None: A 304 response if If-None-Match
+        matches the cached tile, otherwise None.
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return None
+    etag = tile_cache.etag(source, z, x, y)
+    if etag is None:
+        return None
+    # If-None-Match uses the weak comparison
+    etags = [value.removeprefix('W/') for value in parse_etags(header)]
+    if '*' not in etags and quote_etag(etag) not in etags:
+        return None
+    return _add_cache_headers(HttpResponseNotModified(), source, etag)
@@ -0,0 +1,132 @@
+"""
+Web Mercator (XYZ) tile arithmetic shared by the tile-based report views.
+
+Tiles follow the usual slippy-map scheme: at zoom z the world is split into
+2**z x 2**z tiles, x growing eastwards and y southwards from the
+north-west corner.
+
+• tile_for_point: the tile containing a longitude/latitude.
+• tile_bbox: the longitude/latitude bounding box of a tile.
+• tile_size_metres: the width of a tile in EPSG:3857 metres.
+• tiles_for_bbox: the tiles covering a longitude/latitude bounding box.
+• scope_for / cache_key / cache_keys_for_points: keys of per-user cached
+  tiles, and the keys to drop when a report at a point changes.
+"""
+import math
+
+# Half the width of the EPSG:3857 world, in metres
+ORIGIN_SHIFT = 20037508.342789244
+
+# Latitude limit of the Web Mercator projection
+MAX_LATITUDE = 85.0511287798066
+
+
+def tile_for_point(lon, lat, zoom):
+    """
+    Return the tile containing a point.
+
+    Args:
+        lon (float): Longitude in decimal degrees.
+        lat (float): Latitude in decimal degrees.
+        zoom (int): Zoom level.
+
+    Returns:
+        tuple[int, int]: The tile's x and y.
+    """
+    n = 2 ** zoom
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, float(lat)))
+    x = int((float(lon) + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi)
+            / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bbox(zoom, x, y):
+    """
+    Return the bounding box of a tile in decimal degrees.
+
+    Args:
+        zoom (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+
+    Returns:
+        tuple[float, float, float, float]: west, south, east, north.
+    """
+    n = 2 ** zoom
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return (x / n * 360.0 - 180.0, latitude(y + 1),
+            (x + 1) / n * 360.0 - 180.0, latitude(y))
+
+
+def tile_size_metres(zoom):
+    """
+    Return the width of a tile at `zoom` in EPSG:3857 metres.
+    """
+    return 2 * ORIGIN_SHIFT / 2 ** zoom
+
+
+def tiles_for_bbox(west, south, east, north, zoom):
+    """
+    Return the tiles covering a bounding box.
+
+    Args:
+        west (float): Minimum longitude.
+        south (float): Minimum latitude.
+        east (float): Maximum longitude.
+        north (float): Maximum latitude.
+        zoom (int): Zoom level.
+
+    Returns:
+        list[tuple[int, int]]: (x, y) of each tile, row by row.
+    """
+    min_x, min_y = tile_for_point(west, north, zoom)
+    max_x, max_y = tile_for_point(east, south, zoom)
+    return [(x, y) for y in range(min_y, max_y + 1)
+            for x in range(min_x, max_x + 1)]
+
+
+def scope_for(user):
+    """
+    Return the cache scope of the reports a user may see: 'all' for
+    superusers, otherwise 'user<pk>'.
+    """
+    return 'all' if user.is_superuser else f'user{user.pk}'
+
+
+def cache_key(prefix, scope, zoom, x, y):
+    """
+    Return the cache key of one tile.
+    """
+    return f'{prefix}:{scope}:{zoom}:{x}:{y}'
+
+
+def cache_keys_for_points(prefix, user_id, points, max_zoom):
+    """
+    Return the cache keys of every tile, at zooms 0 to `max_zoom`, that
+    contains one of `points`, for both scopes that can see a report owned
+    by `user_id`.
+
+    Args:
+        prefix (str): Cache key prefix of the tile set.
+        user_id (int | None): The report's owner.
+        points (Iterable[tuple]): (longitude, latitude) pairs. Pairs with a
+            missing coordinate are ignored.
+        max_zoom (int): Highest cached zoom level.
+
+    Returns:
+        set[str]: The cache keys.
+    """
+    scopes = ['all'] + ([f'user{user_id}'] if user_id else [])
+    keys = set()
+    for lon, lat in points:
+        if lon is None or lat is None:
+            continue
+        for zoom in range(max_zoom + 1):
+            x, y = tile_for_point(lon, lat, zoom)
+            keys.update(cache_key(prefix, scope, zoom, x, y)
+                        for scope in scopes)
+    return keys
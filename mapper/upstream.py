@@ -0,0 +1,231 @@
+"""
+Shared HTTP client plumbing for calls to external services.
+
+• get_session: a per-process requests.Session with a pooled HTTP adapter,
+  so connections (and TLS sessions) are reused between requests.
+• CircuitBreaker: fails fast for a cool-down period after repeated errors.
+• request: perform a request with explicit timeouts, retries with jittered
+  exponential back-off, a cap on concurrent requests per host, circuit
+  breaking and latency/error metrics.
+• redact: strip a URL's query string (API keys) from an error message.
+"""
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from . import metrics
+
+logger = logging.getLogger(__name__)  # Set up logging for this module
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Statuses not worth retrying that still count against the circuit breaker:
+# a rejected API key or quota fails every call until it is fixed
+FAILURE_STATUSES = {401, 403}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_host_slots = {}
+
+
+class UpstreamError(Exception):
+    """Raised when an upstream request fails after all retries."""
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised when a request is refused because its circuit is open."""
+
+
+class HostBusyError(UpstreamError):
+    """Raised when no request slot for a host frees up in time."""
+
+
+class CircuitBreaker:
+    """
+    Per-process circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are refused for `cooldown` seconds. The first call after the
+    cool-down is let through as a trial: success closes the circuit, failure
+    opens it again.
+
+    Attributes:
+        name (str): Identifies the circuit in logs and metrics.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        cooldown (float): Seconds to refuse calls once open.
+    """
+    def __init__(self, name, failure_threshold=5, cooldown=60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Return True if a call may be attempted now.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                # Let one trial call through; further failures reopen
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        """
+        Close the circuit after a successful call.
+        """
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit %s closed", self.name)
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        """
+        Count a failed call, opening the circuit at the threshold.
+        """
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("Circuit %s opened after %s failures",
+                                   self.name, self._failures)
+                    metrics.incr(f'{self.name}.circuit_opened')
+                self._opened_at = time.monotonic()
+
+
+def get_session(name, pool_size=None):
+    """
+    Return the process-wide session for `name`, creating it on first use.
+
+    Args:
+        name (str): Identifies the upstream, e.g. 'nominatim'.
+        pool_size (int | None): Maximum number of pooled (kept-alive)
+            connections per host; defaults to
+            UPSTREAM_MAX_CONNECTIONS_PER_HOST.
+
+    Returns:
+        requests.Session: A session with a pooled HTTP adapter.
+    """
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            pool_size = pool_size or settings.UPSTREAM_MAX_CONNECTIONS_PER_HOST
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size,
+                                  pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[name] = session
+        return session
+
+
+def redact(message, url):
+    """
+    Remove the query string of `url`, which may carry API keys or session
+    tokens, from an error message before it is logged or re-raised.
+    """
+    query = urlsplit(url).query
+    return message.replace(query, '...') if query else message
+
+
+def _host_slot(host):
+    """
+    Return the semaphore limiting concurrent requests to `host` from this
+    process.
+    """
+    with _sessions_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = threading.BoundedSemaphore(
+                settings.UPSTREAM_MAX_CONNECTIONS_PER_HOST)
+            _host_slots[host] = slot
+        return slot
+
+
+def request(name, method, url, *, timeout, retries=0, backoff=0.5,
+            breaker=None, **kwargs):
+    """
+    Perform an HTTP request through the pooled session for `name`.
+
+    Connection errors, timeouts and RETRY_STATUSES responses are retried up
+    to `retries` times, sleeping for a random time between 0 and
+    backoff * 2**attempt seconds ("full jitter") between attempts. At most
+    UPSTREAM_MAX_CONNECTIONS_PER_HOST requests per host are in flight from
+    this process; an attempt that cannot get a slot within the connect
+    timeout fails with HostBusyError. Records '<name>.latency' timings and
+    '<name>.errors' counts.
+
+    Args:
+        name (str): Identifies the upstream for sessions and metrics.
+        method (str): HTTP method, e.g. 'GET'.
+        url (str): Request URL.
+        timeout (float | tuple[float, float]): Connect and read timeouts.
+        retries (int): Number of retries after the first attempt.
+        backoff (float): Base back-off in seconds.
+        breaker (CircuitBreaker | None): Circuit guarding the upstream.
+        **kwargs: Passed on to requests.Session.request().
+
+    Returns:
+        requests.Response: The final response; it may still be an error
+        status if the status is not retryable. FAILURE_STATUSES responses
+        are returned but recorded as failures by the breaker, as are
+        RETRY_STATUSES (e.g. 429) once the retries run out.
+
+    Raises:
+        CircuitOpenError: If the circuit is open.
+        HostBusyError: If the host's request slots stayed full.
+        UpstreamError: If every attempt failed.
+    """
+    if breaker is not None and not breaker.allow():
+        metrics.incr(f'{name}.rejected')
+        raise CircuitOpenError(f"{name} circuit is open")
+
+    session = get_session(name)
+    slot = _host_slot(urlsplit(url).netloc)
+    connect_timeout = timeout[0] if isinstance(timeout, tuple) else timeout
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(random.uniform(0, backoff * 2 ** attempt))
+        if not slot.acquire(timeout=connect_timeout):
+            metrics.incr(f'{name}.busy')
+            raise HostBusyError(f"{name}: too many requests in flight")
+        start = time.monotonic()
+        try:
+            response = session.request(method, url, timeout=timeout,
+                                       **kwargs)
+        except requests.RequestException as e:
+            error = e
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                metrics.observe(f'{name}.latency', time.monotonic() - start)
+                if breaker is not None:
+                    if response.status_code in FAILURE_STATUSES:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                return response
+            error = UpstreamError(f"{name} returned {response.status_code}")
+            # Return the connection to the pool before retrying
+            response.close()
+        finally:
+            slot.release()
+        metrics.observe(f'{name}.latency', time.monotonic() - start)
+        metrics.incr(f'{name}.errors')
+        logger.warning("%s request failed (attempt %s of %s): %s",
+                       name, attempt + 1, retries + 1,
+                       redact(str(error), url))
+
+    if breaker is not None:
+        breaker.record_failure()
+    raise UpstreamError(redact(str(error), url)) from error
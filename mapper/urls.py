@@ -1,21 +1,34 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 from .views import MapReportsView
 
+# Under ASGI the tile proxies wait on the upstream without holding a thread
+if settings.ASGI_ENABLED:
+    from . import async_views as tile_views
+else:
+    tile_views = views
+
 urlpatterns = [
     path('', views.home, name='home'),  # Home page
     path('contact/', views.contact, name='contact'),
     path('instructions/', views.instructions, name='instructions'),
     path('map/', MapReportsView.as_view(), name='map-reports'),
     path('reports/', views.ReportList.as_view(), name='reports-list'),
+    path('api/reports.geojson', views.reports_geojson,
+         name='reports-geojson'),
+    path('api/reports/clusters.geojson', views.report_clusters,
+         name='report-clusters'),
     path('reports/<int:pk>/', views.report_detail, name='report-detail'),
     path('reports/<int:pk>/edit/', views.edit_report, name='edit-report'),
     path('reports/<int:pk>/delete/', views.delete_report,
          name='delete-report'),
-    path('os_tiles/<int:z>/<int:x>/<int:y>/', views.get_os_map_tiles,
+    path('os_tiles/<int:z>/<int:x>/<int:y>/', tile_views.get_os_map_tiles,
          name='tile-proxy'),
     path('google_satellite_tiles/<int:z>/<int:x>/<int:y>/',
-         views.get_google_satellite_tiles, name='google-satellite-tiles'),
+         tile_views.get_google_satellite_tiles, name='google-satellite-tiles'),
+    path('tiles/reports/<int:z>/<int:x>/<int:y>.mvt',
+         views.report_vector_tile, name='report-vector-tile'),
     path('reports/<int:pk>/update-location/', views.update_report_location,
          name='update-location'),
     path('email-confirmation-success/', views.email_confirmation_success,
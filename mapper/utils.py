@@ -1,22 +1,39 @@
 """
 Utilities for the mapper app
 """
+import json
+import logging
 import os
-import requests
+import threading
 import time
+from django.conf import settings
 from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from . import metrics, upstream
+from .models import Report
+
+logger = logging.getLogger(__name__)  # Set up logging for this module
+
+# Report fields (and related fields) read by serialise_report_values
+REPORT_VALUES = ('id', 'user_report_number', 'latitude', 'longitude',
+                 'place_name', 'place_name_pending', 'condition', 'reasons',
+                 'comments', 'photo', 'user__username', 'user__is_superuser',
+                 'county__county', 'updated_at')
 
 
 def serialise_report(report):
     """
     Convert a Report instance into a JSON-serialisable dict.
 
+    Has no side effects: missing place names are filled in by the geocode
+    worker (see mapper.geocode_queue), never while serialising.
+
     Extracts key fields and related data for HTMX/JSON responses:
       - 'user': report.user.username or None
       - 'user_report_number': per-user sequence number
       - 'user_is_superuser': boolean flag
       - 'id': primary key
-      - 'latitude', 'longitude', 'place_name'
+      - 'latitude', 'longitude', 'place_name', 'place_name_pending'
       - 'county': name of the county if set, else None
       - 'condition': traffic-light code
       - 'reasons': human-readable reasons display
@@ -29,12 +46,6 @@ def serialise_report(report):
     Returns:
         dict: A mapping of report attributes suitable for JSON encoding.
     """
-    # check if the place_name is empty and reverse geocode if necessary
-    if not report.place_name:
-        success = report.reverse_geocode(report.latitude, report.longitude)
-        if success:
-            report.save(update_fields=['place_name'])
-
     return {
         'user': report.user.username if report.user else None,
         'user_report_number': report.user_report_number,
@@ -44,6 +55,7 @@ def serialise_report(report):
         'latitude': report.latitude,
         'longitude': report.longitude,
         'place_name': report.place_name,
+        'place_name_pending': report.place_name_pending,
         'county': report.county.county if report.county else None,
         'condition': report.condition,
         'reasons': report.get_reasons_display(),
@@ -52,39 +64,130 @@ def serialise_report(report):
         }
 
 
+def serialise_report_values(row, reason_labels):
+    """
+    Build the serialise_report() dict from a `.values(*REPORT_VALUES)` row.
+
+    Produces the same keys and values as serialise_report() without
+    loading Report, user or county instances.
+
+    Args:
+        row (dict): One row of `queryset.values(*REPORT_VALUES)`.
+        reason_labels (dict): Maps reason codes to their display labels.
+
+    Returns:
+        dict: A mapping of report attributes suitable for JSON encoding.
+    """
+    photo = row['photo']
+    return {
+        'user': row['user__username'],
+        'user_report_number': row['user_report_number'],
+        'user_is_superuser': bool(row['user__is_superuser']),
+        'id': row['id'],
+        'latitude': row['latitude'],
+        'longitude': row['longitude'],
+        'place_name': row['place_name'],
+        'place_name_pending': row['place_name_pending'],
+        'county': row['county__county'],
+        'condition': row['condition'],
+        'reasons': ", ".join(str(reason_labels.get(reason, reason))
+                             for reason in row['reasons'] or []),
+        'comments': row['comments'],
+        'photoUrl': photo.url if photo else None,
+        }
+
+
+def stream_feature_collection(queryset, limit, extra, chunk_size=200):
+    """
+    Stream reports as a GeoJSON FeatureCollection, `chunk_size` features at
+    a time.
+
+    Rows are read with `.values()` through a server-side cursor
+    (`iterator()`), so memory use and the number of queries stay constant
+    however many reports match. Each feature's properties are the
+    serialise_report() dict, taken from the per-report fragment cache one
+    chunk at a time (see mapper.fragments).
+
+    Args:
+        queryset (QuerySet[Report]): Ordered reports; at most `limit` + 1
+            are read, the extra one only to detect another page.
+        limit (int): Maximum number of features.
+        extra (dict): Further top-level members, written after the
+            features; 'next_cursor' is added (the id of the last feature
+            if another page exists, otherwise None).
+        chunk_size (int): Features per yielded chunk.
+
+    Yields:
+        str: Successive pieces of the JSON document.
+    """
+    # Imported here to avoid a circular import with mapper.fragments
+    from . import fragments
+    reason_labels = dict(Report.ALLOWED_REASONS)
+    rows = queryset.values(*REPORT_VALUES)[:limit + 1] \
+                   .iterator(chunk_size=chunk_size)
+
+    def encode(batch, first):
+        properties = fragments.serialised_rows(batch, reason_labels)
+        features = [json.dumps({
+            'type': 'Feature',
+            'id': row['id'],
+            'geometry': {'type': 'Point',
+                         'coordinates': [float(row['longitude']),
+                                         float(row['latitude'])]},
+            'properties': props,
+        }, cls=DjangoJSONEncoder) for row, props in zip(batch, properties)]
+        return ('' if first else ', ') + ', '.join(features)
+
+    yield '{"type": "FeatureCollection", "features": ['
+    count, next_cursor, last_id, batch = 0, None, None, []
+    for row in rows:
+        if count == limit:
+            next_cursor = batch[-1]['id'] if batch else last_id
+            break
+        batch.append(row)
+        count += 1
+        if len(batch) >= chunk_size:
+            yield encode(batch, count == len(batch))
+            last_id = batch[-1]['id']
+            batch = []
+    if batch:
+        yield encode(batch, count == len(batch))
+    tail = json.dumps({'next_cursor': next_cursor, **extra},
+                      cls=DjangoJSONEncoder)
+    yield f"], {tail[1:]}"
+
+
+# Cache keys of the Google Maps session data and of its refresh lock
+GOOGLE_SESSION_KEY = 'google_tile_session_token'
+GOOGLE_SESSION_LOCK_KEY = 'google_tile_session_token:refresh_lock'
+
+
 class SessionTokenError(Exception):
     """Raised when a Google Maps session token cannot be retrieved."""
 
 
-def get_google_session_token():
+def refresh_google_session_token():
     """
-    Obtain and cache a Google Maps session token for satellite tile requests.
-
-    - Checks the Django cache for an existing `google_tile_session_token`.
-    - If found and not expired, returns the cached session token.
-    - If missing or expired:
-        1. Reads `GOOGLE_MAPS_API_KEY` from the environment.
-        2. Calls the Google Maps `createSession` endpoint with payload:
-           - mapType: "satellite"
-           - language: "en-GB"
-           - region: "UK"
-        3. On HTTP 200, parses the JSON response for `session` and `expiry`.
-        4. Calculates the remaining TTL and stores the full response in cache.
-        5. Returns the new session token.
-    - On non-200 responses, raises an Exception with the response text.
+    Create a Google Maps session for satellite tiles and store it in the
+    cache, replacing the current one.
+
+    - Reads `GOOGLE_MAPS_API_KEY` from the environment.
+    - Calls the Google Maps `createSession` endpoint through the pooled
+      'google_session' upstream session, with payload:
+        - mapType: "satellite"
+        - language: "en-GB"
+        - region: "UK"
+    - On HTTP 200, stores the full response under GOOGLE_SESSION_KEY with
+      no timeout, so that it stays available as a fallback after expiry.
+      `expiry` (seconds since the epoch) defaults to 14 days from now.
 
     Returns:
-        str: A valid Google Maps session token.
+        dict: The session data, with `session` and `expiry` keys.
 
     Raises:
-        Exception: When the Google API call fails or returns a non-200 status.
+        SessionTokenError: When the Google API call fails or returns a
+        non-200 status.
     """
-    # Try to retrieve the token data from the cache
-    token_data = cache.get('google_tile_session_token')
-    if token_data:
-        return token_data.get('session')
-
-    # If no token is cached, request a new one
     api_key = os.environ.get('GOOGLE_MAPS_API_KEY')
 
     # Set up the createSession endpoint URL
@@ -104,22 +207,92 @@ def get_google_session_token():
     }
 
     # Request the session token
-    response = requests.post(create_session_url,
-                             json=payload,
-                             headers=headers,
-                             timeout=30)
-    if response.status_code == 200:
+    try:
+        response = upstream.request(
+            'google_session', 'POST', create_session_url,
+            json=payload,
+            headers=headers,
+            timeout=(settings.TILE_CONNECT_TIMEOUT,
+                     settings.TILE_READ_TIMEOUT),
+            retries=settings.TILE_RETRIES)
+        if response.status_code != 200:
+            raise SessionTokenError(
+                f"Failed to obtain session token: {response.text}")
         data = response.json()
-        session_token = data.get("session")
-        expiry = data.get("expiry")
-        # Calculate the remaining time until expiry (expiry is seconds since
-        # the epoch)
-        now = int(time.time())
-        remaining = int(expiry) - now if expiry and int(expiry) > \
-            now else 14 * 24 * 3600
-        # Cache the full token data (you might want to cache the expiry
-        # as well)
-        cache.set('google_tile_session_token', data, timeout=remaining)
-        return session_token
-    raise SessionTokenError(f"Failed to obtain session token: \
-        {response.text}")
+    except (upstream.UpstreamError, ValueError) as e:
+        raise SessionTokenError(f"Failed to obtain session token: {e}") \
+            from e
+    if not data.get("session"):
+        raise SessionTokenError("Failed to obtain session token: "
+                                "no session in the response")
+    data["expiry"] = int(data.get("expiry") or
+                         time.time() + 14 * 24 * 3600)
+    cache.set(GOOGLE_SESSION_KEY, data, timeout=None)
+    metrics.incr('google_session.created')
+    return data
+
+
+def _refresh_google_session_in_background():
+    """
+    Start refreshing the Google Maps session in a daemon thread, unless
+    another worker holds the refresh lock.
+
+    The lock is taken with cache.add() for GOOGLE_SESSION_LOCK_TTL seconds.
+    It is released after a successful refresh; after a failure it is left
+    to expire, which spaces out the retries.
+    """
+    if not cache.add(GOOGLE_SESSION_LOCK_KEY, 1,
+                     timeout=settings.GOOGLE_SESSION_LOCK_TTL):
+        return
+
+    def refresh():
+        try:
+            refresh_google_session_token()
+        except SessionTokenError as e:
+            metrics.incr('google_session.refresh_failures')
+            logger.warning("Could not refresh the Google Maps session; "
+                           "still using the current one: %s", e)
+        else:
+            cache.delete(GOOGLE_SESSION_LOCK_KEY)
+
+    threading.Thread(target=refresh, name='google-session-refresh',
+                     daemon=True).start()
+
+
+def get_google_session_token():
+    """
+    Return the Google Maps session token for satellite tile requests.
+
+    - Reads the session stored under GOOGLE_SESSION_KEY in the default
+      cache, shared by every worker when Redis is configured.
+    - Within GOOGLE_SESSION_REFRESH_AHEAD seconds of its expiry, one worker
+      (holding a cache lock) refreshes it in a background thread while
+      requests carry on with the current token.
+    - If refreshing keeps failing, the stale token is still returned, even
+      after its expiry, rather than failing every tile request.
+    - When no session is stored at all (first use, or the cache was
+      cleared), a background refresh is started and SessionTokenError is
+      raised at once, so no request ever waits on createSession. The
+      release phase (`manage.py google_session --refresh`, see the
+      Procfile) seeds the session before a deploy goes live.
+
+    Without REDIS_URL the default cache is per-process: the release phase
+    seed does not reach the web workers, and each worker creates and
+    refreshes its own session.
+
+    Returns:
+        str: A Google Maps session token.
+
+    Raises:
+        SessionTokenError: If no session is stored yet.
+    """
+    token_data = cache.get(GOOGLE_SESSION_KEY)
+    if token_data:
+        refresh_at = int(token_data["expiry"]) - \
+            settings.GOOGLE_SESSION_REFRESH_AHEAD
+        if time.time() >= refresh_at:
+            _refresh_google_session_in_background()
+        return token_data["session"]
+
+    _refresh_google_session_in_background()
+    raise SessionTokenError("No Google Maps session yet; one is being created")
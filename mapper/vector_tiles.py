@@ -0,0 +1,108 @@
+"""
+Mapbox Vector Tiles of the reports layer.
+
+Tiles are built in PostGIS with ST_AsMVTGeom/ST_AsMVT. Each tile has one
+layer, 'reports', with a point feature per report carrying its id,
+user_report_number and condition. The report id is also the MVT feature id;
+it is selected twice because ST_AsMVT drops the feature id column from the
+properties. Only the reports the user may see are
+included (all for superusers, otherwise their own).
+
+Encoded tiles are cached per visibility scope, and the tiles containing a
+report are dropped by invalidate_report() when it is saved or deleted.
+
+• get_tile: the encoded tile for a user, from the cache when possible.
+• invalidate_report: drop the cached tiles containing a report.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from . import tiles
+from .models import Report
+
+# Cache key prefix for encoded tiles
+KEY_PREFIX = 'report_mvt'
+
+# Name of the layer inside each tile
+LAYER = 'reports'
+
+# Tile coordinate extent and the buffer around it, in tile units
+EXTENT = 4096
+BUFFER = 64
+
+
+def build_tile(user, zoom, x, y):
+    """
+    Encode the reports visible to `user` inside one tile.
+
+    Args:
+        user (User): The requesting user.
+        zoom (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+
+    Returns:
+        bytes: The encoded tile; empty if it has no reports.
+    """
+    qn = connection.ops.quote_name
+    report = qn(Report._meta.db_table)
+    visibility, params = '', []
+    if not user.is_superuser:
+        visibility, params = 'AND r.user_id = %s', [user.pk]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH features AS (
+                SELECT ST_AsMVTGeom(ST_Transform(r.location, 3857),
+                                    ST_TileEnvelope(%s, %s, %s),
+                                    %s, %s, true) AS geom,
+                       r.id AS feature_id, r.id, r.user_report_number,
+                       r.condition
+                FROM {report} AS r
+                WHERE r.location && ST_Transform(
+                    ST_TileEnvelope(%s, %s, %s, margin => %s), 4326)
+                {visibility}
+            )
+            SELECT ST_AsMVT(features.*, %s, %s, 'geom', 'feature_id')
+            FROM features
+            """,
+            [zoom, x, y, EXTENT, BUFFER,
+             zoom, x, y, BUFFER / EXTENT] + params + [LAYER, EXTENT])
+        tile = cursor.fetchone()[0]
+    return bytes(tile) if tile else b''
+
+
+def get_tile(user, zoom, x, y):
+    """
+    Return the encoded tile for `user`, building and caching it on a miss.
+
+    Args:
+        user (User): The requesting user.
+        zoom (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+
+    Returns:
+        bytes: The encoded tile; empty if it has no reports.
+    """
+    key = tiles.cache_key(KEY_PREFIX, tiles.scope_for(user), zoom, x, y)
+    tile = cache.get(key)
+    if tile is None:
+        tile = build_tile(user, zoom, x, y)
+        cache.set(key, tile, timeout=settings.REPORT_TILE_CACHE_TTL)
+    return tile
+
+
+def invalidate_report(user_id, *points):
+    """
+    Drop the cached tiles containing a report's location(s).
+
+    Args:
+        user_id (int | None): The report's owner.
+        *points (tuple): (longitude, latitude) pairs, e.g. the report's old
+            and new locations. Missing coordinates are ignored.
+    """
+    keys = tiles.cache_keys_for_points(KEY_PREFIX, user_id, points,
+                                       settings.REPORT_TILE_MAX_ZOOM)
+    if keys:
+        cache.delete_many(keys)
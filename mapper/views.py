@@ -5,6 +5,10 @@ This module defines all HTTP endpoints and view logic for:
   • home: Public landing page.
   • MapReportsView: Interactive map-based report creation and listing
     (HTMX-enabled).
+  • reports_geojson: GeoJSON of the reports inside a map viewport, paged
+    with a cursor, with conditional requests and incremental sync.
+  • report_clusters: GeoJSON clusters of reports for low zoom levels.
+  • report_vector_tile: Mapbox Vector Tile of the reports layer.
   • update_report_location: AJAX endpoint to move a report marker.
   • edit_report: Display and process the report editing form.
   • delete_report: Delete a user's report with permission checks.
@@ -24,25 +28,39 @@ where required.
 """
 import os
 import json
-import requests
+import hashlib
+from datetime import timedelta
 
 from django.http import HttpResponseRedirect, HttpResponse, Http404, \
-    JsonResponse, HttpResponseBadRequest
+    JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.mail import send_mail
-from django.views.decorators.http import require_POST
+from django.utils import timezone
+from django.views.decorators.http import condition, require_POST
 from django.views import View
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect, reverse
 from django_tables2 import SingleTableView, RequestConfig
 from allauth.account.views import ConfirmEmailView
+from . import clusters, fragments, sync, tile_cache, tiles, upstream, \
+    vector_tiles
 from .forms import ReportForm, ContactForm
 from .models import Report
 from .tables import ReportTable
-from .utils import serialise_report, get_google_session_token
+from .tile_proxy import fetch_tile, not_modified, os_tile_url, tile_response
+from .utils import (SessionTokenError, get_google_session_token,
+                    stream_feature_collection)
+
+
+def serialised_report(report):
+    """
+    Return serialise_report(report), from the per-report fragment cache
+    when possible (see mapper.fragments).
+    """
+    return fragments.serialised_reports([report])[0]
 
 
 # HOME PAGE
@@ -70,13 +88,12 @@ class MapReportsView(LoginRequiredMixin, View):
 
     GET:
       - Instantiates an empty ReportForm
-      - Fetches existing reports: all for superusers, or only the
-        current user's reports
-      - Serialises reports into JSON-safe dictionaries
       - Renders 'mapper/map_reports.html' passing:
           • form: ReportForm instance
-          • reports: list of serialised report dicts
+          • cluster_max_zoom: zoom up to which clusters are shown
           • is_map_reports: True (to customise form cancel link)
+      - Existing reports are fetched by the map from reports_geojson as
+        the user pans
 
     POST:
       - Binds ReportForm to request.POST and request.FILES with user context
@@ -93,14 +110,14 @@ class MapReportsView(LoginRequiredMixin, View):
         Handle GET requests for the interactive map-reports page.
 
         - Instantiates an empty ReportForm for new report submissions.
-        - Retrieves existing reports: all reports for superusers, or only the
-          current user's reports otherwise.
-        - Serialises each report into a JSON-safe dictionary.
         - Renders 'mapper/map_reports.html' with context:
             • form: ReportForm instance
-            • reports: list of serialised report dicts
+            • cluster_max_zoom: REPORT_CLUSTER_MAX_ZOOM
             • is_map_reports: True (to adjust the cancel link behavior).
 
+        Reports are not embedded in the page; the map requests the ones in
+        view from reports_geojson.
+
         Args:
             request (HttpRequest): The incoming HTTP GET request.
 
@@ -108,14 +125,9 @@ class MapReportsView(LoginRequiredMixin, View):
             HttpResponse: The rendered map reports page.
         """
         form = ReportForm()
-        # Only show this user's reports (unless they're superuser)
-        if request.user.is_superuser:
-            reports = Report.objects.all()
-        else:
-            reports = Report.objects.filter(user=request.user)
-        data = [serialise_report(report) for report in reports]
         return render(request, 'mapper/map_reports.html',
-                      {'form': form, 'reports': data,
+                      {'form': form,
+                       'cluster_max_zoom': settings.REPORT_CLUSTER_MAX_ZOOM,
                        # Indicate to the ReportForm that it is on the
                        # map_reports page
                        'is_map_reports': True, 'is_edit': False})
@@ -131,7 +143,7 @@ class MapReportsView(LoginRequiredMixin, View):
             • Creates and saves a new Report linked to request.user.
             • Adds a SUCCESS message to the messages framework.
             • Returns the HTMX partial 'mapper/partials/success.html'
-              with context {'report': serialise_report(report)}.
+              with context {'report': serialised_report(report)}.
         - If the form is invalid:
             • Adds an ERROR message.
 
@@ -152,7 +164,7 @@ class MapReportsView(LoginRequiredMixin, View):
                                  'Report created successfully!')
             return render(request,
                           'mapper/partials/success.html',
-                          {'report': serialise_report(report)})
+                          {'report': serialised_report(report)})
         # Unsuccessful form submission
         messages.add_message(request,
                              messages.ERROR,
@@ -160,6 +172,219 @@ class MapReportsView(LoginRequiredMixin, View):
         return render(request, 'mapper/partials/fail.html')
 
 
+def parse_bbox(value):
+    """
+    Parse a "west,south,east,north" bounding box in decimal degrees.
+
+    Args:
+        value (str | None): The bbox query parameter.
+
+    Returns:
+        tuple[float, float, float, float] | None: The box, or None if it is
+        missing or malformed.
+    """
+    try:
+        west, south, east, north = (float(v) for v in value.split(','))
+    except (AttributeError, ValueError):
+        return None
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+        return None
+    return west, south, east, north
+
+
+def reports_feed_state(request):
+    """
+    Return the watermark of the reports feed for a request, computed once
+    per request and shared by the ETag and Last-Modified checks.
+
+    Args:
+        request (HttpRequest): A reports_geojson request.
+
+    Returns:
+        tuple[datetime | None, int] | None: The result of
+        mapper.sync.watermark(), or None if the bbox is invalid.
+    """
+    if not hasattr(request, '_reports_feed_state'):
+        bbox = parse_bbox(request.GET.get('bbox'))
+        request._reports_feed_state = \
+            sync.watermark(request.user, bbox) if bbox else None
+    return request._reports_feed_state
+
+
+def reports_feed_etag(request):
+    """
+    Return a strong ETag for a reports_geojson response: a hash of the
+    user's visibility scope, the query string and the feed watermark.
+    """
+    state = reports_feed_state(request)
+    if state is None:
+        return None
+    latest, count = state
+    key = (f"{tiles.scope_for(request.user)}|{request.GET.urlencode()}|"
+           f"{latest.isoformat() if latest else ''}|{count}")
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def reports_feed_last_modified(request):
+    """
+    Return the time of the latest change in the requested area.
+    """
+    state = reports_feed_state(request)
+    return state[0] if state else None
+
+
+@login_required
+@condition(etag_func=reports_feed_etag,
+           last_modified_func=reports_feed_last_modified)
+def reports_geojson(request):
+    """
+    Return the reports inside a map viewport as a GeoJSON FeatureCollection.
+
+    Query parameters:
+      - bbox (required): "west,south,east,north" in decimal degrees.
+      - limit: maximum features per page (default REPORTS_GEOJSON_LIMIT,
+        capped at REPORTS_GEOJSON_MAX_LIMIT).
+      - cursor: the `next_cursor` of the previous page.
+      - since: the `sync_cursor` of an earlier response; only reports
+        changed since then are returned, and `deleted` lists the ids of
+        reports deleted since then.
+
+    The feed does not depend on the zoom level: the map only requests it
+    above REPORT_CLUSTER_MAX_ZOOM and uses report_clusters at lower zooms.
+
+    Only reports the user may see are returned (all for superusers,
+    otherwise their own), ordered by id. Each feature is a Point with the
+    serialised report as its properties. The response is streamed from a
+    `.values()` query, so memory use and query count do not grow with the
+    number of reports. When more reports match,
+    `next_cursor` holds the value to pass as `cursor` for the next page;
+    otherwise it is null. `sync_cursor` is the value to pass as `since`
+    next time. If `since` is too old to be served incrementally, the full
+    set is returned with `reset` set to true.
+
+    Responses carry an ETag and Last-Modified derived from the latest
+    change in the area, so conditional requests for an unchanged area get
+    304 Not Modified.
+
+    Args:
+        request (HttpRequest): The incoming HTTP GET request.
+
+    Returns:
+        StreamingHttpResponse: The FeatureCollection.
+        HttpResponseBadRequest: If bbox, limit, cursor or since are
+        invalid.
+    """
+    bbox = parse_bbox(request.GET.get('bbox'))
+    if bbox is None:
+        return HttpResponseBadRequest("bbox must be west,south,east,north")
+    try:
+        limit = int(request.GET.get('limit', settings.REPORTS_GEOJSON_LIMIT))
+        cursor = int(request.GET.get('cursor', 0))
+        since = sync.parse_since(request.GET.get('since'))
+    except ValueError:
+        return HttpResponseBadRequest(
+            "limit and cursor must be integers and since a sync_cursor")
+    limit = max(1, min(limit, settings.REPORTS_GEOJSON_MAX_LIMIT))
+    reset = since is not None and sync.is_expired(since)
+    if reset:
+        since = None
+
+    latest, _ = reports_feed_state(request)
+    reports = Report.objects.visible_to(request.user).in_bbox(*bbox) \
+                            .filter(id__gt=cursor)
+    deleted = []
+    if since is not None:
+        reports = reports.filter(updated_at__gt=since - timedelta(
+            seconds=settings.REPORT_SYNC_OVERLAP))
+        if not cursor:
+            deleted = sync.deleted_since(request.user, bbox, since)
+
+    # Keyset pagination on id; the features are streamed from a
+    # server-side cursor rather than built in memory
+    return StreamingHttpResponse(
+        stream_feature_collection(
+            reports.order_by('id'), limit,
+            {'deleted': deleted, 'reset': reset,
+             'sync_cursor': (latest or timezone.now()).isoformat()}),
+        content_type='application/json')
+
+
+@login_required
+def report_clusters(request):
+    """
+    Return clusters of reports inside a map viewport as GeoJSON.
+
+    Query parameters:
+      - bbox (required): "west,south,east,north" in decimal degrees.
+      - zoom (required): the map's zoom level, clamped to
+        0..REPORT_CLUSTER_MAX_ZOOM.
+
+    Each feature is a Point at the mean position of the clustered reports,
+    with properties 'count' and the number of reports per condition
+    ('none', 'green', 'orange', 'red', 'white'). Only reports the user may
+    see are counted. Clusters are computed per tile and cached (see
+    mapper.clusters).
+
+    Args:
+        request (HttpRequest): The incoming HTTP GET request.
+
+    Returns:
+        JsonResponse: The FeatureCollection.
+        HttpResponseBadRequest: If bbox or zoom are invalid, or the box
+        covers too many tiles.
+    """
+    bbox = parse_bbox(request.GET.get('bbox'))
+    try:
+        zoom = int(request.GET['zoom'])
+    except (KeyError, ValueError):
+        zoom = None
+    if bbox is None or zoom is None:
+        return HttpResponseBadRequest(
+            "bbox (west,south,east,north) and zoom are required")
+    zoom = max(0, min(zoom, settings.REPORT_CLUSTER_MAX_ZOOM))
+    if len(tiles.tiles_for_bbox(*bbox, zoom)) > clusters.MAX_TILES:
+        return HttpResponseBadRequest("bbox is too large for this zoom")
+
+    features = [{
+        'type': 'Feature',
+        'geometry': {'type': 'Point',
+                     'coordinates': [cluster.pop('longitude'),
+                                     cluster.pop('latitude')]},
+        'properties': cluster,
+    } for cluster in clusters.get_clusters(request.user, bbox, zoom)]
+    return JsonResponse({'type': 'FeatureCollection', 'features': features})
+
+
+@login_required
+def report_vector_tile(request, z, x, y):
+    """
+    Return a Mapbox Vector Tile of the reports the user may see.
+
+    The tile has one layer, 'reports', with a point per report carrying
+    'id', 'user_report_number' and 'condition'. Tiles are cached per user
+    scope and dropped when a report inside them changes (see
+    mapper.vector_tiles). A tile without reports has an empty body.
+
+    Args:
+        request (HttpRequest): The incoming HTTP request.
+        z (int): Zoom level, at most REPORT_TILE_MAX_ZOOM.
+        x (int): X coordinate of the requested tile.
+        y (int): Y coordinate of the requested tile.
+
+    Returns:
+        HttpResponse: The tile (`application/vnd.mapbox-vector-tile`).
+
+    Raises:
+        Http404: If the tile coordinates are out of range.
+    """
+    if z > settings.REPORT_TILE_MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+        raise Http404("Tile out of range.")
+    tile = vector_tiles.get_tile(request.user, z, x, y)
+    return HttpResponse(tile,
+                        content_type="application/vnd.mapbox-vector-tile",
+                        headers={"Cache-Control": "private, no-cache"})
+
+
 @require_POST
 @login_required
 def update_report_location(request, pk):
@@ -172,11 +397,11 @@ def update_report_location(request, pk):
 
     Parses 'latitude' and 'longitude' from request.POST:
       - Returns HttpResponseBadRequest if values are missing or invalid.
-      - Updates the Report instance, triggering reverse geocoding and spatial
-        lookups on save().
+      - Updates the Report instance, triggering spatial lookups on save()
+        and queuing reverse geocoding for the background worker.
       - Adds a SUCCESS message and returns the HTMX partial
         'mapper/partials/success.html'
-        with context {'report': serialise_report(report)}.
+        with context {'report': serialised_report(report)}.
 
     Args:
         request (HttpRequest): The incoming POST request containing 'latitude'
@@ -202,17 +427,17 @@ def update_report_location(request, pk):
     # Get the report object and update its location
     report.latitude = lat
     report.longitude = lon
-    # save handles updating the place_name, county and local authority
+    # save handles updating the county and local authority, and queues the
+    # place_name for the geocode worker. The instance is up to date
+    # afterwards, so it does not need reloading.
     report.save()
-    # get the updated report object
-    report.refresh_from_db()
     # Create success message
     messages.add_message(request, messages.SUCCESS,
                          'Location updated successfully!')
     # render a small partial that HTMX will swap
     return render(request,
                   'mapper/partials/success.html',
-                  {'report': serialise_report(report)})
+                  {'report': serialised_report(report)})
 
 
 def edit_report(request, pk):
@@ -382,7 +607,8 @@ def report_detail(request, pk):
     Display detailed information for a single dropped-kerb report.
 
     - Retrieves the Report by primary key (404 if not found).
-    - If `place_name` is missing, attempts reverse geocoding and saves it.
+    - Never geocodes or writes: a missing `place_name` is filled in by the
+      background geocode worker.
     - For HTMX or AJAX requests, returns JsonResponse with serialised report
       data.
     - For standard requests, renders 'mapper/report_detail.html' with the
@@ -404,31 +630,65 @@ def report_detail(request, pk):
         messages.error(request, "Sorry, you cannot view that report.")
         return redirect('reports-list')
 
-    # check if the place_name is empty and reverse geocode if necessary
-    if not report.place_name:
-        success = report.reverse_geocode(report.latitude, report.longitude)
-        if success:
-            report.save(update_fields=['place_name'])
-
     # Check if the request is an AJAX or HTMX request
     if request.headers.get('HX-Request') \
             or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return JsonResponse(serialise_report(report))
+        return JsonResponse(serialised_report(report))
 
     # Render the report detail page for non-AJAX requests
     return render(request, "mapper/report_detail.html", {"report": report})
 
 
+def upstream_error_response(error):
+    """
+    Build the response for a tile request whose upstream failed.
+
+    The response is marked uncacheable so that browsers retry the tile
+    once the upstream recovers.
+
+    Args:
+        error (upstream.UpstreamError): The failure.
+
+    Returns:
+        HttpResponse: 503 if this process had too many requests in flight to
+        the host, otherwise 502.
+    """
+    busy = isinstance(error, upstream.HostBusyError)
+    return HttpResponse(status=503 if busy else 502,
+                        headers={"Cache-Control": "no-store"})
+
+
+def session_unavailable_response():
+    """
+    Build the response for a Google tile request made while no Google Maps
+    session is available yet.
+
+    Returns:
+        HttpResponse: An uncacheable 503, asking the client to retry shortly.
+    """
+    return HttpResponse(status=503, headers={"Cache-Control": "no-store",
+                                             "Retry-After": "5"})
+
+
 def get_os_map_tiles(request, z, x, y):
     """
     Proxy view to fetch Ordnance Survey raster map tiles.
 
     - Caps `z` (zoom level) at a configured maximum (20).
-    - Builds the OS Maps API URL using `z`, `x`, `y` and the
-      `OS_MAPS_API_KEY` environment variable.
-    - Performs an HTTP GET to retrieve the PNG tile.
-    - On success (HTTP 200), returns the tile bytes as an `image/png` response
-    - On failure, returns a 404 response with caching headers
+    - Answers `If-None-Match` with 304 if it matches the tile in the
+      on-disk tile cache, without contacting OS.
+    - Serves the tile from the on-disk tile cache if it is there.
+    - Otherwise builds the OS Maps API URL using `z`, `x`, `y` and the
+      `OS_MAPS_API_KEY` environment variable (see os_tile_url()).
+    - Performs an HTTP GET through the pooled 'os_tiles' session (see
+      fetch_tile()) to retrieve the PNG tile; concurrent requests for the
+      same tile share one fetch.
+    - On success (HTTP 200), caches the tile and returns the tile bytes as
+      an `image/png` response
+    - Tiles are served with a strong ETag and `Cache-Control`/`Expires`
+      headers (see tile_response()).
+    - If OS cannot be reached, returns an uncached 502 or 503 response.
+    - On other failures, returns a 404 response with caching headers
       (`Cache-Control: public, max-age=3600`).
 
     Args:
@@ -438,24 +698,35 @@ def get_os_map_tiles(request, z, x, y):
         y (int): Y coordinate of the requested tile.
 
     Returns:
-        HttpResponse: The PNG tile on success, or a 404 response on error.
+        HttpResponse: The PNG tile on success, or an error response.
     """
     # Limit the maximum zoom level to 20
     max_zoom = 20
     if z > max_zoom:
         z = min(z, max_zoom)
 
-    api_key = os.environ.get("OS_MAPS_API_KEY")
+    # Revalidation of the browser's copy is answered from the tile cache
+    response = not_modified(request, 'os', z, x, y)
+    if response is not None:
+        return response
+
+    cached = tile_cache.get('os', z, x, y)
+    if cached:
+        return tile_response('os', cached.content, cached.content_type,
+                             cached.etag)
 
     # Construct the Ordnance Survey tile URL
-    tile_url = f"https://api.os.uk/maps/raster/v1/zxy/Light_3857/{z}/{x}/{y}.png?key={api_key}"
+    tile_url = os_tile_url(z, x, y)
 
     # Make a GET request to fetch the tile image
-    response = requests.get(tile_url)
+    try:
+        status, content = fetch_tile('os', 'os_tiles', z, x, y, tile_url)
+    except upstream.UpstreamError as e:
+        return upstream_error_response(e)
 
-    if response.status_code == 200:
+    if status == 200:
         # Return the image content with appropriate content-type
-        return HttpResponse(response.content, content_type="image/png")
+        return tile_response('os', content, "image/png")
 
     # Return a 404 response with caching headers
     return HttpResponse(
@@ -470,15 +741,24 @@ def get_google_satellite_tiles(request, z, x, y):
     """
     Proxy view to fetch Google Maps satellite tiles with session management.
 
-    - Retrieves or creates a Google Maps session token via
+    - Answers `If-None-Match` with 304 if it matches the tile in the
+      on-disk tile cache, without contacting Google.
+    - Serves the tile from the on-disk tile cache if it is there.
+    - Otherwise retrieves or creates a Google Maps session token via
       get_google_session_token().
     - Constructs the tile URL using `z`, `x`, `y`, the session token, and
       `GOOGLE_MAPS_API_KEY`.
-    - Sends an HTTP GET to the Google Maps 2D tiles endpoint.
-    - On HTTP 200, returns the tile bytes with content-type `image/png`.
+    - Sends an HTTP GET to the Google Maps 2D tiles endpoint through the
+      pooled 'google_tiles' session (see fetch_tile()); concurrent
+      requests for the same tile share one fetch.
+    - On HTTP 200, caches the tile and returns the tile bytes with
+      content-type `image/png`, a strong ETag and `Cache-Control`/`Expires`
+      headers (see tile_response()).
     - On HTTP 404, returns a 404 response with caching headers
       (`Cache-Control: public, max-age=3600`).
-    - On other error statuses or token failures, raises Http404.
+    - If Google cannot be reached, or no session token is available yet,
+      returns an uncached 502 or 503 response.
+    - On other error statuses, raises Http404.
 
     Args:
         request (HttpRequest): The incoming HTTP request.
@@ -492,26 +772,38 @@ def get_google_satellite_tiles(request, z, x, y):
         found.
 
     Raises:
-        Http404: If the session token cannot be obtained or other non-404
-        errors occur.
+        Http404: If Google returns an error status other than 404.
     """
-    # Check if the session token is cached, if not, create a new one
+    # Revalidation of the browser's copy is answered from the tile cache
+    response = not_modified(request, 'google', z, x, y)
+    if response is not None:
+        return response
+
+    cached = tile_cache.get('google', z, x, y)
+    if cached:
+        return tile_response('google', cached.content, cached.content_type,
+                             cached.etag)
+
+    # The session is created in the background if there is none yet
     try:
         session_token = get_google_session_token()
-    except Exception as e:
-        raise Http404("Could not obtain session token: " + str(e))
+    except SessionTokenError:
+        return session_unavailable_response()
 
     api_key = os.environ.get("GOOGLE_MAPS_API_KEY")
     # Construct the Google Maps tile URL
     tile_url = f"https://tile.googleapis.com/v1/2dtiles/{z}/{x}/{y}?session={session_token}&key={api_key}"
 
     # Make a GET request to fetch the tile image
-    response = requests.get(tile_url)
+    try:
+        status, content = fetch_tile('google', 'google_tiles', z, x, y, tile_url)
+    except upstream.UpstreamError as e:
+        return upstream_error_response(e)
 
-    if response.status_code == 200:
+    if status == 200:
         # Return the image content with appropriate content-type
-        return HttpResponse(response.content, content_type="image/png")
-    if response.status_code == 404:  # Tile not found at requested zoom level
+        return tile_response('google', content, "image/png")
+    if status == 404:  # Tile not found at requested zoom level
         # Return a 404 response with caching headers
         return HttpResponse(
             status=404,
@@ -1,19 +1,142 @@
 import addMarkerForReport from "./add-marker-for-report.js";
+import removeMarkerForReport from "./remove-marker-for-report.js";
+import { loadClustersInView, setClusterMode } from "./show-report-clusters.js";
+import { tilesForBounds, tileBbox, readTile, writeTile, viewportBbox } from "./report-tile-cache.js";
+
+// Maximum pages fetched for one tile (each page is capped by the server)
+const MAX_PAGES = 10;
+// Wait this long after the map stops moving before fetching (ms)
+const FETCH_DELAY = 250;
+
+let fetchTimer = null;
+let fetchGeneration = 0;
+
 /**
-* Gets the embedded reports data (JSON)
-* parses it into an array of report objects, and calls
-* addMarkerForReport(report) for each to place them on the map.
-* Finally removes the embedded from the DOM to clean up.
+* Adds (or replaces) the marker of a report.
 */
-export default function addExistingReportsToMap() {
-    // Retrieve the reports data from the embedded JSON script
-    const reportsData = document.getElementById('reports-data');
-    const reports = JSON.parse(reportsData.textContent);
-    // Add markers for each report
-    reports.forEach(report => {
-        addMarkerForReport(report); // Add marker for each report
+function showReport(report) {
+    if (DKM.reportIds.has(report.id)) {
+        removeMarkerForReport(report.id);
+    }
+    addMarkerForReport(report);
+}
+
+/**
+* Removes a report's marker if it is inside the given bounding box; a report
+* that moved may already be shown in the tile it moved to.
+*/
+function hideReportInBbox(reportId, [west, south, east, north]) {
+    const marker = DKM.markers.find(m => m._reportId === reportId);
+    if (!marker) {
+        return;
+    }
+    const { lng, lat } = marker.getLngLat();
+    if (lng >= west && lng <= east && lat >= south && lat <= north) {
+        removeMarkerForReport(reportId);
+    }
+}
+
+/**
+* Brings one tile up to date.
+* Shows the tile's cached reports straight away, then asks the server for
+* what changed since the tile's `sync_cursor` (or for everything, the first
+* time), following `next_cursor` pages. Deleted and moved reports are
+* removed, changed ones replaced, and the cache entry is saved.
+* Unchanged tiles are answered with 304 Not Modified, which the browser
+* turns into its own cached response.
+*/
+async function syncTile(tile, generation) {
+    const bbox = tileBbox(tile);
+    const entry = readTile(tile);
+    Object.values(entry.reports).forEach(report => {
+        if (!DKM.reportIds.has(report.id)) {
+            addMarkerForReport(report);
+        }
     });
 
-    // remove the reports data from the DOM
-    reportsData.remove();
-}
\ No newline at end of file
+    let cursor = null;
+    let syncCursor = entry.cursor;
+    for (let page = 0; page < MAX_PAGES; page++) {
+        const params = new URLSearchParams({ bbox: bbox.join(',') });
+        if (entry.cursor) {
+            params.set('since', entry.cursor);
+        }
+        if (cursor !== null) {
+            params.set('cursor', cursor);
+        }
+        let data;
+        try {
+            const response = await fetch(`${reportsGeojsonUrl}?${params}`, {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' },
+                cache: 'no-cache', // Revalidate with the ETag
+            });
+            if (!response.ok) {
+                return;
+            }
+            data = await response.json();
+        } catch (error) {
+            console.error('Error loading reports:', error);
+            return;
+        }
+        // The map has moved on; a newer request will load the new viewport
+        if (generation !== fetchGeneration) {
+            return;
+        }
+        if (data.reset) {
+            Object.keys(entry.reports).forEach(id => hideReportInBbox(Number(id), bbox));
+            entry.reports = {};
+        }
+        data.deleted.forEach(id => {
+            delete entry.reports[id];
+            hideReportInBbox(id, bbox);
+        });
+        data.features.forEach(feature => {
+            entry.reports[feature.id] = feature.properties;
+            showReport(feature.properties);
+        });
+        syncCursor = data.sync_cursor;
+        cursor = data.next_cursor;
+        if (cursor === null) {
+            // Only a complete sync moves the tile's cursor forward
+            entry.cursor = syncCursor;
+            writeTile(tile, entry);
+            return;
+        }
+    }
+}
+
+/**
+* Loads the reports inside the current map viewport.
+* Up to reportClusterMaxZoom, server-side clusters are drawn instead of
+* markers. Beyond it, each tile covering the viewport is synced (see
+* syncTile). If the map moves while tiles are loading, the stale requests
+* are abandoned.
+*/
+async function loadReportsInView() {
+    const generation = ++fetchGeneration;
+    const bbox = viewportBbox(DKM.map.getBounds());
+    const zoom = Math.floor(DKM.map.getZoom());
+
+    const clustered = zoom <= reportClusterMaxZoom;
+    setClusterMode(clustered);
+    if (clustered) {
+        await loadClustersInView(bbox.map(value => value.toFixed(6)).join(','), zoom);
+        return;
+    }
+
+    await Promise.all(tilesForBounds(bbox).map(tile => syncTile(tile, generation)));
+}
+
+/**
+* Loads the reports in view once the map is ready, then again (debounced)
+* each time the user pans or zooms, so only the reports near the viewport
+* are ever fetched.
+*/
+export default function addExistingReportsToMap() {
+    const scheduleLoad = () => {
+        clearTimeout(fetchTimer);
+        fetchTimer = setTimeout(loadReportsInView, FETCH_DELAY);
+    };
+    DKM.map.on('load', scheduleLoad);
+    DKM.map.on('moveend', scheduleLoad);
+}
@@ -11,7 +11,8 @@ import updateReportLocation from "./update-report-location.js";
  *     a success message
  *   - Clicking elsewhere on the map disables dragging mode
  *   - Marker colour reflects the report condition (or purple when dragging)
- *   - Saves the marker and its popup in the global DKM.markers array
+ *   - Saves the marker and its popup in the global DKM.markers array,
+ *     and the report id in DKM.reportIds
  *
  *   The input report data object is expected to contain:
  *   - id                – numeric primary key
@@ -151,6 +152,7 @@ export default function addMarkerForReport(report) {
     marker._reportId = report.id;
     // add the marker to the markers array
     DKM.markers.push(marker);
+    DKM.reportIds.add(report.id);
 }
 
 // Attach the function to the global window object for use when a new marker is added
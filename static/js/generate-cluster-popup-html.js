@@ -0,0 +1,22 @@
+/**
+ * Constructs an HTML snippet for a report cluster popup.
+ * - Shows the number of reports in the cluster.
+ * - Lists the number of reports for each condition present.
+ *
+ *   The input cluster properties are expected to contain `count` and a
+ *   count for each condition: red, orange, white, green, none.
+ *
+ *   Returns an HTML string suitable for use in a MapLibre GL Popup.
+ */
+export default function generateClusterPopupHTML(cluster) {
+    const labels = { red: 'Red', orange: 'Orange', white: 'White', green: 'Green', none: 'None' };
+    const rows = Object.entries(labels)
+        .filter(([condition]) => cluster[condition] > 0)
+        .map(([condition, label]) => `<p><span>${label}: ${cluster[condition]}</span></p>`)
+        .join('');
+    return `
+        <p><span>${cluster.count} report${cluster.count === 1 ? '' : 's'}</span></p>
+        ${rows}
+        <p><span>Zoom in to see individual reports</span></p>
+    `;
+}
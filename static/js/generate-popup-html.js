@@ -34,7 +34,7 @@ export default function generatePopupHTML(report) {
             <span id="latitude-${report.id}"> ${report.latitude}, </span>
             <span id="longitude-${report.id}"> ${report.longitude}</span>
         </p>
-        <p><span id="place_name-${report.id}"> ${report.place_name || 'Unknown'}</span></p>
+        <p><span id="place_name-${report.id}"> ${report.place_name || (report.place_name_pending ? 'Place name pending' : 'Unknown')}</span></p>
         <p><span id="county-${report.id}"> ${report.county}</span></p>
         <p>${report.reasons}</p>
         <p>${report.comments}</p>
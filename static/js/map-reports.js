@@ -21,6 +21,7 @@ document.addEventListener('DOMContentLoaded', () => {
     DKM.newMarker = null; // Initialise new map marker for the clicked location on adding a new report
     DKM.ukBoundary = null; // Initialise UK boundary variable
     DKM.markers = []; // Initialise markers array to store all markers on the map
+    DKM.reportIds = new Set(); // Ids of the reports that already have a marker
     
     // create the map with OS tiles and set the view to the UK
     initialiseMap(); 
@@ -31,7 +32,7 @@ document.addEventListener('DOMContentLoaded', () => {
     // Load the UK boundary coordinates (GeoJSON)
     loadUKBoundary(); 
 
-    // Add existing reports to the map. 
+    // Add existing reports to the map as the user pans.
     // If not superuser, only add users reports, otherwise add all reports
     addExistingReportsToMap();
 
@@ -0,0 +1,13 @@
+/**
+ * Removes the map marker of a report, if there is one, and forgets it in
+ * DKM.markers and DKM.reportIds.
+ * @param {number} reportId - the report's primary key
+ */
+export default function removeMarkerForReport(reportId) {
+    const index = DKM.markers.findIndex(m => m._reportId === reportId);
+    if (index !== -1) {
+        DKM.markers[index].remove();
+        DKM.markers.splice(index, 1);
+    }
+    DKM.reportIds.delete(reportId);
+}
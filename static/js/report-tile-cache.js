@@ -0,0 +1,104 @@
+/**
+ * Client-side cache of the reports feed, one entry per fixed map tile.
+ *
+ * The reports are fetched in tiles at FETCH_ZOOM rather than for the exact
+ * viewport, so each area always has the same request URL and its own
+ * `sync_cursor`. Entries are kept in localStorage, so a returning user sees
+ * their reports at once and only downloads what changed since their last
+ * visit. Storage errors (quota, private browsing) are ignored; the cache
+ * is then simply empty.
+ */
+
+// Zoom level of the tiles reports are fetched and cached by
+export const FETCH_ZOOM = 12;
+
+// Prefix of the localStorage keys, per user so accounts never share data
+const KEY_PREFIX = `dkm-reports:${window.CURRENT_USER_ID}:`;
+
+// Latitude limit of the Web Mercator map
+const MAX_LATITUDE = 85.05;
+
+/**
+ * Returns the map bounds as a bounding box the server accepts.
+ * After panning across the antimeridian the bounds lie outside -180..180,
+ * so the west edge is wrapped back into range and the box is cut off at
+ * 180; latitudes are clamped to the Web Mercator limits.
+ * @param {maplibregl.LngLatBounds} bounds - the map viewport
+ * @returns {number[]} [west, south, east, north] in decimal degrees
+ */
+export function viewportBbox(bounds) {
+    const clampLat = lat => Math.min(MAX_LATITUDE, Math.max(-MAX_LATITUDE, lat));
+    const south = clampLat(bounds.getSouth());
+    const north = clampLat(bounds.getNorth());
+    const width = bounds.getEast() - bounds.getWest();
+    if (width >= 360) {
+        return [-180, south, 180, north];
+    }
+    let west = bounds.getWest();
+    if (west < -180 || west >= 180) {
+        west = ((west + 180) % 360 + 360) % 360 - 180;
+    }
+    return [west, south, Math.min(west + width, 180), north];
+}
+
+/**
+ * Returns the tiles at FETCH_ZOOM covering a bounding box.
+ * @param {number[]} bbox - [west, south, east, north], see viewportBbox
+ * @returns {Array<{x: number, y: number}>} tile columns and rows
+ */
+export function tilesForBounds([west, south, east, north]) {
+    const n = 2 ** FETCH_ZOOM;
+    const column = lon => Math.min(n - 1, Math.max(0, Math.floor((lon + 180) / 360 * n)));
+    const row = lat => {
+        const rad = lat * Math.PI / 180;
+        const y = Math.floor((1 - Math.asinh(Math.tan(rad)) / Math.PI) / 2 * n);
+        return Math.min(n - 1, Math.max(0, y));
+    };
+    const tiles = [];
+    for (let y = row(north); y <= row(south); y++) {
+        for (let x = column(west); x <= column(east); x++) {
+            tiles.push({ x, y });
+        }
+    }
+    return tiles;
+}
+
+/**
+ * Returns the bounding box of a tile at FETCH_ZOOM.
+ * @param {{x: number, y: number}} tile
+ * @returns {number[]} [west, south, east, north] in decimal degrees
+ */
+export function tileBbox(tile) {
+    const n = 2 ** FETCH_ZOOM;
+    const lat = row => Math.atan(Math.sinh(Math.PI * (1 - 2 * row / n))) * 180 / Math.PI;
+    return [tile.x / n * 360 - 180, lat(tile.y + 1), (tile.x + 1) / n * 360 - 180, lat(tile.y)];
+}
+
+/**
+ * Reads a tile's cache entry.
+ * @returns {{cursor: string|null, reports: Object}} reports keyed by id
+ */
+export function readTile(tile) {
+    try {
+        const entry = localStorage.getItem(`${KEY_PREFIX}${tile.x}/${tile.y}`);
+        if (entry) {
+            return JSON.parse(entry);
+        }
+    } catch (error) {
+        // Unreadable entries are treated as missing
+    }
+    return { cursor: null, reports: {} };
+}
+
+/**
+ * Stores a tile's cache entry.
+ * @param {{x: number, y: number}} tile
+ * @param {{cursor: string|null, reports: Object}} entry
+ */
+export function writeTile(tile, entry) {
+    try {
+        localStorage.setItem(`${KEY_PREFIX}${tile.x}/${tile.y}`, JSON.stringify(entry));
+    } catch (error) {
+        // Quota exceeded or storage unavailable: keep going without a cache
+    }
+}
@@ -0,0 +1,94 @@
+import generateClusterPopupHTML from "./generate-cluster-popup-html.js";
+
+// Circle colour for each condition, matching setMarkerColour()
+const CONDITION_COLOURS = {
+    red: "#c9352a",
+    orange: "#bd612c",
+    green: "#637052",
+    white: "#F8F8FF",
+    none: "SteelBlue",
+};
+
+/**
+* Adds the GeoJSON source and circle layer used to draw report clusters.
+* Each cluster is a circle sized by its report count and coloured by its
+* most urgent condition (red, then orange, white, green, none). Clicking a
+* cluster opens a popup with the breakdown by condition.
+* Called once, when the map has loaded.
+*/
+function addClusterLayer() {
+    DKM.map.addSource("report-clusters", {
+        type: "geojson",
+        data: { type: "FeatureCollection", features: [] },
+    });
+    DKM.map.addLayer({
+        id: "report-clusters-layer",
+        type: "circle",
+        source: "report-clusters",
+        paint: {
+            "circle-radius": ["step", ["get", "count"], 8, 10, 12, 100, 16, 1000, 22],
+            "circle-color": ["case",
+                [">", ["get", "red"], 0], CONDITION_COLOURS.red,
+                [">", ["get", "orange"], 0], CONDITION_COLOURS.orange,
+                [">", ["get", "white"], 0], CONDITION_COLOURS.white,
+                [">", ["get", "green"], 0], CONDITION_COLOURS.green,
+                CONDITION_COLOURS.none],
+            "circle-stroke-color": "#FFFFFF",
+            "circle-stroke-width": 2,
+            "circle-opacity": 0.85,
+        },
+    });
+    DKM.map.on("click", "report-clusters-layer", e => {
+        const cluster = e.features[0];
+        new maplibregl.Popup()
+            .setLngLat(cluster.geometry.coordinates)
+            .setHTML(generateClusterPopupHTML(cluster.properties))
+            .addTo(DKM.map);
+    });
+    DKM.map.on("mouseenter", "report-clusters-layer", () => {
+        DKM.map.getCanvas().style.cursor = "pointer";
+    });
+    DKM.map.on("mouseleave", "report-clusters-layer", () => {
+        DKM.map.getCanvas().style.cursor = "";
+    });
+}
+
+/**
+* Switches between the cluster layer (zoomed out) and individual report
+* markers (zoomed in).
+* @param {boolean} clustered - true to show clusters and hide the markers
+*/
+export function setClusterMode(clustered) {
+    if (!DKM.map.getLayer("report-clusters-layer")) {
+        addClusterLayer();
+    }
+    DKM.map.setLayoutProperty("report-clusters-layer", "visibility",
+                              clustered ? "visible" : "none");
+    DKM.markers.forEach(marker => {
+        marker.getElement().style.display = clustered ? "none" : "";
+    });
+}
+
+/**
+* Fetches the clusters for the current viewport and zoom level and draws
+* them on the cluster layer.
+* @param {string} bbox - "west,south,east,north" of the viewport
+* @param {number} zoom - the map's zoom level
+* @returns {Promise<boolean>} false if the request failed
+*/
+export async function loadClustersInView(bbox, zoom) {
+    try {
+        const params = new URLSearchParams({ bbox, zoom });
+        const response = await fetch(`${reportClustersUrl}?${params}`, {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' },
+        });
+        if (!response.ok) {
+            return false;
+        }
+        DKM.map.getSource("report-clusters").setData(await response.json());
+        return true;
+    } catch (error) {
+        console.error('Error loading report clusters:', error);
+        return false;
+    }
+}